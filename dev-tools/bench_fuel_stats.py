@@ -0,0 +1,84 @@
+"""Benchmark: fleet fuel statistics in pure Python vs. the NumPy engine.
+
+Generates synthetic `Abastecimento` rows (monotonic odometer per vehicle),
+then runs:
+
+- `compute_aggregates` (pure Python reference, rows pre-sorted);
+- `load_columns` + `compute_fleet_stats` (vectorized engine, unsorted rows).
+
+It checks that both produce the same totals and km/L per vehicle, and prints
+the timings and the speedup.
+
+Usage: python dev-tools/bench_fuel_stats.py [--rows 1000000] [--vehicles 2000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'transporte'))
+
+from app.utils.fuel_stats import compute_fleet_stats, load_columns  # noqa: E402
+from app.utils.fueling_aggregates import compute_aggregates  # noqa: E402
+
+
+def generate_rows(n_rows, n_vehicles, seed=42):
+    rng = random.Random(seed)
+    km = {v: rng.randint(1000, 200000) for v in range(1, n_vehicles + 1)}
+    rows = []
+    for _ in range(n_rows):
+        vehicle_id = rng.randint(1, n_vehicles)
+        litros = round(rng.uniform(40, 400), 2)
+        km[vehicle_id] += int(litros * rng.uniform(2.0, 4.0))
+        rows.append({
+            'id_empresa': 1,
+            'id_veiculo': vehicle_id,
+            'km_registro': km[vehicle_id],
+            'litros': litros,
+            'valor_litro': round(rng.uniform(5.5, 6.8), 2),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--vehicles', type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f'Gerando {args.rows:,} abastecimentos para {args.vehicles:,} veículos...')
+    rows = generate_rows(args.rows, args.vehicles)
+    sorted_rows = sorted(rows, key=lambda r: (r['id_veiculo'], r['km_registro']))
+
+    t0 = time.perf_counter()
+    reference = compute_aggregates(sorted_rows)
+    t_python = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    cols = load_columns(rows)
+    t_load = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    stats = compute_fleet_stats(cols)
+    t_numpy = time.perf_counter() - t0
+
+    mismatches = 0
+    for vehicle_id, ref in reference.items():
+        got = stats[vehicle_id]
+        for field in ('custo_total', 'total_litros', 'soma_km_l'):
+            if abs(float(ref[field]) - got[field]) > 0.011:
+                mismatches += 1
+        if ref['num_km_l'] != got['num_km_l'] or ref['ultimo_km'] != got['ultimo_km']:
+            mismatches += 1
+
+    print(f'Python puro (referência):     {t_python:8.3f} s')
+    print(f'NumPy (carga em colunas):     {t_load:8.3f} s')
+    print(f'NumPy (cálculo vetorizado):   {t_numpy:8.3f} s')
+    print(f'Speedup (cálculo):            {t_python / t_numpy:8.1f}x')
+    print(f'Speedup (carga + cálculo):    {t_python / (t_load + t_numpy):8.1f}x')
+    print(f'Divergências:                 {mismatches}')
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,227 @@
+"""Benchmark: main routes against the in-memory Supabase fake (SUPABASE_BACKEND=fake).
+
+For each fleet size it seeds one company (vehicles, fuelings with monotonic
+odometers, maintenance history and predictive schedules), rebuilds the fueling
+aggregates, and then measures through the Flask test client:
+
+- `main_dashboard` (cold: caches and alert snapshot invalidated; warm: cached);
+- `list_vehicles` (first page, and a filtered page sorted by km);
+- `register_fueling` (POST through the `registrar_abastecimento` fake RPC);
+- `check_maintenance_alerts` (cold: alert index reloaded; warm: snapshot hit).
+
+It prints p50/p95/max latency, fake round trips per call and the peak Python
+memory allocated by one call (tracemalloc), plus the process RSS after seeding.
+Latency excludes the network: it measures the app's own work per request.
+
+Usage: python dev-tools/bench_routes.py [--fleet 10,100,1000,10000]
+           [--fuelings-per-vehicle 100] [--max-fuelings 1000000] [--iterations 30]
+"""
+import argparse
+import os
+import random
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'transporte'))
+
+from config import Config  # noqa: E402
+from app import create_app  # noqa: E402
+from app.fake_supabase import get_fake_client, get_fake_database  # noqa: E402
+from app.utils.alert_engine import get_alert_engine  # noqa: E402
+from app.utils.alert_snapshot import invalidate_alert_snapshot  # noqa: E402
+from app.utils.dashboard_cache import invalidate_dashboard  # noqa: E402
+from app.utils.fueling_aggregates import rebuild_aggregates  # noqa: E402
+
+# Each fleet size gets its own company/user id, so the worker caches (odometer index,
+# alert index, user cache) never serve data seeded for a previous size.
+ID_EMPRESA = 1
+ID_USUARIO = 1
+
+
+class BenchConfig(Config):
+    SUPABASE_BACKEND = 'fake'
+    STORAGE_BACKEND = 'local'
+    CACHE_BACKEND = 'memory'
+    SECRET_KEY = 'bench'
+    WTF_CSRF_ENABLED = False
+    ALERT_SCHEDULER_ENABLED = False
+    TRACE_ENABLED = False
+
+
+def seed(n_vehicles, fuelings_per_vehicle, max_fuelings, seed_value=42):
+    """Fills the fake with one company. Returns ({vehicle_id: last km}, fueling count)."""
+    rng = random.Random(seed_value)
+    db = get_fake_database()
+    db.reset()
+    db.load('empresa', [{'id': ID_EMPRESA, 'nome': 'Empresa Benchmark', 'cnpj': '00000000000191'}])
+    db.load('Usuario', [{'id': ID_USUARIO, 'id_empresa': ID_EMPRESA, 'email': 'bench@example.com',
+                         'nome': 'Bench', 'cargo': 'admin', 'senha_hash': None}])
+
+    marcas = [('Volvo', 'FH 540'), ('Scania', 'R 450'), ('Mercedes-Benz', 'Actros'), ('Fiat', 'Strada'), ('VW', 'Delivery')]
+    km = {}
+    vehicles = []
+    for vehicle_id in range(1, n_vehicles + 1):
+        marca, modelo = rng.choice(marcas)
+        km[vehicle_id] = rng.randint(1_000, 50_000)
+        vehicles.append({'id': vehicle_id, 'id_empresa': ID_EMPRESA, 'placa': f"BEN{vehicle_id:05d}",
+                         'marca': marca, 'modelo': modelo, 'ano': rng.randint(2008, 2024),
+                         'tipo_combustivel': rng.choice(['Diesel', 'Gasolina', 'Etanol']), 'km_atual': 0})
+
+    n_fuelings = min(n_vehicles * fuelings_per_vehicle, max_fuelings)
+    start = datetime(2023, 1, 1)
+    step = timedelta(minutes=max(1, int(2 * 365 * 24 * 60 / max(n_fuelings, 1))))
+
+    def fuelings():
+        for i in range(n_fuelings):
+            vehicle_id = rng.randint(1, n_vehicles)
+            litros = round(rng.uniform(40, 300), 2)
+            km[vehicle_id] += int(litros * rng.uniform(2.0, 4.0))
+            yield {'id_empresa': ID_EMPRESA, 'id_veiculo': vehicle_id,
+                   'data_abastecimento': (start + i * step).isoformat(), 'litros': litros,
+                   'valor_litro': round(rng.uniform(5.5, 6.8), 2), 'km_registro': km[vehicle_id],
+                   'local_abastecimento': None, 'id_usuario_registro': ID_USUARIO,
+                   'url_nota_fiscal': None, 'url_nota_fiscal_miniatura': None}
+
+    db.load('Abastecimento', fuelings())
+    for vehicle in vehicles:
+        vehicle['km_atual'] = km[vehicle['id']]
+    db.load('Veiculo', vehicles)
+
+    db.load('Manutencao_Realizada', ({
+        'id_empresa': ID_EMPRESA, 'id_veiculo': rng.randint(1, n_vehicles),
+        'data_realizacao': (date(2023, 1, 1) + timedelta(days=rng.randint(0, 700))).isoformat(),
+        'descricao_servico': 'Revisão', 'custo_total': round(rng.uniform(300, 8000), 2),
+        'oficina_responsavel': 'Oficina', 'id_manutencao_preditiva': None, 'id_usuario_registro': ID_USUARIO,
+    } for _ in range(n_vehicles * 2)))
+
+    db.load('Manutencao_Preditiva', ({
+        'id_empresa': ID_EMPRESA, 'id_veiculo': vehicle_id, 'descricao': 'Troca de óleo', 'status': 'Agendada',
+        'km_agendado': km[vehicle_id] + rng.randint(-2_000, 20_000) if vehicle_id % 2 else None,
+        'data_agendada': None if vehicle_id % 2 else (date.today() + timedelta(days=rng.randint(-10, 120))).isoformat(),
+        'intervalo_alerta': 5_000 if vehicle_id % 2 else 30,
+    } for vehicle_id in range(1, n_vehicles + 1)))
+    return km, n_fuelings
+
+
+def measure(fn, iterations):
+    db = get_fake_database()
+    fn()  # aquecimento (imports, templates)
+    timings = []
+    calls_before = db.calls
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - t0) * 1000)
+    calls = (db.calls - calls_before) / iterations
+
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    timings.sort()
+    return {
+        'p50': statistics.median(timings),
+        'p95': timings[min(len(timings) - 1, int(round(0.95 * (len(timings) - 1))))],
+        'max': timings[-1],
+        'calls': calls,
+        'peak_kb': peak / 1024,
+    }
+
+
+def run_size(app, n_vehicles, args):
+    global ID_EMPRESA, ID_USUARIO
+    ID_EMPRESA = ID_USUARIO = ID_EMPRESA + 1
+    t0 = time.perf_counter()
+    km, n_fuelings = seed(n_vehicles, args.fuelings_per_vehicle, args.max_fuelings)
+    t_seed = time.perf_counter() - t0
+
+    supabase = get_fake_client()
+    with app.app_context():
+        t0 = time.perf_counter()
+        rebuild_aggregates(supabase, ID_EMPRESA)
+        t_rebuild = time.perf_counter() - t0
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    print(f"\n== {n_vehicles:,} veículos, {n_fuelings:,} abastecimentos "
+          f"(carga {t_seed:.1f}s, agregados {t_rebuild:.1f}s, RSS {rss_mb:,.0f} MB) ==")
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(ID_USUARIO)
+        session['_fresh'] = True
+
+    rng = random.Random(7)
+
+    def invalidate_all():
+        with app.app_context():
+            invalidate_dashboard(ID_EMPRESA)
+            invalidate_alert_snapshot(ID_EMPRESA)
+            get_alert_engine().invalidate(ID_EMPRESA)
+
+    def get(path):
+        def call():
+            response = client.get(path)
+            assert response.status_code == 200, (path, response.status_code)
+        return call
+
+    def dashboard_cold():
+        invalidate_all()
+        get('/dashboard/')()
+
+    def register_fueling():
+        vehicle_id = rng.randint(1, n_vehicles)
+        km[vehicle_id] += rng.randint(200, 900)
+        response = client.post('/abastecimento/register', data={
+            'id_veiculo': vehicle_id, 'data_abastecimento': '2025-01-15T10:30',
+            'litros': '120.50', 'valor_litro': '6.19', 'km_registro': km[vehicle_id],
+            'local_abastecimento': 'Posto Benchmark', 'is_tanque_cheio': 'True',
+        })
+        assert response.status_code == 302, response.status_code
+
+    def alerts(cold):
+        from app.blueprints.Maintenance.routes import check_maintenance_alerts
+
+        def call():
+            if cold:
+                invalidate_all()
+            with app.app_context():
+                check_maintenance_alerts(ID_EMPRESA, supabase)
+        return call
+
+    scenarios = [
+        ('main_dashboard (frio)', dashboard_cold),
+        ('main_dashboard (cache)', get('/dashboard/')),
+        ('list_vehicles', get('/veiculos/list')),
+        ('list_vehicles (filtro, km desc)', get('/veiculos/list?marca=vol&ordem=km_atual&direcao=desc')),
+        ('register_fueling (POST)', register_fueling),
+        ('check_maintenance_alerts (frio)', alerts(cold=True)),
+        ('check_maintenance_alerts (snapshot)', alerts(cold=False)),
+    ]
+    print(f"{'cenário':<38} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'chamadas':>9} {'pico KB':>10}")
+    for name, fn in scenarios:
+        result = measure(fn, args.iterations)
+        print(f"{name:<38} {result['p50']:>9.2f} {result['p95']:>9.2f} {result['max']:>9.2f} "
+              f"{result['calls']:>9.1f} {result['peak_kb']:>10,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--fleet', default='10,100,1000,10000', help='comma-separated fleet sizes')
+    parser.add_argument('--fuelings-per-vehicle', type=int, default=100)
+    parser.add_argument('--max-fuelings', type=int, default=1_000_000)
+    parser.add_argument('--iterations', type=int, default=30)
+    args = parser.parse_args()
+
+    app = create_app(BenchConfig)
+    for n_vehicles in (int(size) for size in args.fleet.split(',')):
+        run_size(app, n_vehicles, args)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
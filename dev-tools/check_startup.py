@@ -0,0 +1,103 @@
+"""Cold-start budget check for the Flask app.
+
+Each run starts a fresh interpreter, imports `app` and calls `create_app()`,
+as `wsgi.py` does on a serverless cold start. It then reads the startup
+profile from `app.extensions['startup']` (see `app/utils/startup.py`).
+
+The check fails (exit 1) in either case:
+- the median import + create_app time is over the budget;
+- a deferred module is loaded during startup. Deferred modules are the
+  supabase stack, postgrest, storage3 and numpy, which should only load when
+  the database or the analytics code is first used.
+
+`--top N` lists the slowest imports (self time) from `python -X importtime`,
+which helps find what broke the budget.
+
+Usage: python dev-tools/check_startup.py [--runs 5] [--budget-ms 350] [--top 15]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'transporte')
+
+# Loaded on first use (database client, NumPy analytics), never by create_app
+DEFERRED_MODULES = ['supabase', 'supabase_auth', 'supabase_functions', 'realtime', 'storage3', 'postgrest', 'numpy']
+
+PROBE = '''
+import json, sys
+from app import create_app
+app = create_app()
+print("PROBE " + json.dumps({"startup": app.extensions["startup"], "loaded": sorted(
+    m for m in %r if m in sys.modules)}))
+''' % (DEFERRED_MODULES,)
+
+
+def _env():
+    env = dict(os.environ)
+    # Sem rede nem banco: mede só o código do app
+    env.update({'SUPABASE_BACKEND': 'fake', 'SUPABASE_WARMUP': 'false', 'STARTUP_PROFILE': 'false',
+                'ALERT_SCHEDULER_ENABLED': 'false', 'PYTHONDONTWRITEBYTECODE': '1'})
+    return env
+
+
+def probe(extra_args=()):
+    result = subprocess.run([sys.executable, *extra_args, '-c', PROBE], cwd=APP_DIR, env=_env(),
+                            capture_output=True, text=True, check=True)
+    line = next(l for l in result.stdout.splitlines() if l.startswith('PROBE '))
+    return json.loads(line[len('PROBE '):]), result.stderr
+
+
+def top_imports(n):
+    _, stderr = probe(['-X', 'importtime'])
+    rows = []
+    for line in stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            self_us, cumulative_us, name = [part.strip() for part in line[len('import time:'):].split('|')]
+            if self_us.isdigit():
+                rows.append((int(self_us), int(cumulative_us), name))
+    rows.sort(reverse=True)
+    print(f"\n{'self ms':>9} {'cumul. ms':>10}  module")
+    for self_us, cumulative_us, name in rows[:n]:
+        print(f"{self_us / 1000:>9.1f} {cumulative_us / 1000:>10.1f}  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=float(os.environ.get('STARTUP_BUDGET_MS', 350)))
+    parser.add_argument('--top', type=int, default=0, help='list the N slowest imports')
+    args = parser.parse_args()
+
+    probe()  # primeira execução compila os .pyc e aquece o cache de disco
+    runs = [probe()[0] for _ in range(args.runs)]
+    totals = [run['startup']['total_ms'] for run in runs]
+    median = statistics.median(totals)
+    phases = runs[totals.index(min(totals, key=lambda t: abs(t - median)))]['startup']['fases_ms']
+
+    print(f"{'phase':<28} {'ms':>8}")
+    for name, ms in phases.items():
+        print(f"{name:<28} {ms:>8.1f}")
+    print(f"{'total (median of ' + str(args.runs) + ')':<28} {median:>8.1f}   budget {args.budget_ms:.0f} ms")
+
+    failures = []
+    if median > args.budget_ms:
+        failures.append(f"startup {median:.1f} ms is over the {args.budget_ms:.0f} ms budget")
+    loaded = sorted({m for run in runs for m in run['loaded']})
+    if loaded:
+        failures.append(f"deferred modules imported at startup: {', '.join(loaded)}")
+
+    if args.top:
+        top_imports(args.top)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print('OK')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""Check that /storage/<path> only serves receipts of the user's own company.
+
+Runs against the in-memory Supabase fake (SUPABASE_BACKEND=fake) with the local
+storage backend, so no Supabase project is needed. Two companies each get one
+receipt file, and the script verifies:
+
+- a user gets their company's receipt (200) and not the other company's (404);
+- traversal paths (`..`, `.`, empty segments, backslashes) are rejected with 404,
+  including `abastecimento/1/../../abastecimento/2/...`, which names company 1 in
+  the second segment but resolves to company 2's file;
+- with the Supabase backend, no signed URL is requested for a rejected path.
+
+Usage: python dev-tools/check_storage_access.py   (exits 1 on failure)
+"""
+import os
+import sys
+import tempfile
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'transporte'))
+
+from config import Config  # noqa: E402
+from app import create_app  # noqa: E402
+from app.fake_supabase import get_fake_database  # noqa: E402
+from app.utils import storage  # noqa: E402
+
+
+class CheckConfig(Config):
+    SUPABASE_BACKEND = 'fake'
+    STORAGE_BACKEND = 'local'
+    STORAGE_LOCAL_DIR = tempfile.mkdtemp(prefix='check_storage_')
+    CACHE_BACKEND = 'memory'
+    SECRET_KEY = 'check'
+    ALERT_SCHEDULER_ENABLED = False
+    SUPABASE_WARMUP = False
+    STARTUP_PROFILE = False
+
+
+OWN = 'abastecimento/1/nf_3_20250102030405_own.jpg'
+OTHER = 'abastecimento/2/nf_9_20250102030405_other.jpg'
+TRAVERSAL = [
+    'abastecimento/1/../../abastecimento/2/nf_9_20250102030405_other.jpg',
+    'abastecimento/1/../2/nf_9_20250102030405_other.jpg',
+    'abastecimento/1/./nf_3_20250102030405_own.jpg',
+    'abastecimento/1//nf_3_20250102030405_own.jpg',
+    'abastecimento/1/..%2F..%2Fabastecimento/2/nf_9_20250102030405_other.jpg',
+    'abastecimento/1/..\\..\\abastecimento\\2\\nf_9_20250102030405_other.jpg',
+]
+
+
+class SigningBucket:
+    """Stands in for the storage3 bucket: records which paths were signed."""
+    def __init__(self):
+        self.signed = []
+
+    def from_(self, bucket):
+        return self
+
+    def create_signed_url(self, path, expires_in):
+        self.signed.append(path)
+        return {'signedURL': f"https://storage.example/sign/{path}"}
+
+
+def main():
+    app = create_app(CheckConfig)
+    db = get_fake_database()
+    db.reset()
+    db.load('Usuario', [{'id': 1, 'id_empresa': 1, 'email': 'a@example.com', 'nome': 'A', 'cargo': 'admin', 'senha_hash': None}])
+    for path in (OWN, OTHER):
+        target = os.path.join(CheckConfig.STORAGE_LOCAL_DIR, path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as f:
+            f.write(path.encode())
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = '1'
+        session['_fresh'] = True
+
+    failures = []
+
+    def expect(path, status):
+        response = client.get('/storage/' + path)
+        ok = response.status_code == status and (status != 200 or response.data == OWN.encode())
+        print(f"{'ok' if ok else 'FAIL':<5} {response.status_code}  {path}")
+        if not ok:
+            failures.append(path)
+
+    expect(OWN, 200)
+    expect(OTHER, 404)
+    for path in TRAVERSAL:
+        expect(path, 404)
+
+    # Supabase backend: a rejected path never reaches create_signed_url
+    bucket = SigningBucket()
+    with mock.patch.object(storage, '_storage', storage.SupabaseStorage(mock.Mock(storage=bucket), 'notas-fiscais')):
+        for path in TRAVERSAL:
+            client.get('/storage/' + path)
+        client.get('/storage/' + OWN)
+    if bucket.signed != [OWN]:
+        failures.append(f"signed paths: {bucket.signed}")
+        print(f"FAIL  signed paths {bucket.signed}")
+    else:
+        print('ok    supabase backend signed only the own-company path')
+
+    print('OK' if not failures else f"FAIL: {len(failures)} check(s)")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
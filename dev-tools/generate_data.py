@@ -0,0 +1,346 @@
+"""Synthetic data generator for capacity planning.
+
+Creates companies (with an admin user each, via the builders in
+`insert_safe.py`), fleets of vehicles, fueling histories with monotonic
+odometers and plausible consumption per vehicle class, maintenance history
+and predictive schedules, plus the `Resumo_Abastecimento_Veiculo` aggregates,
+so the dashboard works right away.
+
+The output is deterministic for a given `--seed` and `--end-date`. Each company
+draws from its own RNG, so the data does not depend on the target or on the
+batch size. Only the password hash changes between runs, because it is salted.
+
+Targets:
+- `supabase`: the project in `SUPABASE_URL` / `SUPABASE_KEY_SERVICE_ROLE`,
+  written with batched multi-row inserts.
+- `postgres`: a local Postgres in `DATABASE_URL`. Parent rows use multi-row
+  `INSERT ... RETURNING id`; fuelings, maintenance and aggregates use `COPY`.
+  `--create-schema` creates the tables and applies `transporte/sql/*.sql`.
+- `fake`: the in-process Supabase fake (`app/fake_supabase.py`). This is useful
+  to check volumes and the generator's own speed, or to be imported by
+  benchmarks through `generate()`.
+
+Throughput is reported per table in rows per second.
+
+Usage: python dev-tools/generate_data.py --target fake --companies 5 --vehicles 1000
+       DATABASE_URL=postgresql://... python dev-tools/generate_data.py --target postgres --create-schema
+Never point this at the production database.
+"""
+import argparse
+import csv
+import io
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'transporte'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from insert_safe import COMPANY_TABLE, USER_TABLE, build_admin_user, build_empresa, cnpj_with_check_digits  # noqa: E402
+from app.utils.fueling_aggregates import AGGREGATE_FIELDS, AGGREGATE_TABLE, compute_aggregates  # noqa: E402
+
+SQL_DIR = os.path.join(os.path.dirname(__file__), '..', 'transporte', 'sql')
+
+# (class, models, fuels, km/L range, tank litres, km per day, maintenance every N km, service cost range)
+PROFILES = [
+    ('pesado', [('Volvo', 'FH 540'), ('Scania', 'R 450'), ('Mercedes-Benz', 'Actros 2651'), ('DAF', 'XF 530')],
+     ['Diesel'], (2.0, 3.2), 600, (250, 700), 20_000, (1_500, 12_000)),
+    ('leve', [('Volkswagen', 'Delivery 11.180'), ('Iveco', 'Daily 35-150'), ('Mercedes-Benz', 'Accelo 1016')],
+     ['Diesel'], (5.0, 8.0), 150, (120, 320), 15_000, (600, 4_000)),
+    ('utilitario', [('Fiat', 'Strada'), ('Fiat', 'Fiorino'), ('Renault', 'Master'), ('Chevrolet', 'Montana')],
+     ['Gasolina', 'Etanol', 'GNV'], (7.5, 12.5), 55, (60, 220), 10_000, (300, 1_800)),
+]
+PROFILE_WEIGHTS = [0.4, 0.3, 0.3]
+FUEL_PRICE = {'Diesel': 5.95, 'Gasolina': 6.15, 'Etanol': 4.25, 'GNV': 4.60}  # R$/L at the start
+PRICE_DRIFT_PER_YEAR = 0.06
+SERVICES = ['Troca de óleo e filtros', 'Revisão de freios', 'Alinhamento e balanceamento',
+            'Troca de pneus', 'Revisão do sistema de arrefecimento', 'Troca de embreagem']
+WORKSHOPS = ['Oficina Central', 'Auto Center BR', 'Diesel Service', 'Mecânica do Posto']
+LETTERS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+BASE_SCHEMA = '''
+create table if not exists empresa (
+    id bigserial primary key, nome text not null, cnpj text unique
+);
+create table if not exists usuario (
+    id bigserial primary key, id_empresa bigint not null references empresa(id), nome text,
+    email text unique not null, senha_hash text, cargo text
+);
+create table if not exists "Veiculo" (
+    id bigserial primary key, id_empresa bigint not null references empresa(id), placa text not null,
+    marca text, modelo text, ano integer, tipo_combustivel text, km_atual integer
+);
+create table if not exists "Abastecimento" (
+    id bigserial primary key, id_empresa bigint not null, id_veiculo bigint not null references "Veiculo"(id),
+    data_abastecimento timestamptz not null, litros numeric(10, 2), valor_litro numeric(10, 2),
+    km_registro integer not null, local_abastecimento text, id_usuario_registro bigint, url_nota_fiscal text
+);
+create index if not exists abastecimento_empresa_idx on "Abastecimento" (id_empresa, id);
+create table if not exists "Manutencao_Preditiva" (
+    id bigserial primary key, id_empresa bigint not null, id_veiculo bigint not null references "Veiculo"(id),
+    descricao text, tipo_manutencao text, km_agendado integer, data_agendada date, intervalo_alerta integer,
+    status text not null default 'Agendada'
+);
+create table if not exists "Manutencao_Realizada" (
+    id bigserial primary key, id_empresa bigint not null, id_veiculo bigint not null references "Veiculo"(id),
+    id_manutencao_preditiva bigint references "Manutencao_Preditiva"(id), data_realizacao date not null,
+    descricao_servico text, custo_total numeric(12, 2), oficina_responsavel text, id_usuario_registro bigint,
+    url_nota_fiscal text
+);
+'''
+
+
+# -----------------
+# TARGETS
+# -----------------
+
+class SupabaseTarget:
+    """Batched multi-row inserts through PostgREST."""
+    def __init__(self, client, batch_size):
+        self.client = client
+        self.batch_size = batch_size
+
+    def insert(self, table, rows, returning=False):
+        inserted = []
+        for start in range(0, len(rows), self.batch_size):
+            batch = rows[start:start + self.batch_size]
+            if returning:
+                inserted.extend(self.client.table(table).insert(batch).execute().data)
+            else:
+                self.client.table(table).insert(batch, returning='minimal').execute()
+        return inserted
+
+    def close(self):
+        pass
+
+
+class FakeTarget(SupabaseTarget):
+    """The in-process fake: same interface as the Supabase client."""
+    def __init__(self, batch_size):
+        from app.fake_supabase import get_fake_client
+        super().__init__(get_fake_client(), batch_size)
+
+    def insert(self, table, rows, returning=False):
+        inserted = []
+        for start in range(0, len(rows), self.batch_size):
+            inserted.extend(self.client.table(table).insert(rows[start:start + self.batch_size]).execute().data)
+        return inserted if returning else []
+
+
+class PostgresTarget:
+    """Local Postgres: INSERT ... RETURNING for parent rows, COPY for the bulk tables."""
+    def __init__(self, dsn, batch_size, create_schema=False):
+        import psycopg2
+
+        self.conn = psycopg2.connect(dsn)
+        self.batch_size = batch_size
+        if create_schema:
+            with self.conn.cursor() as cur:
+                cur.execute(BASE_SCHEMA)
+                for name in sorted(os.listdir(SQL_DIR)):
+                    if name.endswith('.sql'):
+                        with open(os.path.join(SQL_DIR, name)) as f:
+                            cur.execute(f.read())
+            self.conn.commit()
+
+    def insert(self, table, rows, returning=False):
+        if not rows:
+            return []
+        columns = list(rows[0])
+        column_list = ', '.join(f'"{c}"' for c in columns)
+        with self.conn.cursor() as cur:
+            if returning:
+                from psycopg2.extras import execute_values
+                inserted = []
+                for start in range(0, len(rows), self.batch_size):
+                    batch = rows[start:start + self.batch_size]
+                    ids = execute_values(cur, f'insert into "{table}" ({column_list}) values %s returning id',
+                                         [[row[c] for c in columns] for row in batch], fetch=True)
+                    inserted.extend({**row, 'id': row_id} for row, (row_id,) in zip(batch, ids))
+                self.conn.commit()
+                return inserted
+
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for row in rows:
+                writer.writerow([r'\N' if row[c] is None else row[c] for c in columns])
+            buffer.seek(0)
+            cur.copy_expert(f'copy "{table}" ({column_list}) from stdin with (format csv, null \'\\N\')', buffer)
+        self.conn.commit()
+        return []
+
+    def close(self):
+        self.conn.close()
+
+
+# -----------------
+# GENERATION
+# -----------------
+
+def _plate(n):
+    """Unique Mercosul-style plate (LLLNLNN) for a sequence number."""
+    n, d2 = divmod(n, 100)
+    n, l4 = divmod(n, 26)
+    n, d1 = divmod(n, 10)
+    l1, rest = divmod(n, 26 * 26)
+    l2, l3 = divmod(rest, 26)
+    return f"{LETTERS[l1 % 26]}{LETTERS[l2]}{LETTERS[l3]}{d1}{LETTERS[l4]}{d2:02d}"
+
+
+def _plan_vehicle(rng, company_index, number, start, end, id_usuario):
+    """One vehicle with its history (rows without ids; filled in after the vehicle is inserted)."""
+    name, models, fuels, kml_range, tank, km_day, service_km, cost_range = rng.choices(PROFILES, PROFILE_WEIGHTS)[0]
+    marca, modelo = rng.choice(models)
+    fuel = rng.choice(fuels)
+    kml = rng.uniform(*kml_range)          # consumo típico deste veículo
+    daily_km = rng.uniform(*km_day)
+    km = rng.randint(5_000, 400_000 if name == 'pesado' else 150_000)
+    vehicle = {'placa': _plate(company_index * 100_000 + number), 'marca': marca, 'modelo': modelo,
+               'ano': rng.randint(2010, end.year), 'tipo_combustivel': fuel, 'km_atual': None}
+
+    fuelings, services = [], []
+    moment = datetime.combine(start, datetime.min.time()) + timedelta(hours=rng.uniform(0, 72))
+    next_service = km + rng.randint(1, service_km)
+    while True:
+        litros = round(tank * rng.uniform(0.45, 0.95), 2)
+        distance = max(1, int(litros * kml * rng.uniform(0.88, 1.12)))
+        moment += timedelta(days=distance / daily_km * rng.uniform(0.8, 1.25))
+        if moment.date() > end:
+            break
+        km += distance
+        years = (moment.date() - start).days / 365.0
+        price = FUEL_PRICE[fuel] * (1 + PRICE_DRIFT_PER_YEAR * years) * rng.uniform(0.97, 1.03)
+        fuelings.append({'data_abastecimento': moment.replace(tzinfo=timezone.utc).isoformat(timespec='minutes'),
+                         'litros': litros, 'valor_litro': round(price, 2), 'km_registro': km,
+                         'local_abastecimento': f"Posto {rng.randint(1, 40)}", 'id_usuario_registro': id_usuario,
+                         'url_nota_fiscal': None})
+        if km >= next_service:
+            services.append({'id_manutencao_preditiva': None, 'data_realizacao': moment.date().isoformat(),
+                             'descricao_servico': rng.choice(SERVICES), 'custo_total': round(rng.uniform(*cost_range), 2),
+                             'oficina_responsavel': rng.choice(WORKSHOPS), 'id_usuario_registro': id_usuario,
+                             'url_nota_fiscal': None})
+            next_service += service_km
+    vehicle['km_atual'] = km
+
+    schedules = [{'descricao': 'Revisão programada', 'tipo_manutencao': 'Preventiva',
+                  'km_agendado': next_service, 'data_agendada': None,
+                  'intervalo_alerta': int(service_km * 0.1), 'status': 'Agendada'}]
+    if rng.random() < 0.4:
+        schedules.append({'descricao': rng.choice(['Licenciamento', 'Inspeção do tacógrafo', 'Troca de pneus']),
+                          'tipo_manutencao': 'Preditiva', 'km_agendado': None,
+                          'data_agendada': (end + timedelta(days=rng.randint(-15, 120))).isoformat(),
+                          'intervalo_alerta': 30, 'status': 'Agendada'})
+    return vehicle, fuelings, services, schedules
+
+
+class Counter:
+    def __init__(self):
+        self.rows = {}
+        self.seconds = {}
+
+    def timed(self, table, fn, rows, **kwargs):
+        t0 = time.perf_counter()
+        result = fn(table, rows, **kwargs)
+        self.seconds[table] = self.seconds.get(table, 0.0) + time.perf_counter() - t0
+        self.rows[table] = self.rows.get(table, 0) + len(rows)
+        return result
+
+
+def generate(target, companies=1, vehicles=100, seed=42, end=None, history_days=730,
+             chunk_vehicles=200, company_offset=0, log=print):
+    """Writes the synthetic data set to `target`. Returns the Counter with rows and time per table."""
+    end = end or date.today()
+    start = end - timedelta(days=history_days)
+    counter = Counter()
+    password_hash = build_admin_user(0, '')['senha_hash']  # um hash para todos (o custo do hash é alto)
+
+    for index in range(company_offset, company_offset + companies):
+        rng = random.Random(f"{seed}-{index}")
+        empresa = counter.timed(COMPANY_TABLE, target.insert, [build_empresa(
+            f"Transportadora Sintética {index:04d}", cnpj_with_check_digits(f"{seed % 100:02d}{index:06d}0001"))],
+            returning=True)[0]
+        id_empresa = empresa['id']
+        usuario = counter.timed(USER_TABLE, target.insert, [build_admin_user(
+            id_empresa, f"admin{index:04d}@sintetica{seed}.example.com",
+            nome=f"Admin {index:04d}", password_hash=password_hash)], returning=True)[0]
+
+        n_vehicles = max(1, int(vehicles * rng.uniform(0.5, 1.5)))
+        for chunk_start in range(0, n_vehicles, chunk_vehicles):
+            plans = [_plan_vehicle(rng, index, number, start, end, usuario['id'])
+                     for number in range(chunk_start, min(n_vehicles, chunk_start + chunk_vehicles))]
+            inserted = counter.timed('Veiculo', target.insert,
+                                     [{**plan[0], 'id_empresa': id_empresa} for plan in plans], returning=True)
+
+            fuelings, services, schedules, aggregates = [], [], [], []
+            agora = datetime.now(timezone.utc).isoformat()
+            for vehicle, (_, vehicle_fuelings, vehicle_services, vehicle_schedules) in zip(inserted, plans):
+                ids = {'id_empresa': id_empresa, 'id_veiculo': vehicle['id']}
+                fuelings.extend({**ids, **row} for row in vehicle_fuelings)
+                services.extend({**ids, **row} for row in vehicle_services)
+                schedules.extend({**ids, **row} for row in vehicle_schedules)
+                if vehicle_fuelings:
+                    aggregate = compute_aggregates({**ids, **row} for row in vehicle_fuelings)[vehicle['id']]
+                    aggregates.append({**{field: aggregate[field] for field in AGGREGATE_FIELDS}, 'atualizado_em': agora})
+
+            counter.timed('Abastecimento', target.insert, fuelings)
+            counter.timed('Manutencao_Realizada', target.insert, services)
+            counter.timed('Manutencao_Preditiva', target.insert, schedules)
+            counter.timed(AGGREGATE_TABLE, target.insert, aggregates)
+
+        log(f"empresa {index:04d} (id {id_empresa}): {n_vehicles:,} veículos, "
+            f"{counter.rows.get('Abastecimento', 0):,} abastecimentos no total")
+    return counter
+
+
+def report(counter, elapsed):
+    total = sum(counter.rows.values())
+    print(f"\n{'tabela':<32} {'linhas':>12} {'escrita s':>10} {'linhas/s':>12}")
+    for table, rows in counter.rows.items():
+        seconds = counter.seconds[table]
+        print(f"{table:<32} {rows:>12,} {seconds:>10.2f} {rows / seconds if seconds else 0:>12,.0f}")
+    print(f"{'total (inclui geração)':<32} {total:>12,} {elapsed:>10.2f} {total / elapsed if elapsed else 0:>12,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--target', choices=['supabase', 'postgres', 'fake'], default='fake')
+    parser.add_argument('--companies', type=int, default=1)
+    parser.add_argument('--vehicles', type=int, default=100, help='average vehicles per company')
+    parser.add_argument('--history-days', type=int, default=730)
+    parser.add_argument('--end-date', type=date.fromisoformat, default=None, help='last day of history (default: today)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--company-offset', type=int, default=0, help='first company number (to add more companies later)')
+    parser.add_argument('--batch-size', type=int, default=500, help='rows per multi-row insert')
+    parser.add_argument('--create-schema', action='store_true', help='postgres: create tables and apply transporte/sql')
+    args = parser.parse_args()
+
+    if args.target == 'supabase':
+        from insert_safe import get_client
+        client = get_client()
+        if client is None:
+            print('ERROR: set SUPABASE_URL and SUPABASE_KEY_SERVICE_ROLE')
+            return 2
+        target = SupabaseTarget(client, args.batch_size)
+    elif args.target == 'postgres':
+        dsn = os.environ.get('DATABASE_URL')
+        if not dsn:
+            print('ERROR: set DATABASE_URL to a local Postgres')
+            return 2
+        target = PostgresTarget(dsn, args.batch_size, create_schema=args.create_schema)
+    else:
+        target = FakeTarget(args.batch_size)
+
+    t0 = time.perf_counter()
+    try:
+        counter = generate(target, companies=args.companies, vehicles=args.vehicles, seed=args.seed,
+                           end=args.end_date, history_days=args.history_days, company_offset=args.company_offset)
+    finally:
+        target.close()
+    report(counter, time.perf_counter() - t0)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
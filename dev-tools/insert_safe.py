@@ -1,80 +1,99 @@
 """Safe insert: reuse existing `empresa` if present, otherwise create one,
 then insert an admin `usuario` only if the email is not present.
 
+The row builders (`build_empresa`, `build_admin_user`, `cnpj_with_check_digits`)
+are also used by `generate_data.py` to create companies and users at scale.
+
 Usage: set `SUPABASE_URL` and `SUPABASE_KEY_SERVICE_ROLE` in the environment
 and run this script with the project's Python.
 """
 import os
 import sys
 import time
-from supabase import create_client
-from werkzeug.security import generate_password_hash
 
+COMPANY_TABLE = 'empresa'
+USER_TABLE = 'usuario'
+DEFAULT_PASSWORD = 'changeme123'
+
+# Prefer lookup by a stable test cnpj; adjust if you use a different pattern
+TEST_CNPJ = '00000000000000'
+
+
+def get_client():
+    """Service-role client from the environment, or None if it is not configured."""
+    from supabase import create_client
 
-def main():
     url = os.environ.get('SUPABASE_URL')
     key = os.environ.get('SUPABASE_KEY_SERVICE_ROLE') or os.environ.get('SUPABASE_KEY_ANON')
     if not url or not key:
-        print('ERROR: set SUPABASE_URL and SUPABASE_KEY_SERVICE_ROLE')
-        return 2
+        return None
+    return create_client(url, key)
+
+
+def cnpj_with_check_digits(root12):
+    """Appends the two CNPJ check digits to a 12-digit root (8 digits + 4-digit branch)."""
+    digits = [int(d) for d in root12]
+    for weights in ([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2], [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]):
+        remainder = sum(d * w for d, w in zip(digits, weights)) % 11
+        digits.append(0 if remainder < 2 else 11 - remainder)
+    return ''.join(str(d) for d in digits)
+
+
+def build_empresa(nome, cnpj):
+    return {'nome': nome, 'cnpj': cnpj}
+
 
-    client = create_client(url, key)
+def build_admin_user(empresa_id, email, nome='Admin Auto', password=DEFAULT_PASSWORD, password_hash=None):
+    """Admin `usuario` row. Pass `password_hash` to reuse one hash for many users (hashing is slow)."""
+    if password_hash is None:
+        from werkzeug.security import generate_password_hash
+        password_hash = generate_password_hash(password)
+    return {'nome': nome, 'email': email, 'senha_hash': password_hash, 'id_empresa': empresa_id}
 
-    # Prefer lookup by a stable test cnpj; adjust if you use a different pattern
-    test_cnpj = '00000000000000'
+
+def find_or_create_empresa(client, cnpj=TEST_CNPJ):
+    """Returns the id of the company with `cnpj`, creating a uniquely named one if absent."""
+    resp = client.table(COMPANY_TABLE).select('*').eq('cnpj', cnpj).limit(1).execute()
+    if resp.data:
+        empresa = resp.data[0]
+        print('Found existing empresa:', empresa)
+        return empresa['id']
+
+    # create a unique nome to avoid unique constraint by name
+    ts = int(time.time())
+    empresa_obj = build_empresa(f'Empresa Teste Auto {ts}', cnpj[:-3] + f"{ts % 1000:03d}")
+    print('Inserting new empresa:', empresa_obj)
+    resp_i = client.table(COMPANY_TABLE).insert(empresa_obj).execute()
+    empresa_id = resp_i.data[0]['id']
+    print('Inserted empresa id:', empresa_id)
+    return empresa_id
+
+
+def create_admin_user(client, empresa_id, email):
+    """Inserts the admin user unless the email already exists. Returns the row."""
+    resp_user = client.table(USER_TABLE).select('*').eq('email', email).limit(1).execute()
+    if resp_user.data:
+        print('User already exists:', resp_user.data[0])
+        return resp_user.data[0]
+
+    usuario = build_admin_user(empresa_id, email)
+    print('Inserting usuario:', {'email': usuario['email'], 'id_empresa': usuario['id_empresa']})
+    resp_u = client.table(USER_TABLE).insert(usuario).execute()
+    print('Usuario inserted:', resp_u.data)
+    return resp_u.data[0]
+
+
+def main():
+    client = get_client()
+    if client is None:
+        print('ERROR: set SUPABASE_URL and SUPABASE_KEY_SERVICE_ROLE')
+        return 2
 
     try:
-        resp = client.table('empresa').select('*').eq('cnpj', test_cnpj).limit(1).execute()
-        if getattr(resp, 'error', None):
-            print('empresa lookup error:', resp.error)
-            return 1
-
-        if resp.data:
-            empresa = resp.data[0]
-            print('Found existing empresa:', empresa)
-            empresa_id = empresa['id']
-        else:
-            # create a unique nome to avoid unique constraint by name
-            ts = int(time.time())
-            nome = f'Empresa Teste Auto {ts}'
-            cnpj = test_cnpj[:-3] + f"{ts % 1000:03d}"
-            empresa_obj = {'nome': nome, 'cnpj': cnpj}
-            print('Inserting new empresa:', empresa_obj)
-            resp_i = client.table('empresa').insert(empresa_obj).execute()
-            if getattr(resp_i, 'error', None):
-                print('empresa insert error:', resp_i.error)
-                return 1
-            empresa_id = resp_i.data[0]['id']
-            print('Inserted empresa id:', empresa_id)
-
-        # prepare usuario
-        ts = int(time.time())
-        email = f'admin_auto_{empresa_id}_{ts}@example.com'
-
-        # check if user email already exists
-        resp_user = client.table('usuario').select('*').eq('email', email).limit(1).execute()
-        if getattr(resp_user, 'error', None):
-            print('usuario lookup error:', resp_user.error)
-            return 1
-        if resp_user.data:
-            print('User already exists:', resp_user.data[0])
-            return 0
-
-        usuario = {
-            'nome': 'Admin Auto',
-            'email': email,
-            'senha_hash': generate_password_hash('changeme123'),
-            'id_empresa': empresa_id
-        }
-        print('Inserting usuario:', {'email': usuario['email'], 'id_empresa': usuario['id_empresa']})
-        resp_u = client.table('usuario').insert(usuario).execute()
-        if getattr(resp_u, 'error', None):
-            print('usuario insert error:', resp_u.error)
-            return 1
-
-        print('Usuario inserted:', resp_u.data)
+        empresa_id = find_or_create_empresa(client)
+        email = f'admin_auto_{empresa_id}_{int(time.time())}@example.com'
+        create_admin_user(client, empresa_id, email)
         return 0
-
     except Exception as e:
         print('Exception during safe insert:', str(e))
         return 1
@@ -82,4 +101,3 @@ def main():
 
 if __name__ == '__main__':
     sys.exit(main())
-
@@ -1,10 +1,14 @@
 # logistica_app/app/__init__.py (Atualizado)
 
+import time
+_IMPORT_STARTED = time.perf_counter()  # início do import do pacote (perfil do cold start)
+
 from flask import Flask, url_for
 from config import Config
 from flask_login import LoginManager # NOVO IMPORT
 from . import database 
 from .models import User # NOVO IMPORT
+from .utils import startup
 
 # 1. Instanciar o Flask-Login
 login_manager = LoginManager() 
@@ -16,13 +20,26 @@ def load_user(user_id):
     return User.get(user_id) 
 
 def create_app(config_class=Config):
+    # Perfil do cold start: cada fase abaixo é medida (ver utils/startup.py)
+    profile = startup.StartupProfile(_IMPORT_STARTED)
+
     app = Flask(__name__)
     app.config.from_object(config_class)
 
     # ...
     
-    database.init_app(app)
-    
+    with profile.phase('database'):
+        database.init_app(app)
+
+    with profile.phase('observabilidade'):
+        # Métricas Prometheus em /metrics (latência por rota e por chamada ao Supabase)
+        from .utils import metrics
+        metrics.init_app(app)
+
+        # Trace das chamadas ao Supabase por request (TRACE_ENABLED; cabeçalho X-Supabase-Trace)
+        from .utils import tracing
+        tracing.init_app(app)
+
     # 2. Inicializar o Flask-Login com a aplicação
     login_manager.init_app(app) 
     
@@ -32,19 +49,42 @@ def create_app(config_class=Config):
     login_manager.login_message = 'Por favor, faça login para acessar esta página.'
 
     # 3. REGISTRO DOS BLUEPRINTS
-    from .blueprints.auth.routes import auth_bp
-    app.register_blueprint(auth_bp)
+    with profile.phase('blueprint:auth'):
+        from .blueprints.auth.routes import auth_bp
+        app.register_blueprint(auth_bp)
 
-    from .blueprints.veiculo.routes import vehicle_bp
-    app.register_blueprint(vehicle_bp) # Rotas começarão em /veiculos/
+    with profile.phase('blueprint:veiculo'):
+        from .blueprints.veiculo.routes import vehicle_bp
+        app.register_blueprint(vehicle_bp) # Rotas começarão em /veiculos/
 
     # Registro do Blueprint de Abastecimento
-    from .blueprints.Fueling.routes import fueling_bp
-    app.register_blueprint(fueling_bp) # Rotas começarão em /abastecimento/
+    with profile.phase('blueprint:abastecimento'):
+        from .blueprints.Fueling.routes import fueling_bp
+        app.register_blueprint(fueling_bp) # Rotas começarão em /abastecimento/
+
+    # Registro do Blueprint de Manutenção
+    with profile.phase('blueprint:manutencao'):
+        from .blueprints.Maintenance.routes import maintenance_bp
+        app.register_blueprint(maintenance_bp) # Rotas começarão em /manutencao/
 
     # Registro do Blueprint de Dashboard
-    from .blueprints.dashboard.routes import dashboard_bp
-    app.register_blueprint(dashboard_bp)
+    with profile.phase('blueprint:dashboard'):
+        from .blueprints.dashboard.routes import dashboard_bp
+        app.register_blueprint(dashboard_bp)
+    
+    # Storage das notas fiscais (rota /storage/, com login e checagem da empresa)
+    with profile.phase('storage'):
+        from .utils import storage
+        storage.init_app(app)
+
+    # Agendador de alertas em segundo plano (opcional; ver utils/alert_scheduler.py)
+    if app.config.get('ALERT_SCHEDULER_ENABLED'):
+        from .utils.alert_scheduler import start_alert_scheduler
+        start_alert_scheduler(app)
+
+    # Abre a conexão com o Supabase em segundo plano, uma vez por worker (SUPABASE_WARMUP)
+    with profile.phase('warmup'):
+        startup.init_app(app)
     
     # Atualiza a rota inicial para dar opções
     @app.route('/')
@@ -60,5 +100,6 @@ def create_app(config_class=Config):
             f"<p>Acesse:<br><a href=\"{register_url}\">Cadastrar empresa</a> — ou — <a href=\"{login_url}\">Entrar (login)</a></p>"
             f"</body></html>"
         )
-        
-    return app
\ No newline at end of file
+
+    startup.finish(app, profile)
+    return app
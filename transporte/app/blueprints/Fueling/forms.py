@@ -3,12 +3,13 @@
 from flask_wtf import FlaskForm
 from wtforms import SelectField, DecimalField, IntegerField, StringField, SubmitField, DateTimeLocalField
 from wtforms.validators import DataRequired, NumberRange, InputRequired, Optional, Length
-from flask_wtf.file import FileField, FileAllowed # Para lidar com uploads
+from flask_wtf.file import FileField, FileAllowed, FileRequired # Para lidar com uploads
+from ...utils.data_access import vehicle_choice_id
 from datetime import datetime
 
 class FuelingForm(FlaskForm):
     
-    id_veiculo = SelectField('Veículo (Placa - Modelo)', validators=[DataRequired()], coerce=int)
+    id_veiculo = SelectField('Veículo (Placa - Modelo)', validators=[DataRequired()], coerce=vehicle_choice_id)
     
     data_abastecimento = DateTimeLocalField('Data e Hora', 
                                             format='%Y-%m-%dT%H:%M', 
@@ -43,4 +44,17 @@ class FuelingForm(FlaskForm):
         FileAllowed(['jpg', 'png', 'pdf'], 'Apenas imagens (JPG, PNG) ou PDF são permitidos.')
     ])
     
-    submit = SubmitField('Registrar Abastecimento')
\ No newline at end of file
+    submit = SubmitField('Registrar Abastecimento')
+
+
+class FuelingImportForm(FlaskForm):
+    """
+    Formulário para importar abastecimentos em lote (CSV do cartão-combustível).
+    Colunas: placa, data_abastecimento, litros, valor_litro, km_registro, local_abastecimento (opcional).
+    """
+    arquivo_csv = FileField('Arquivo CSV', validators=[
+        FileRequired(),
+        FileAllowed(['csv'], 'Apenas arquivos CSV são permitidos.')
+    ])
+
+    submit = SubmitField('Importar Abastecimentos')
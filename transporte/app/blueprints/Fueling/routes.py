@@ -1,10 +1,17 @@
 # logistica_app/app/blueprints/fueling/routes.py
 
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app
 from flask_login import login_required, current_user
-from datetime import datetime
-from .forms import FuelingForm
-from ...utils.data_access import get_safe_supabase_client, get_vehicles_for_select, get_last_km
+from .forms import FuelingForm, FuelingImportForm
+from ...utils.data_access import get_safe_supabase_client, get_vehicles_for_select, get_last_km, get_recent_records
+from ...utils.fueling_aggregates import rebuild_aggregates
+from ...utils.dashboard_cache import invalidate_dashboard
+from ...utils.odometer import get_odometer_index
+from ...utils.alert_engine import get_alert_engine
+from ...utils.storage import spool_upload, submit_receipt_upload, receipt_path
+from ...database import get_service_client
+import click
+import os
 
 # Define o Blueprint 'fueling'
 fueling_bp = Blueprint('fueling', __name__, template_folder='templates', url_prefix='/abastecimento')
@@ -19,6 +26,15 @@ def calculate_consumption(current_km: int, previous_km: int, liters: float) -> f
     distance = current_km - previous_km
     return round(distance / liters, 2)
 
+# -----------------
+# ÚLTIMOS ABASTECIMENTOS (COM MINIATURA DA NOTA FISCAL)
+# -----------------
+@fueling_bp.route('/')
+@login_required
+def list_fuelings():
+    fuelings = get_recent_records('Abastecimento')
+    return render_template('list_fuelings.html', title='Últimos Abastecimentos', fuelings=fuelings)
+
 # -----------------
 # ROTA DE CADASTRO DE ABASTECIMENTO
 # -----------------
@@ -31,6 +47,8 @@ def register_fueling():
     form.id_veiculo.choices = get_vehicles_for_select()
     
     if form.validate_on_submit():
+        # Importado aqui (não no topo) para não pesar no cold start; ver utils/startup.py
+        from postgrest.exceptions import APIError
         supabase = get_safe_supabase_client()
         
         vehicle_id = form.id_veiculo.data
@@ -51,45 +69,120 @@ def register_fueling():
             if calculated_consumption > 0:
                 flash(f"Consumo calculado desde o último registro: **{calculated_consumption} Km/L**.", 'info')
 
-        # 3. UPLOAD DA NOTA FISCAL (Integração NoSQL/Storage Simulada)
-        url_nota_fiscal = None
+        # 3. NOTA FISCAL: copiada do request agora, enviada ao storage em segundo plano
+        # depois que o abastecimento for gravado (a URL é preenchida ao fim do envio)
+        receipt_tmp = None
         file = request.files.get('nota_fiscal_file')
         
         if file and file.filename:
-            # Em produção, este é o ponto onde você chamaria o Supabase Storage SDK
-            # para fazer o upload e obter a URL segura.
-            file_name = f"nf_{current_user.id_empresa}_{vehicle_id}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
-            url_nota_fiscal = f"/storage/notas_abastecimento/{file_name}.{file.filename.split('.')[-1]}"
-            flash("O upload da nota fiscal foi simulado. A URL será salva no BD.", 'warning')
-
-
-        # 4. PREPARAÇÃO E INSERÇÃO NO BANCO DE DADOS
-        abastecimento_data = {
-            "id_empresa": current_user.id_empresa, # RLS KEY
-            "id_veiculo": vehicle_id,
-            "data_abastecimento": form.data_abastecimento.data.strftime('%Y-%m-%d %H:%M:%S%z'),
-            "litros": liters,
-            "valor_litro": form.valor_litro.data,
-            "km_registro": current_km,
-            "local_abastecimento": form.local_abastecimento.data,
-            "id_usuario_registro": current_user.id,
-            "url_nota_fiscal": url_nota_fiscal, # URL para o Storage
+            receipt_tmp = spool_upload(file)
+
+
+        # 4. REGISTRO TRANSACIONAL (procedure registrar_abastecimento, ver sql/002)
+        # Em um único round trip: revalida o KM com a linha do veículo travada, insere o
+        # abastecimento, avança Veiculo.km_atual e atualiza os agregados do dashboard.
+        abastecimento_params = {
+            "p_id_empresa": current_user.id_empresa, # RLS KEY
+            "p_id_veiculo": vehicle_id,
+            "p_data_abastecimento": form.data_abastecimento.data.strftime('%Y-%m-%d %H:%M:%S%z'),
+            "p_litros": float(liters),
+            "p_valor_litro": float(form.valor_litro.data),
+            "p_km_registro": current_km,
+            "p_local_abastecimento": form.local_abastecimento.data,
+            "p_id_usuario_registro": current_user.id,
+            "p_url_nota_fiscal": None, # Preenchida pelo upload em segundo plano
         }
         
         try:
-            # Inserção na tabela Abastecimento
-            supabase.table('Abastecimento').insert(abastecimento_data).execute()
-            
-            # Atualiza a KM atual do veículo na tabela Veiculo
-            supabase.table('Veiculo').update({'km_atual': current_km}).eq('id', vehicle_id).execute()
+            response = supabase.rpc('registrar_abastecimento', abastecimento_params).execute()
+            if receipt_tmp and response.data:
+                submit_receipt_upload(
+                    'Abastecimento', response.data[0]['id_abastecimento'], current_user.id_empresa,
+                    receipt_path('abastecimento', current_user.id_empresa, vehicle_id, file.filename),
+                    receipt_tmp, file.mimetype,
+                )
+                receipt_tmp = None
+                flash('A nota fiscal está sendo enviada; o link aparecerá no registro em instantes.', 'info')
+            get_odometer_index().advance(current_user.id_empresa, vehicle_id, current_km)
+            get_alert_engine().on_km_update(current_user.id_empresa, vehicle_id, current_km)
+            invalidate_dashboard(current_user.id_empresa)
             
             flash('Abastecimento registrado e KM do veículo atualizada com sucesso!', 'success')
             return redirect(url_for('fueling.register_fueling'))
 
+        except APIError as e:
+            # KM recusada pelo banco (ex: outro operador registrou antes): o índice local estava defasado
+            if e.code == '22023':
+                get_odometer_index().forget(current_user.id_empresa, vehicle_id)
+            flash(f'Erro ao registrar abastecimento: {e.message}', 'danger')
         except Exception as e:
             flash(f'Erro ao registrar abastecimento: {e.args[0] if e.args else str(e)}', 'danger')
+        finally:
+            # Registro recusado: a cópia da nota fiscal não será enviada
+            if receipt_tmp:
+                os.remove(receipt_tmp)
 
     return render_template('register_fueling.html', 
                            title='Registrar Abastecimento', 
                            form=form,
-                           previous_km=previous_km if 'previous_km' in locals() else 0)
\ No newline at end of file
+                           previous_km=previous_km if 'previous_km' in locals() else 0)
+
+
+# -----------------
+# IMPORTAÇÃO EM LOTE (CSV DO CARTÃO-COMBUSTÍVEL)
+# -----------------
+@fueling_bp.route('/import', methods=['GET', 'POST'])
+@login_required
+def import_fueling():
+    form = FuelingImportForm()
+    report = None
+
+    if form.validate_on_submit():
+        # O importador usa NumPy: carregado só quando alguém importa um CSV
+        from ...utils.fueling_import import import_fuelings
+        try:
+            report = import_fuelings(
+                get_safe_supabase_client(),
+                current_user.id_empresa,
+                form.arquivo_csv.data.stream,
+                id_usuario=current_user.id,
+                batch_size=current_app.config.get('IMPORT_BATCH_SIZE', 500),
+            )
+            invalidate_dashboard(current_user.id_empresa)
+            flash(f"{report['inseridos']} abastecimento(s) importado(s); {len(report['rejeitados'])} linha(s) rejeitada(s).",
+                  'success' if not report['rejeitados'] else 'warning')
+        except Exception as e:
+            flash(f'Erro ao importar abastecimentos: {e.args[0] if e.args else str(e)}', 'danger')
+
+    return render_template('import_fueling.html', title='Importar Abastecimentos', form=form, report=report)
+
+
+# -----------------
+# COMANDO CLI: IMPORTAÇÃO EM LOTE
+# -----------------
+@fueling_bp.cli.command('import-csv')
+@click.argument('arquivo', type=click.File('rb'))
+@click.option('--empresa', 'id_empresa', required=True, help='ID da empresa dona dos veículos.')
+@click.option('--usuario', 'id_usuario', default=None, help='ID do usuário registrado como autor.')
+@click.option('--batch-size', default=None, type=int, help='Linhas por insert (padrão: IMPORT_BATCH_SIZE).')
+def import_csv_command(arquivo, id_empresa, id_usuario, batch_size):
+    """Importa abastecimentos de um CSV de cartão-combustível."""
+    from ...utils.fueling_import import import_fuelings
+    report = import_fuelings(
+        get_service_client(), id_empresa, arquivo, id_usuario=id_usuario,
+        batch_size=batch_size or current_app.config.get('IMPORT_BATCH_SIZE', 500),
+    )
+    click.echo(f"Linhas: {report['total_linhas']} | Inseridas: {report['inseridos']} | Rejeitadas: {len(report['rejeitados'])}")
+    for item in report['rejeitados']:
+        click.echo(f"  linha {item['linha']} ({item['placa']}): {item['motivo']}")
+
+
+# -----------------
+# COMANDO CLI: RECONSTRUÇÃO DOS AGREGADOS
+# -----------------
+@fueling_bp.cli.command('rebuild-aggregates')
+@click.option('--empresa', 'id_empresa', default=None, help='ID da empresa (padrão: todas).')
+def rebuild_aggregates_command(id_empresa):
+    """Recalcula os agregados de abastecimento a partir do histórico bruto."""
+    total = rebuild_aggregates(get_service_client(), id_empresa)
+    click.echo(f"Agregados de abastecimento reconstruídos para {total} veículo(s).")
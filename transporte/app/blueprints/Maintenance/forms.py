@@ -4,6 +4,7 @@ from flask_wtf import FlaskForm
 from wtforms import StringField, IntegerField, SelectField, DateField, DecimalField, SubmitField
 from wtforms.validators import DataRequired, Length, NumberRange, Optional, InputRequired
 from flask_wtf.file import FileField, FileAllowed
+from ...utils.data_access import vehicle_choice_id
 from datetime import date
 
 # ----------------
@@ -13,7 +14,7 @@ class PredictiveMaintenanceForm(FlaskForm):
     """
     Formulário para agendar manutenção preditiva baseada em KM ou Data.
     """
-    id_veiculo = SelectField('Veículo (Placa - Modelo)', validators=[DataRequired()], coerce=int)
+    id_veiculo = SelectField('Veículo (Placa - Modelo)', validators=[DataRequired()], coerce=vehicle_choice_id)
     
     descricao = StringField('Descrição do Serviço', validators=[DataRequired(), Length(max=255)])
     
@@ -53,7 +54,7 @@ class RealizedMaintenanceForm(FlaskForm):
     """
     # Se este formulário for carregado a partir de um alerta, o id_manutencao_preditiva virá na URL
     
-    id_veiculo = SelectField('Veículo (Placa - Modelo)', validators=[DataRequired()], coerce=int)
+    id_veiculo = SelectField('Veículo (Placa - Modelo)', validators=[DataRequired()], coerce=vehicle_choice_id)
     
     data_realizacao = DateField('Data da Realização', format='%Y-%m-%d', validators=[InputRequired()])
     
@@ -1,8 +1,19 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, current_app
 from flask_login import login_required, current_user
 from datetime import date, timedelta, datetime
 from .forms import PredictiveMaintenanceForm, RealizedMaintenanceForm
-from ...utils.data_access import get_safe_supabase_client, get_vehicles_for_select, get_last_km
+from ...utils.dashboard_cache import invalidate_dashboard
+from ...utils.alert_engine import get_alert_engine
+from ...utils.alert_snapshot import read_alerts
+from ...utils.alert_scheduler import run_alert_job, run_scheduler_loop, get_scheduler_metrics
+from ...database import get_service_client
+from ...utils.cache import is_shared_cache
+from ...utils.metrics import operator_required
+from ...utils.storage import spool_upload, submit_receipt_upload, receipt_path
+import click
+import os
+from typing import Any, Dict, List, Optional
+from ...utils.data_access import get_safe_supabase_client, get_vehicles_for_select, get_last_km, get_recent_records
 
 # Define o Blueprint 'maintenance'
 maintenance_bp = Blueprint('maintenance', __name__, template_folder='templates', url_prefix='/manutencao')
@@ -10,49 +21,15 @@ maintenance_bp = Blueprint('maintenance', __name__, template_folder='templates',
 # -----------------
 # FUNÇÃO AUXILIAR: VERIFICA ALERTAS PREDITIVOS
 # -----------------
-def check_maintenance_alerts(id_empresa: str, supabase):
-    """Verifica e retorna manutenções agendadas que estão perto de vencer por KM ou Data."""
-    
-    # 1. Busca todas as manutenções Preditivas AGENDADAS
-    response = supabase.table('Manutencao_Preditiva').select(
-        '*, Veiculo(placa, km_atual)' 
-    ).eq('id_empresa', id_empresa).eq('status', 'Agendada').execute()
-    
-    alerts = []
-    today = date.today()
-
-    for item in response.data:
-        veiculo_km_atual = item['Veiculo']['km_atual']
-        intervalo_alerta = item['intervalo_alerta']
-        
-        # Alerta por KM
-        if item['km_agendado'] and item['km_agendado'] > 0:
-            km_restante = item['km_agendado'] - veiculo_km_atual
-            
-            if km_restante <= intervalo_alerta:
-                alerts.append({
-                    'type': 'km',
-                    'id': item['id'],
-                    'descricao': item['descricao'],
-                    'veiculo': item['Veiculo']['placa'],
-                    'urgency': f"{km_restante} KM restantes (Alerta: {intervalo_alerta} KM)"
-                })
-        
-        # Alerta por Data
-        if item['data_agendada']:
-            data_agendada = date.fromisoformat(item['data_agendada'])
-            dias_restantes = (data_agendada - today).days
-            
-            if dias_restantes <= intervalo_alerta and dias_restantes >= 0:
-                alerts.append({
-                    'type': 'data',
-                    'id': item['id'],
-                    'descricao': item['descricao'],
-                    'veiculo': item['Veiculo']['placa'],
-                    'urgency': f"{dias_restantes} dias restantes (Alerta: {intervalo_alerta} dias)"
-                })
-
-    return alerts
+def check_maintenance_alerts(id_empresa: str, supabase, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Retorna as manutenções agendadas perto de vencer (ou já vencidas) por KM ou Data,
+    da mais urgente para a menos urgente. `limit` restringe aos N primeiros.
+    Lê o snapshot pré-calculado pelo agendador (utils/alert_snapshot.py); sem snapshot,
+    calcula pelo motor de alertas (utils/alert_engine.py) e grava um novo.
+    """
+    alerts = read_alerts(supabase, id_empresa)['itens']
+    return alerts if limit is None else alerts[:limit]
 
 # -----------------
 # ROTA PRINCIPAL (EXIBE ALERTAS)
@@ -70,7 +47,8 @@ def index():
     
     return render_template('maintenance_index.html', 
                            title='Gestão de Manutenção', 
-                           alerts=alerts)
+                           alerts=alerts,
+                           realizadas=get_recent_records('Manutencao_Realizada'))
 
 # -----------------
 # 1. ROTA DE AGENDAMENTO PREDITIVO
@@ -101,7 +79,10 @@ def schedule_maintenance():
         }
         
         try:
-            supabase.table('Manutencao_Preditiva').insert(schedule_data).execute()
+            response = supabase.table('Manutencao_Preditiva').insert(schedule_data).execute()
+            if response.data:
+                get_alert_engine().on_schedule_added(current_user.id_empresa, response.data[0])
+            invalidate_dashboard(current_user.id_empresa)
             flash('Manutenção agendada com sucesso! Os alertas serão gerados automaticamente.', 'success')
             return redirect(url_for('maintenance.index'))
         except Exception as e:
@@ -124,14 +105,13 @@ def perform_maintenance():
     if form.validate_on_submit():
         supabase = get_safe_supabase_client()
         
-        # 1. UPLOAD DA NOTA FISCAL (Simulação do Storage)
-        url_nota_fiscal = None
+        # 1. NOTA FISCAL: copiada do request agora, enviada ao storage em segundo plano
+        # depois que a manutenção for gravada (a URL é preenchida ao fim do envio)
+        receipt_tmp = None
         file = request.files.get('nota_fiscal_file')
         
         if file and file.filename:
-            file_name = f"nf_manutencao_{current_user.id_empresa}_{form.id_veiculo.data}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
-            url_nota_fiscal = f"/storage/notas_manutencao/{file_name}.{file.filename.split('.')[-1]}"
-            flash("O upload da nota fiscal de manutenção foi simulado. A URL será salva no BD.", 'warning')
+            receipt_tmp = spool_upload(file)
 
         # 2. PREPARAÇÃO DOS DADOS
         maintenance_data = {
@@ -143,16 +123,27 @@ def perform_maintenance():
             "custo_total": form.custo_total.data,
             "oficina_responsavel": form.oficina_responsavel.data,
             "id_usuario_registro": current_user.id,
-            "url_nota_fiscal": url_nota_fiscal
+            "url_nota_fiscal": None # Preenchida pelo upload em segundo plano
         }
         
         try:
             # Insere o registro de manutenção realizada
-            supabase.table('Manutencao_Realizada').insert(maintenance_data).execute()
+            response = supabase.table('Manutencao_Realizada').insert(maintenance_data).execute()
+            if receipt_tmp and response.data:
+                submit_receipt_upload(
+                    'Manutencao_Realizada', response.data[0]['id'], current_user.id_empresa,
+                    receipt_path('manutencao', current_user.id_empresa, form.id_veiculo.data, file.filename),
+                    receipt_tmp, file.mimetype,
+                )
+                receipt_tmp = None
+                flash('A nota fiscal está sendo enviada; o link aparecerá no registro em instantes.', 'info')
+            invalidate_dashboard(current_user.id_empresa)
             
             # 3. ATUALIZA STATUS DO AGENDAMENTO (Se for o caso)
             if id_preditivo:
                 supabase.table('Manutencao_Preditiva').update({'status': 'Realizada'}).eq('id', id_preditivo).execute()
+                get_alert_engine().on_schedule_completed(current_user.id_empresa, id_preditivo)
+                invalidate_dashboard(current_user.id_empresa)
                 flash('Manutenção realizada e agendamento preditivo atualizado!', 'success')
             else:
                 flash('Manutenção avulsa registrada com sucesso!', 'success')
@@ -161,5 +152,50 @@ def perform_maintenance():
 
         except Exception as e:
             flash(f'Erro ao registrar manutenção: {e.args[0] if e.args else str(e)}', 'danger')
+        finally:
+            # Registro recusado: a cópia da nota fiscal não será enviada
+            if receipt_tmp:
+                os.remove(receipt_tmp)
+
+    return render_template('perform_maintenance.html', title='Registrar Manutenção Realizada', form=form, id_preditivo=id_preditivo)
+
+
+# -----------------
+# 3. STATUS DO AGENDADOR DE ALERTAS
+# -----------------
+@maintenance_bp.route('/status')
+@operator_required
+def scheduler_status():
+    """Métricas da última execução do agendador de alertas (duração, empresas, falhas e atraso).
+    São dados de todas as empresas: só para operação (METRICS_TOKEN), não para usuários."""
+    return jsonify(get_scheduler_metrics())
+
+
+# -----------------
+# COMANDOS CLI: AGENDADOR DE ALERTAS
+# -----------------
+def _require_shared_cache() -> None:
+    """Fora do processo web, snapshots, métricas e a trava só chegam aos workers por um cache
+    compartilhado; com o cache em memória o trabalho ficaria invisível para eles."""
+    if not is_shared_cache():
+        raise click.ClickException(
+            "Os comandos do agendador exigem CACHE_BACKEND=redis (com CACHE_REDIS_URL): com o cache "
+            "em memória os snapshots ficam só neste processo e os workers web não os veem. "
+            "Configure o redis ou use ALERT_SCHEDULER_ENABLED=true no processo web.")
+
+
+@maintenance_bp.cli.command('compute-alerts')
+def compute_alerts_command():
+    """Recalcula uma vez os alertas de todas as empresas."""
+    _require_shared_cache()
+    metrics = run_alert_job(current_app._get_current_object(), get_service_client())
+    click.echo(f"Alertas recalculados para {metrics['empresas']} empresa(s) em {metrics['duracao_s']}s "
+               f"({metrics['falhas']} falha(s)).")
+
 
-    return render_template('perform_maintenance.html', title='Registrar Manutenção Realizada', form=form, id_preditivo=id_preditivo)
\ No newline at end of file
+@maintenance_bp.cli.command('alert-scheduler')
+def alert_scheduler_command():
+    """Executa o agendador de alertas em primeiro plano (a cada ALERT_SCHEDULER_INTERVAL segundos)."""
+    _require_shared_cache()
+    click.echo(f"Agendador de alertas iniciado (intervalo: {current_app.config.get('ALERT_SCHEDULER_INTERVAL', 900)}s).")
+    run_scheduler_loop(current_app._get_current_object(), get_service_client())
@@ -5,8 +5,7 @@ from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import login_user, logout_user, current_user, login_required
 from .forms import EmpresaRegisterForm, LoginForm
 from ...utils.data_access import get_safe_supabase_client
-from flask import current_app
-from supabase import create_client
+from ...database import get_service_client
 
 # Define o Blueprint 'auth'
 auth_bp = Blueprint('auth', __name__, template_folder='templates', url_prefix='/auth')
@@ -24,14 +23,9 @@ def register_empresa():
     
     if form.validate_on_submit():
         try:
-            supabase = get_safe_supabase_client()
-
-            # Preferir usar service_role client para checagens/escritas server-side quando disponível
-            service_key = current_app.config.get('SUPABASE_KEY_SERVICE_ROLE')
-            if service_key:
-                svc = create_client(current_app.config.get('SUPABASE_URL'), service_key)
-            else:
-                svc = supabase
+            # Cliente service_role do registro (recai sobre ANON se a chave de serviço não existir).
+            # O cliente é reaproveitado entre requests, sem novo handshake a cada POST.
+            svc = get_service_client()
 
             # Verificar se email já existe (procurar na tabela 'usuario')
             response = svc.table('usuario').select('id').eq('email', form.email.data).execute()
@@ -77,10 +71,7 @@ def register_empresa():
             }
 
             try:
-                if service_key:
-                    resp_user = svc.table('usuario').insert(usuario_data).execute()
-                else:
-                    resp_user = supabase.table('usuario').insert(usuario_data).execute()
+                resp_user = svc.table('usuario').insert(usuario_data).execute()
 
                 if getattr(resp_user, 'error', None) or not getattr(resp_user, 'data', None):
                     flash('Empresa criada mas falha ao criar usuário admin. Verifique o banco.', 'warning')
@@ -150,6 +141,8 @@ def login():
 @login_required
 def logout():
     """Realiza logout do usuário"""
+    from ...models import User
+    User.invalidate(current_user.id)
     logout_user()
     flash('Você saiu da sua conta.', 'info')
     return redirect(url_for('auth.login'))
@@ -0,0 +1,30 @@
+# logistica_app/app/blueprints/dashboard/forms.py
+
+from flask_wtf import FlaskForm
+from wtforms import SelectField, DateField, SubmitField
+from wtforms.validators import DataRequired, Optional
+
+class ExportForm(FlaskForm):
+    """
+    Parâmetros da exportação do histórico (enviados por GET, sem CSRF).
+    """
+    class Meta:
+        csrf = False
+
+    tipo = SelectField('Histórico', choices=[
+        ('abastecimento', 'Abastecimentos'),
+        ('manutencao', 'Manutenções Realizadas')
+    ], validators=[DataRequired()])
+
+    formato = SelectField('Formato', choices=[
+        ('csv', 'CSV'),
+        ('xlsx', 'Excel (XLSX)')
+    ], default='csv', validators=[DataRequired()])
+
+    # Populado dinamicamente com os veículos da empresa ('' = todos)
+    id_veiculo = SelectField('Veículo', validators=[Optional()])
+
+    data_inicio = DateField('De', format='%Y-%m-%d', validators=[Optional()])
+    data_fim = DateField('Até', format='%Y-%m-%d', validators=[Optional()])
+
+    submit = SubmitField('Exportar')
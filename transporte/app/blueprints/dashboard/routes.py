@@ -1,31 +1,43 @@
 # logistica_app/app/blueprints/dashboard/routes.py
 
-from flask import Blueprint, render_template, flash
+from flask import Blueprint, render_template, flash, current_app, request, Response, stream_with_context
 from flask_login import current_user, login_required
 # Importa as novas funções de análise
-from ...utils.data_analysis import get_fueling_costs_summary, get_maintenance_costs_summary
+from ...utils.data_analysis import get_fueling_costs_summary, get_fueling_statistics, get_maintenance_costs_summary
 from ...utils.data_access import get_safe_supabase_client # Para alertas (opcional)
-from ..Maintenance.routes import check_maintenance_alerts # Reutiliza a função de alertas
+from ...utils.concurrency import gather
+from ...utils.dashboard_cache import get_dashboard, set_dashboard
+from ...utils.alert_snapshot import read_alerts
+from ...utils.data_access import get_vehicles_for_select
+from ...utils.export import count_export_rows, export_columns, iter_export_rows, stream_csv, stream_xlsx, xlsx_available
+from .forms import ExportForm
+from datetime import date
 
 # Define o Blueprint 'dashboard'
 dashboard_bp = Blueprint('dashboard', __name__, template_folder='templates', url_prefix='/dashboard')
 
-@dashboard_bp.route('/')
-@login_required
-def main_dashboard():
-    
-    # 1. Custo de Abastecimento
-    fueling_summary = get_fueling_costs_summary()
-    
-    # 2. Custo de Manutenção
-    maintenance_summary = get_maintenance_costs_summary()
-    
-    # 3. Alertas de Manutenção (Reutilizando a função)
-    supabase = get_safe_supabase_client()
-    alerts = check_maintenance_alerts(current_user.id_empresa, supabase)
-    
-    if alerts:
-        flash(f"⚠️ **ATENÇÃO:** Você tem {len(alerts)} manutenções que precisam de sua atenção!", 'warning')
+def _alerts_summary(id_empresa):
+    """Os alertas mais urgentes (até DASHBOARD_ALERTS_LIMIT) e o total de alertas da empresa."""
+    snapshot = read_alerts(get_safe_supabase_client(), id_empresa)
+    return {
+        "itens": snapshot['itens'][:current_app.config.get('DASHBOARD_ALERTS_LIMIT', 10)],
+        "total": snapshot['total'],
+    }
+
+def _build_dashboard(id_empresa):
+    """Busca e mescla os dados do dashboard. Retorna (dados, erros por seção)."""
+
+    # 1-3. Custo de Abastecimento, Custo de Manutenção e Alertas buscados em paralelo:
+    # a latência da página passa a ser a da consulta mais lenta, não a soma das três.
+    results, errors = gather({
+        'abastecimento': get_fueling_costs_summary,
+        'manutencao': get_maintenance_costs_summary,
+        'alertas': lambda: _alerts_summary(id_empresa),
+    })
+
+    fueling_summary = results.get('abastecimento', {"total_frota": 0.00, "veiculos": {}})
+    maintenance_summary = results.get('manutencao', {"total_frota": 0.00, "veiculos": {}})
+    alerts = results.get('alertas', {"itens": [], "total": 0})
         
     # 4. Cálculo do Custo Total da Frota
     custo_total_geral = fueling_summary['total_frota'] + maintenance_summary['total_frota']
@@ -53,11 +65,119 @@ def main_dashboard():
                 "custo_manutencao": round(data['custo_total'], 2)
             }
 
+    dashboard = {
+        "total_abastecimento": fueling_summary['total_frota'],
+        "total_manutencao": maintenance_summary['total_frota'],
+        "custo_total_geral": round(custo_total_geral, 2),
+        "veiculos_data": list(veiculos_data.values()),
+        "alerts": alerts['itens'],
+        "total_alertas": alerts['total'],
+    }
+    return dashboard, errors
+
+
+@dashboard_bp.route('/')
+@login_required
+def main_dashboard():
+    id_empresa = current_user.id_empresa
+
+    # Os dados só mudam quando há escrita (abastecimento, manutenção ou veículo): usa o cache da empresa
+    dashboard = get_dashboard(id_empresa)
+    if dashboard is None:
+        dashboard, errors = _build_dashboard(id_empresa)
+
+        # Uma seção que falhar é exibida vazia; as demais são renderizadas normalmente
+        for secao, erro in errors.items():
+            print(f"Erro ao carregar seção '{secao}' do dashboard: {erro}")
+            flash(f"Não foi possível carregar os dados de {secao} agora. Tente novamente em instantes.", 'danger')
+
+        # Resultados parciais não vão para o cache
+        if not errors:
+            set_dashboard(id_empresa, dashboard)
+
+    alerts = dashboard['alerts']
+    if alerts:
+        flash(f"⚠️ **ATENÇÃO:** Você tem {dashboard.get('total_alertas', len(alerts))} manutenções que precisam de sua atenção!", 'warning')
 
     return render_template('main_dashboard.html', 
                            title='Dashboard de Custos Logísticos',
-                           fueling_summary=fueling_summary,
-                           maintenance_summary=maintenance_summary,
-                           custo_total_geral=round(custo_total_geral, 2),
-                           veiculos_data=veiculos_data.values(),
-                           alerts=alerts)
\ No newline at end of file
+                           fueling_summary={"total_frota": dashboard['total_abastecimento']},
+                           maintenance_summary={"total_frota": dashboard['total_manutencao']},
+                           custo_total_geral=dashboard['custo_total_geral'],
+                           veiculos_data=dashboard['veiculos_data'],
+                           alerts=alerts)
+
+
+# -----------------
+# ESTATÍSTICAS DE CONSUMO POR VEÍCULO
+# -----------------
+@dashboard_bp.route('/consumo')
+@login_required
+def fuel_statistics():
+    # Lê o histórico inteiro da empresa (motor NumPy em utils/fuel_stats.py): fica fora do
+    # dashboard principal, que só usa os agregados, e é calculado quando a página é pedida
+    stats = sorted(get_fueling_statistics().values(), key=lambda item: item['placa'])
+    if not stats:
+        flash('Nenhum abastecimento com dados suficientes para calcular estatísticas.', 'info')
+    return render_template('fuel_statistics.html', title='Estatísticas de Consumo', stats=stats)
+
+# -----------------
+# EXPORTAÇÃO DO HISTÓRICO (CSV / XLSX EM STREAMING)
+# -----------------
+@dashboard_bp.route('/export')
+@login_required
+def export_history():
+    form = ExportForm(request.args)
+    form.id_veiculo.choices = [('', 'Todos os veículos')] + get_vehicles_for_select()[1:]
+
+    # Sem parâmetros: apenas exibe o formulário
+    if not request.args:
+        return render_template('export.html', title='Exportar Histórico', form=form)
+
+    if not form.validate():
+        flash('Parâmetros de exportação inválidos: ' + '; '.join(
+            f"{form[campo].label.text}: {', '.join(erros)}" for campo, erros in form.errors.items()), 'danger')
+        return render_template('export.html', title='Exportar Histórico', form=form)
+
+    if form.formato.data == 'xlsx' and not xlsx_available():
+        flash('Exportação em XLSX indisponível neste servidor (instale openpyxl). Use CSV.', 'warning')
+        return render_template('export.html', title='Exportar Histórico', form=form)
+
+    tipo = form.tipo.data
+    filters = {
+        'data_inicio': form.data_inicio.data,
+        'data_fim': form.data_fim.data,
+        'id_veiculo': int(form.id_veiculo.data) if form.id_veiculo.data else None,
+    }
+    supabase = get_safe_supabase_client()
+
+    if form.formato.data == 'xlsx':
+        # O XLSX só é enviado depois de montado inteiro: acima do limite, o worker/proxy
+        # estouraria o timeout sem ter mandado nenhum byte. O CSV sai em streaming.
+        max_rows = current_app.config.get('EXPORT_XLSX_MAX_ROWS', 100000)
+        try:
+            total = count_export_rows(supabase, current_user.id_empresa, tipo, **filters)
+        except Exception as e:
+            flash(f'Erro ao preparar a exportação: {e}', 'danger')
+            return render_template('export.html', title='Exportar Histórico', form=form)
+        if total > max_rows:
+            flash(f'O período selecionado tem {total} registros; em XLSX o limite é {max_rows}. '
+                  'Use CSV (sem limite) ou reduza o período.', 'warning')
+            return render_template('export.html', title='Exportar Histórico', form=form)
+
+    rows = iter_export_rows(supabase, current_user.id_empresa, tipo, **filters)
+    columns = export_columns(tipo)
+    file_name = f"{tipo}_{date.today().strftime('%Y%m%d')}.{form.formato.data}"
+
+    # O gerador roda depois que a view retorna: stream_with_context mantém request/usuário disponíveis
+    if form.formato.data == 'xlsx':
+        body = stream_xlsx(rows, columns, title=tipo.capitalize())
+        mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    else:
+        body = stream_csv(rows, columns)
+        mimetype = 'text/csv; charset=utf-8'
+
+    return Response(stream_with_context(body), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename="{file_name}"',
+        'X-Accel-Buffering': 'no',  # não deixa proxies (nginx) acumularem a resposta inteira
+    })
@@ -3,6 +3,16 @@
 from flask_wtf import FlaskForm
 from wtforms import StringField, IntegerField, SelectField, SubmitField
 from wtforms.validators import DataRequired, Length, NumberRange, Optional, Regexp
+from flask_wtf.file import FileField, FileAllowed, FileRequired
+
+# Opções de combustível, compartilhadas pelo cadastro e pelos filtros da listagem
+COMBUSTIVEL_CHOICES = [
+    ('Diesel', 'Diesel'),
+    ('Gasolina', 'Gasolina'),
+    ('Etanol', 'Etanol'),
+    ('GNV', 'GNV'),
+    ('Eletrico', 'Elétrico')
+]
 
 class VehicleForm(FlaskForm):
     """
@@ -24,17 +34,51 @@ class VehicleForm(FlaskForm):
     ])
     
     # Opções de combustível (pode ser carregado dinamicamente do BD no futuro)
-    tipo_combustivel = SelectField('Combustível', choices=[
-        ('Diesel', 'Diesel'),
-        ('Gasolina', 'Gasolina'),
-        ('Etanol', 'Etanol'),
-        ('GNV', 'GNV'),
-        ('Eletrico', 'Elétrico')
-    ], validators=[DataRequired()])
+    tipo_combustivel = SelectField('Combustível', choices=COMBUSTIVEL_CHOICES, validators=[DataRequired()])
     
     km_atual = IntegerField('Quilometragem Atual (KM)', validators=[
         DataRequired(),
         NumberRange(min=0, message="A KM não pode ser negativa.")
     ])
     
-    submit = SubmitField('Salvar Veículo')
\ No newline at end of file
+    submit = SubmitField('Salvar Veículo')
+
+class VehicleImportForm(FlaskForm):
+    """
+    Formulário de importação em lote da frota (CSV).
+    """
+    arquivo_csv = FileField('Arquivo CSV da Frota', validators=[
+        FileRequired(),
+        FileAllowed(['csv'], 'Envie um arquivo .csv.')
+    ])
+
+    submit = SubmitField('Importar Veículos')
+
+
+class VehicleFilterForm(FlaskForm):
+    """
+    Filtros e ordenação da listagem da frota (enviados por GET, sem CSRF).
+    """
+    class Meta:
+        csrf = False
+
+    tipo_combustivel = SelectField('Combustível', choices=[('', 'Todos')] + COMBUSTIVEL_CHOICES,
+                                   validators=[Optional()])
+    marca = StringField('Marca', validators=[Optional(), Length(max=50)])
+    modelo = StringField('Modelo', validators=[Optional(), Length(max=50)])
+    ano_min = IntegerField('Ano de', validators=[Optional(), NumberRange(min=1900, max=2100)])
+    ano_max = IntegerField('Ano até', validators=[Optional(), NumberRange(min=1900, max=2100)])
+
+    ordem = SelectField('Ordenar por', choices=[
+        ('placa', 'Placa'),
+        ('marca', 'Marca'),
+        ('modelo', 'Modelo'),
+        ('ano', 'Ano'),
+        ('km_atual', 'KM Atual')
+    ], default='placa', validators=[Optional()])
+    direcao = SelectField('Direção', choices=[
+        ('asc', 'Crescente'),
+        ('desc', 'Decrescente')
+    ], default='asc', validators=[Optional()])
+
+    submit = SubmitField('Filtrar')
@@ -1,9 +1,14 @@
 # logistica_app/app/blueprints/vehicle/routes.py
 
-from flask import Blueprint, render_template, redirect, url_for, flash
+from flask import Blueprint, render_template, redirect, url_for, flash, current_app, request
 from flask_login import login_required, current_user
-from .forms import VehicleForm
-from ...utils.data_access import get_safe_supabase_client
+from .forms import VehicleForm, VehicleImportForm, VehicleFilterForm
+from ...utils.data_access import get_safe_supabase_client, invalidate_vehicle_choices, list_vehicles_page
+from ...utils.dashboard_cache import invalidate_dashboard
+from ...utils.odometer import get_odometer_index
+from ...utils.vehicle_import import import_vehicles
+from ...database import get_service_client
+import click
 
 # Define o Blueprint 'vehicle'
 vehicle_bp = Blueprint('vehicle', __name__, template_folder='templates', url_prefix='/veiculos')
@@ -32,7 +37,11 @@ def register_vehicle():
         
         try:
             # Insere os dados na tabela Veiculo
-            supabase.table('Veiculo').insert(vehicle_data).execute()
+            response = supabase.table('Veiculo').insert(vehicle_data).execute()
+            if response.data:
+                get_odometer_index().set(current_user.id_empresa, response.data[0]['id'], vehicle_data['km_atual'])
+            invalidate_dashboard(current_user.id_empresa)
+            invalidate_vehicle_choices(current_user.id_empresa)
             
             flash('Veículo cadastrado com sucesso!', 'success')
             return redirect(url_for('vehicle.list_vehicles'))
@@ -44,20 +53,106 @@ def register_vehicle():
     return render_template('register_vehicle.html', title='Cadastrar Veículo', form=form)
 
 # -----------------
-# 2. LISTAGEM DE VEÍCULOS
+# 2. LISTAGEM DE VEÍCULOS (PAGINADA)
 # -----------------
 @vehicle_bp.route('/list')
 @login_required
 def list_vehicles():
-    supabase = get_safe_supabase_client()
-    id_empresa = current_user.id_empresa
+    form = VehicleFilterForm(request.args)
     veiculos = []
+    next_cursor = None
+
+    if not form.validate():
+        flash('Filtros inválidos: ' + '; '.join(f"{form[campo].label.text}: {', '.join(erros)}"
+                                                for campo, erros in form.errors.items()), 'warning')
+        return render_template('list.html', title='Frota', veiculos=veiculos, form=form, next_args=None, first_args=None)
+
+    filters = {
+        "tipo_combustivel": form.tipo_combustivel.data,
+        "marca": (form.marca.data or '').strip(),
+        "modelo": (form.modelo.data or '').strip(),
+        "ano_min": form.ano_min.data,
+        "ano_max": form.ano_max.data,
+    }
+    sort = form.ordem.data or 'placa'
+    desc = form.direcao.data == 'desc'
+
+    # Cursor da página: valor da coluna de ordenação e id da última linha da página anterior.
+    # Sem `depois_de` o valor é NULL (ex: veículo sem KM ou ano cadastrado).
+    after = None
+    if request.args.get('depois_id', type=int) is not None:
+        value = request.args.get('depois_de')
+        if value is not None and sort in ('ano', 'km_atual'):
+            value = request.args.get('depois_de', type=int)
+            if value is None:
+                flash('Cursor de paginação inválido; exibindo a primeira página.', 'warning')
+        if value is not None or 'depois_de' not in request.args:
+            after = (value, request.args.get('depois_id', type=int))
+
+    page_size = min(request.args.get('por_pagina', type=int) or current_app.config.get('VEHICLE_LIST_PAGE_SIZE', 50),
+                    current_app.config.get('VEHICLE_LIST_MAX_PAGE_SIZE', 200))
 
     try:
-        # Busca apenas os veículos da empresa logada
-        response = supabase.table('Veiculo').select('*').eq('id_empresa', id_empresa).order('placa').execute()
-        veiculos = response.data
+        veiculos, next_cursor = list_vehicles_page(filters, sort=sort, desc=desc, after=after, page_size=page_size)
     except Exception as e:
         flash(f'Erro ao carregar lista de veículos: {e}', 'danger')
 
-    return render_template('vehicle_list.html', title='Frota', veiculos=veiculos)
\ No newline at end of file
+    # Links de navegação: mesmos filtros, com o cursor da próxima página ou sem cursor (primeira)
+    first_args = {key: value for key, value in request.args.items() if key not in ('depois_de', 'depois_id')}
+    next_args = None
+    if next_cursor is not None:
+        next_args = dict(first_args, depois_id=next_cursor[1])
+        if next_cursor[0] is not None:
+            next_args['depois_de'] = next_cursor[0]
+
+    return render_template('list.html', title='Frota', veiculos=veiculos, form=form,
+                           next_args=next_args, first_args=first_args if after is not None else None)
+
+# -----------------
+# 3. IMPORTAÇÃO EM LOTE DA FROTA (CSV)
+# -----------------
+@vehicle_bp.route('/import', methods=['GET', 'POST'])
+@login_required
+def import_vehicles_view():
+    form = VehicleImportForm()
+    report = None
+
+    if form.validate_on_submit():
+        try:
+            report = import_vehicles(
+                get_safe_supabase_client(),
+                current_user.id_empresa,
+                form.arquivo_csv.data.stream,
+                batch_size=current_app.config.get('IMPORT_BATCH_SIZE', 500),
+            )
+            invalidate_dashboard(current_user.id_empresa)
+            invalidate_vehicle_choices(current_user.id_empresa)
+            flash(f"{report['inseridos']} veículo(s) cadastrado(s), {report['atualizados']} atualizado(s) e "
+                  f"{report['rejeitados']} linha(s) rejeitada(s).",
+                  'success' if not report['rejeitados'] else 'warning')
+        except Exception as e:
+            flash(f'Erro ao importar veículos: {e.args[0] if e.args else str(e)}', 'danger')
+
+    return render_template('import_vehicles.html', title='Importar Frota', form=form, report=report)
+
+
+# -----------------
+# COMANDO CLI: IMPORTAÇÃO EM LOTE DA FROTA
+# -----------------
+@vehicle_bp.cli.command('import-csv')
+@click.argument('arquivo', type=click.File('rb'))
+@click.option('--empresa', 'id_empresa', required=True, help='ID da empresa dona da frota.')
+@click.option('--batch-size', default=None, type=int, help='Veículos por insert/upsert (padrão: IMPORT_BATCH_SIZE).')
+def import_csv_command(arquivo, id_empresa, batch_size):
+    """Cadastra/atualiza veículos a partir de um CSV."""
+    report = import_vehicles(
+        get_service_client(), id_empresa, arquivo,
+        batch_size=batch_size or current_app.config.get('IMPORT_BATCH_SIZE', 500),
+    )
+    invalidate_dashboard(id_empresa)
+    invalidate_vehicle_choices(id_empresa)
+    click.echo(f"Linhas: {report['total_linhas']} | Inseridos: {report['inseridos']} | "
+               f"Atualizados: {report['atualizados']} | Rejeitados: {report['rejeitados']}")
+    for item in report['linhas']:
+        if item['status'] == 'rejeitado':
+            click.echo(f"  linha {item['linha']} ({item['placa']}): {item['motivo']}")
@@ -1,28 +1,171 @@
 # logistica_app/app/database.py
 
-from supabase import create_client, Client
+import threading
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
 from flask import current_app, g
 
-def get_supabase_client() -> Client:
-    """Obtém e armazena o cliente Supabase no contexto da aplicação (g)."""
+if TYPE_CHECKING:
+    import httpx
+    from supabase import Client
+
+# httpx, postgrest e supabase são importados na criação do primeiro cliente, não no import
+# do app: o cold start (wsgi.py) não paga por eles antes de precisar do banco.
+
+# -----------------
+# REGISTRO DE CLIENTES (POOL POR WORKER)
+# -----------------
+# Cada worker do gunicorn mantém um cliente por (url, papel da chave). O cliente
+# reaproveita o pool httpx (keep-alive/HTTP2), então a conexão TLS com o PostgREST
+# é aberta uma vez e reutilizada entre requests, em vez de a cada request.
+_clients: Dict[Tuple[str, str], 'Client'] = {}
+_clients_lock = threading.Lock()
+
+
+def _build_http_client(config) -> 'httpx.Client':
+    """Cria o pool httpx compartilhado usando os limites definidos em Config."""
+    import httpx
+
+    limits = httpx.Limits(
+        max_connections=config.get('SUPABASE_POOL_MAX_CONNECTIONS', 20),
+        max_keepalive_connections=config.get('SUPABASE_POOL_MAX_KEEPALIVE', 10),
+        keepalive_expiry=config.get('SUPABASE_POOL_KEEPALIVE_EXPIRY', 30.0),
+    )
+    timeout = httpx.Timeout(
+        config.get('SUPABASE_HTTP_TIMEOUT', 10.0),
+        connect=config.get('SUPABASE_HTTP_CONNECT_TIMEOUT', 5.0),
+    )
+    # Chamadas feitas dentro de gather() não passam do QUERY_TIMEOUT (ver utils/http_deadline.py)
+    from .utils.http_deadline import DeadlineTransport
+    transport = DeadlineTransport(httpx.HTTPTransport(http2=config.get('SUPABASE_HTTP2', True), limits=limits))
+    if config.get('METRICS_ENABLED', True) or config.get('TRACE_ENABLED'):
+        # O transporte mede cada chamada (tabela/operação) para /metrics e para o trace do request
+        from .utils.metrics import InstrumentedTransport
+        transport = InstrumentedTransport(transport)
+    return httpx.Client(transport=transport, timeout=timeout)
+
+
+# -----------------
+# CLIENTE REST ENXUTO
+# -----------------
+# O app só usa PostgREST (table/rpc) e Storage. O `supabase` importa também realtime,
+# auth e functions (e os modelos pydantic deles), que somam boa parte do cold start.
+# Com SUPABASE_CLIENT='rest' (padrão) o cliente monta só o PostgREST, e o Storage na
+# primeira vez que for usado; SUPABASE_CLIENT='supabase' volta ao cliente completo.
+
+class RestClient:
+    """Subconjunto do `supabase.Client` usado pelo app, com os mesmos cabeçalhos de autenticação."""
+    def __init__(self, supabase_url: str, supabase_key: str, http_client: 'httpx.Client'):
+        from postgrest import SyncPostgrestClient
+
+        if not supabase_url or not supabase_key:
+            raise ValueError("supabase_url e supabase_key são obrigatórios")
+        self.supabase_url = supabase_url.rstrip('/')
+        self.supabase_key = supabase_key
+        self.headers = {'apiKey': supabase_key, 'Authorization': f"Bearer {supabase_key}"}
+        self._http_client = http_client
+        self._storage = None
+        self.postgrest = SyncPostgrestClient(f"{self.supabase_url}/rest/v1", headers=self.headers,
+                                             http_client=http_client)
+
+    def table(self, table_name: str):
+        return self.postgrest.from_(table_name)
+
+    def from_(self, table_name: str):
+        return self.postgrest.from_(table_name)
+
+    def rpc(self, fn: str, params: Optional[Dict[str, Any]] = None, count=None, head: bool = False, get: bool = False):
+        return self.postgrest.rpc(fn, params or {}, count, head, get)
+
+    @property
+    def storage(self):
+        if self._storage is None:
+            from storage3 import SyncStorageClient
+            self._storage = SyncStorageClient(url=f"{self.supabase_url}/storage/v1/", headers=self.headers,
+                                              http_client=self._http_client)
+        return self._storage
+
+
+def _create_pooled_client(url: str, key: str, config) -> 'Client':
+    """Cria um cliente Supabase que usa o pool httpx compartilhado."""
+    if config.get('SUPABASE_CLIENT', 'rest') == 'rest':
+        return RestClient(url, key, _build_http_client(config))
+
+    from supabase import ClientOptions, create_client
+
+    timeout = config.get('SUPABASE_HTTP_TIMEOUT', 10.0)
+    try:
+        options = ClientOptions(httpx_client=_build_http_client(config), postgrest_client_timeout=timeout)
+    except TypeError:
+        # Versões antigas do supabase-py não aceitam httpx_client: mantém ao menos o timeout
+        options = ClientOptions(postgrest_client_timeout=timeout)
+    return create_client(url, key, options=options)
+
+
+def get_registered_client(role: str = 'anon') -> 'Client':
+    """Retorna o cliente do registro para o papel informado ('anon' ou 'service_role').
+
+    O cliente é criado na primeira chamada do worker e reutilizado depois disso.
+    É seguro chamar a partir de várias threads.
+    Com SUPABASE_BACKEND='fake', devolve o cliente em memória de app/fake_supabase.py.
+    """
+    config = current_app.config
+    if config.get('SUPABASE_BACKEND', 'supabase') == 'fake':
+        from .fake_supabase import get_fake_client
+        return get_fake_client()
+
+    url: str = config["SUPABASE_URL"]
+    if role == 'service_role':
+        key: str = config.get("SUPABASE_KEY_SERVICE_ROLE") or config["SUPABASE_KEY_ANON"]
+    else:
+        key = config["SUPABASE_KEY_ANON"]
+
+    registry_key = (url, role)
+    client = _clients.get(registry_key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(registry_key)
+            if client is None:
+                client = _create_pooled_client(url, key, config)
+                _clients[registry_key] = client
+    return client
+
+
+def close_clients() -> None:
+    """Fecha os pools httpx de todos os clientes registrados (fim do worker)."""
+    with _clients_lock:
+        for client in _clients.values():
+            try:
+                client.postgrest.session.close()
+            except Exception as e:
+                print(f"Erro ao fechar cliente Supabase: {e}")
+        _clients.clear()
+
+
+def get_supabase_client() -> 'Client':
+    """Obtém o cliente Supabase do registro e o armazena no contexto do request (g)."""
     if 'supabase_client' not in g:
-        # Usa as configurações carregadas do app/config.py
-        url: str = current_app.config["SUPABASE_URL"]
-        key: str = current_app.config["SUPABASE_KEY_ANON"] # Usamos ANON para a maioria das operações de front-end
-        
-        # O cliente 'service_role' é para operações de back-end mais sensíveis (ex: criação de usuário, deleção)
+        # Usamos ANON para a maioria das operações de front-end.
         # O ideal é usar o key Anon + RLS (Row Level Security) do Supabase.
-        g.supabase_client = create_client(url, key)
-    
+        g.supabase_client = get_registered_client('anon')
+
     return g.supabase_client
 
+
+def get_service_client() -> 'Client':
+    """Cliente 'service_role' para operações de back-end sensíveis (ex: criação de usuário).
+    Se a chave de serviço não estiver configurada, recai sobre a chave ANON.
+    """
+    return get_registered_client('service_role')
+
 # Função para inicializar o cliente no contexto da aplicação Flask
 def init_app(app):
-    # Aqui podemos adicionar funções para fechar a conexão no final do request, se usarmos um pool mais tradicional.
-    pass
+    # O cliente não é fechado no fim do request: o pool vive enquanto o worker viver.
+    import atexit
+    atexit.register(close_clients)
 
 
-def get_safe_supabase_client() -> Client:
+def get_safe_supabase_client() -> 'Client':
     """Compatibilidade: função auxiliar usada em várias partes do código.
     Retorna o cliente Supabase, mas faz checagens explícitas nas configurações
     para fornecer mensagens de erro claras quando variáveis de ambiente
@@ -30,6 +173,8 @@ def get_safe_supabase_client() -> Client:
     """
     # Verifica se as configurações básicas estão presentes para dar mensagens claras
     try:
+        if current_app.config.get('SUPABASE_BACKEND', 'supabase') == 'fake':
+            return get_supabase_client()
         url = current_app.config.get('SUPABASE_URL', '')
         anon = current_app.config.get('SUPABASE_KEY_ANON', '')
     except RuntimeError:
@@ -44,4 +189,4 @@ def get_safe_supabase_client() -> Client:
     try:
         return get_supabase_client()
     except Exception as e:
-        raise RuntimeError(f"Não foi possível inicializar o cliente Supabase: {e}")
\ No newline at end of file
+        raise RuntimeError(f"Não foi possível inicializar o cliente Supabase: {e}")
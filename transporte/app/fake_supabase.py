@@ -0,0 +1,640 @@
+# logistica_app/app/fake_supabase.py
+
+import bisect
+import functools
+import itertools
+import re
+import threading
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Supabase falso, em memória, para benchmarks, testes de carga e desenvolvimento sem um
+# projeto no ar (Config.SUPABASE_BACKEND = 'fake'; ver database.get_registered_client).
+#
+# Implementa o subconjunto do cliente PostgREST usado pela aplicação:
+#   table(...).select('col, Tabela(col, ...)', count='exact') com recursos embutidos (FK id_<tabela>),
+#   eq, neq, gt, gte, lt, lte, in_, like, ilike, is_, or_ (inclusive and(...) aninhado),
+#   order, limit, range, insert, update, upsert(on_conflict=...), delete e rpc(...)
+# e as funções SQL do diretório sql/ (registrar_abastecimento, resumo_manutencao_por_veiculo).
+#
+# As linhas ficam em dicionários por chave primária, com índices de igualdade criados sob
+# demanda por coluna; a paginação por chave (iter_rows_by_key) é atendida com busca binária,
+# então ler 1M de abastecimentos página a página não degrada. Um lock global serializa as
+# operações, como uma transação por chamada. Storage não é simulado: use STORAGE_BACKEND=local.
+
+PRIMARY_KEYS = {'Resumo_Abastecimento_Veiculo': 'id_veiculo'}
+
+
+class FakeAPIError(Exception):
+    """Mesmo formato do postgrest.exceptions.APIError (message, code)."""
+    def __init__(self, message: str, code: str):
+        super().__init__(message)
+        self.message = message
+        self.code = code
+
+
+def _api_error(message: str, code: str) -> Exception:
+    try:
+        from postgrest.exceptions import APIError
+        return APIError({'message': message, 'code': code, 'hint': None, 'details': None})
+    except ImportError:
+        return FakeAPIError(message, code)
+
+
+# -----------------
+# COMPARAÇÃO DE VALORES
+# -----------------
+
+def _index_key(value: Any) -> Any:
+    """Chave de igualdade: o PostgREST recebe tudo como texto (eq.5 casa com 5 e '5')."""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def _coerce(stored: Any, value: Any) -> Any:
+    """Converte o valor do filtro para o tipo da coluna, como o Postgres faz com o texto da URL."""
+    if value is None or stored is None:
+        return value
+    if hasattr(value, 'isoformat'):
+        value = value.isoformat()
+    if isinstance(stored, bool):
+        return str(value).lower() in ('true', 't', '1') if not isinstance(value, bool) else value
+    if isinstance(stored, (int, float)) and isinstance(value, str):
+        try:
+            return int(value) if isinstance(stored, int) and value.lstrip('-').isdigit() else float(value)
+        except ValueError:
+            return value
+    if isinstance(stored, str) and not isinstance(value, str):
+        return str(value)
+    return value
+
+
+@functools.lru_cache(maxsize=256)
+def _like(pattern: str, case_insensitive: bool) -> 're.Pattern':
+    regex = ''.join('.*' if ch in '%*' else '.' if ch == '_' else re.escape(ch) for ch in pattern)
+    return re.compile(f"^{regex}$", re.IGNORECASE | re.DOTALL if case_insensitive else re.DOTALL)
+
+
+def _matches(row: Dict[str, Any], column: str, op: str, value: Any) -> bool:
+    if op == 'or':
+        return any(_matches(row, *condition) for condition in value)
+    if op == 'and':
+        return all(_matches(row, *condition) for condition in value)
+    if op == 'not':
+        return not _matches(row, *value[0])
+
+    stored = row.get(column)
+    if op == 'is':
+        expected = None if value in (None, 'null') else _coerce(True, value)
+        return stored is expected if expected is None else stored == expected
+    if stored is None:
+        return False  # NULL não é igual, maior ou menor que nada
+    if op == 'eq':
+        return _index_key(stored) == _index_key(value)
+    if op == 'neq':
+        return _index_key(stored) != _index_key(value)
+    if op == 'in':
+        return _index_key(stored) in {_index_key(v) for v in value}
+    if op in ('like', 'ilike'):
+        return bool(_like(str(value), op == 'ilike').match(str(stored)))
+
+    value = _coerce(stored, value)
+    try:
+        if op == 'gt':
+            return stored > value
+        if op == 'gte':
+            return stored >= value
+        if op == 'lt':
+            return stored < value
+        if op == 'lte':
+            return stored <= value
+    except TypeError:
+        return False
+    raise ValueError(f"Operador não suportado pelo Supabase falso: {op}")
+
+
+# -----------------
+# FILTROS or=(...) DO POSTGREST
+# -----------------
+
+def _split_top_level(text: str) -> List[str]:
+    """Divide por vírgulas fora de parênteses e de aspas."""
+    parts, depth, quoted, current = [], 0, False, []
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if quoted:
+            if ch == '\\' and i + 1 < len(text):
+                current.append(text[i:i + 2])
+                i += 2
+                continue
+            if ch == '"':
+                quoted = False
+        elif ch == '"':
+            quoted = True
+        elif ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+        elif ch == ',' and depth == 0:
+            parts.append(''.join(current).strip())
+            current = []
+            i += 1
+            continue
+        current.append(ch)
+        i += 1
+    if current:
+        parts.append(''.join(current).strip())
+    return [part for part in parts if part]
+
+
+def _unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == '"' and value[-1] == '"':
+        return re.sub(r'\\(.)', r'\1', value[1:-1])
+    return value
+
+
+def parse_logic_filter(expression: str) -> List[Tuple[str, str, Any]]:
+    """'a.eq.1,and(b.gt."x",c.lt.2)' -> lista de condições (coluna, operador, valor)."""
+    conditions = []
+    for part in _split_top_level(expression):
+        for logic in ('and', 'or'):
+            if part.startswith(logic + '(') and part.endswith(')'):
+                conditions.append(('', logic, parse_logic_filter(part[len(logic) + 1:-1])))
+                break
+        else:
+            column, op, value = part.split('.', 2)
+            if op == 'not':
+                op, value = value.split('.', 1)
+                conditions.append(('', 'not', [(column, op, _unquote(value))]))
+                continue
+            if op == 'in':
+                value = [_unquote(v) for v in _split_top_level(value.strip('()'))]
+            else:
+                value = _unquote(value)
+            conditions.append((column, op, value))
+    return conditions
+
+
+# -----------------
+# SELECT COM RECURSOS EMBUTIDOS
+# -----------------
+
+def parse_select(columns: str) -> Tuple[Optional[List[str]], Dict[str, Optional[List[str]]]]:
+    """'id, placa, Veiculo(placa)' -> (['id', 'placa'], {'Veiculo': ['placa']}). None = todas."""
+    plain: List[str] = []
+    embedded: Dict[str, Optional[List[str]]] = {}
+    for part in _split_top_level(columns or '*'):
+        if '(' in part:
+            name, inner = part.split('(', 1)
+            embedded[name.strip()] = parse_select(inner.rstrip(')'))[0]
+        elif part == '*':
+            plain = None
+        elif plain is not None:
+            plain.append(part)
+    return plain, embedded
+
+
+def _project(row: Dict[str, Any], columns: Optional[List[str]]) -> Dict[str, Any]:
+    if columns is None:
+        return dict(row)
+    return {column: row.get(column) for column in columns}
+
+
+# -----------------
+# TABELAS
+# -----------------
+
+class FakeTable:
+    """Linhas por chave primária, ordem das chaves e índices de igualdade sob demanda."""
+    def __init__(self, name: str):
+        self.name = name
+        self.pk = PRIMARY_KEYS.get(name, 'id')
+        self.rows: Dict[Any, Dict[str, Any]] = {}
+        self.order: List[Any] = []  # chaves primárias em ordem crescente
+        self.indexes: Dict[str, Dict[Any, List[Any]]] = {}
+        self._next_id = 1  # sequence da chave primária
+
+    def index(self, column: str) -> Dict[Any, List[Any]]:
+        index = self.indexes.get(column)
+        if index is None:
+            index = {}
+            for key in self.order:
+                index.setdefault(_index_key(self.rows[key].get(column)), []).append(key)
+            self.indexes[column] = index
+        return index
+
+    @staticmethod
+    def _insert_sorted(keys: List[Any], key: Any) -> None:
+        if not keys or keys[-1] < key:
+            keys.append(key)
+        else:
+            bisect.insort(keys, key)
+
+    @staticmethod
+    def _remove_sorted(keys: List[Any], key: Any) -> None:
+        position = bisect.bisect_left(keys, key)
+        if position < len(keys) and keys[position] == key:
+            del keys[position]
+
+    def put(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        row = dict(row)
+        if row.get(self.pk) is None:
+            row[self.pk] = self._next_id
+        key = row[self.pk]
+        if isinstance(key, int):
+            # Ids informados explicitamente também avançam a sequence
+            self._next_id = max(self._next_id, key + 1)
+        if key in self.rows:
+            self.replace(key, row)
+            return row
+        self.rows[key] = row
+        self._insert_sorted(self.order, key)
+        for column, index in self.indexes.items():
+            self._insert_sorted(index.setdefault(_index_key(row.get(column)), []), key)
+        return row
+
+    def replace(self, key: Any, new_row: Dict[str, Any]) -> None:
+        old = self.rows[key]
+        for column, index in self.indexes.items():
+            before, after = _index_key(old.get(column)), _index_key(new_row.get(column))
+            if before != after:
+                self._remove_sorted(index.get(before, []), key)
+                self._insert_sorted(index.setdefault(after, []), key)
+        self.rows[key] = new_row
+
+    def remove(self, key: Any) -> None:
+        row = self.rows.pop(key)
+        self._remove_sorted(self.order, key)
+        for column, index in self.indexes.items():
+            self._remove_sorted(index.get(_index_key(row.get(column)), []), key)
+
+    def candidates(self, filters: List[Tuple[str, str, Any]]) -> List[Any]:
+        """Menor lista ordenada de chaves que cobre os filtros de igualdade/in."""
+        best: Optional[List[Any]] = None
+        sample = self.order[0] if self.order else None
+        for column, op, value in filters:
+            if op == 'eq' and column == self.pk:
+                key = _coerce(sample, value)
+                found = [key] if key in self.rows else []
+            elif op == 'eq':
+                found = self.index(column).get(_index_key(value), [])
+            elif op == 'in' and column == self.pk:
+                found = sorted({key for key in (_coerce(sample, v) for v in value) if key in self.rows})
+            else:
+                continue
+            if best is None or len(found) < len(best):
+                best = found
+        return self.order if best is None else best
+
+
+class FakeDatabase:
+    """Todas as tabelas do Supabase falso (uma instância por processo)."""
+    def __init__(self):
+        self.tables: Dict[str, FakeTable] = {}
+        self.functions: Dict[str, Callable[['FakeDatabase', Dict[str, Any]], List[Dict[str, Any]]]] = dict(SQL_FUNCTIONS)
+        self.lock = threading.RLock()
+        self.calls = 0  # round trips atendidos (para benchmarks)
+
+    def table(self, name: str) -> FakeTable:
+        table = self.tables.get(name)
+        if table is None:
+            table = self.tables[name] = FakeTable(name)
+        return table
+
+    def load(self, name: str, rows: Iterable[Dict[str, Any]]) -> int:
+        """Carga em massa (sem passar pelo construtor de consultas). Retorna o número de linhas."""
+        with self.lock:
+            table = self.table(name)
+            count = 0
+            for row in rows:
+                table.put(row)
+                count += 1
+            return count
+
+    def embed(self, row: Dict[str, Any], name: str, columns: Optional[List[str]]) -> Optional[Dict[str, Any]]:
+        """Recurso embutido muitos-para-um pela FK id_<tabela> (ex: Veiculo -> id_veiculo)."""
+        target = self.tables.get(name)
+        if target is None:
+            return None
+        parent = target.rows.get(row.get(f"id_{name.lower()}"))
+        return None if parent is None else _project(parent, columns)
+
+    def reset(self) -> None:
+        with self.lock:
+            self.tables.clear()
+            self.calls = 0
+
+
+# -----------------
+# CONSTRUTOR DE CONSULTAS
+# -----------------
+
+class FakeResponse:
+    def __init__(self, data: List[Dict[str, Any]], count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+class FakeQuery:
+    """Equivalente ao request builder do postgrest-py: cada método devolve a própria consulta."""
+    def __init__(self, db: FakeDatabase, table: str, rpc: Optional[Tuple[str, Dict[str, Any]]] = None):
+        self._db = db
+        self._table = table
+        self._rpc = rpc
+        self._method = 'select' if rpc is None else 'rpc'
+        self._columns: Optional[List[str]] = None
+        self._embedded: Dict[str, Optional[List[str]]] = {}
+        self._count: Optional[str] = None
+        self._filters: List[Tuple[str, str, Any]] = []
+        self._order: List[Tuple[str, bool]] = []
+        self._offset = 0
+        self._limit: Optional[int] = None
+        self._payload: Any = None
+        self._on_conflict: Optional[str] = None
+
+    # --- operações ---
+    def select(self, *columns: str, count: Optional[str] = None, **kwargs) -> 'FakeQuery':
+        self._columns, self._embedded = parse_select(','.join(columns) if columns else '*')
+        self._count = count
+        return self
+
+    def insert(self, rows, count: Optional[str] = None, returning: str = 'representation', **kwargs) -> 'FakeQuery':
+        self._method, self._payload = 'insert', rows
+        return self
+
+    def upsert(self, rows, on_conflict: str = '', **kwargs) -> 'FakeQuery':
+        self._method, self._payload, self._on_conflict = 'upsert', rows, on_conflict or None
+        return self
+
+    def update(self, values: Dict[str, Any], **kwargs) -> 'FakeQuery':
+        self._method, self._payload = 'update', values
+        return self
+
+    def delete(self, **kwargs) -> 'FakeQuery':
+        self._method = 'delete'
+        return self
+
+    # --- filtros ---
+    def _filter(self, column: str, op: str, value: Any) -> 'FakeQuery':
+        self._filters.append((column, op, value))
+        return self
+
+    def eq(self, column, value): return self._filter(column, 'eq', value)
+    def neq(self, column, value): return self._filter(column, 'neq', value)
+    def gt(self, column, value): return self._filter(column, 'gt', value)
+    def gte(self, column, value): return self._filter(column, 'gte', value)
+    def lt(self, column, value): return self._filter(column, 'lt', value)
+    def lte(self, column, value): return self._filter(column, 'lte', value)
+    def like(self, column, pattern): return self._filter(column, 'like', pattern)
+    def ilike(self, column, pattern): return self._filter(column, 'ilike', pattern)
+    def is_(self, column, value): return self._filter(column, 'is', value)
+    def in_(self, column, values): return self._filter(column, 'in', list(values))
+
+    def or_(self, filters: str, reference_table: Optional[str] = None) -> 'FakeQuery':
+        return self._filter('', 'or', parse_logic_filter(filters))
+
+    def match(self, query: Dict[str, Any]) -> 'FakeQuery':
+        for column, value in query.items():
+            self.eq(column, value)
+        return self
+
+    # --- ordenação e paginação ---
+    def order(self, column: str, desc: bool = False, **kwargs) -> 'FakeQuery':
+        self._order.append((column, desc))
+        return self
+
+    def limit(self, size: int, **kwargs) -> 'FakeQuery':
+        self._limit = size
+        return self
+
+    def range(self, start: int, end: int, **kwargs) -> 'FakeQuery':
+        self._offset, self._limit = start, end - start + 1
+        return self
+
+    # --- execução ---
+    def execute(self) -> FakeResponse:
+        with self._db.lock:
+            self._db.calls += 1
+            if self._method == 'rpc':
+                name, params = self._rpc
+                function = self._db.functions.get(name)
+                if function is None:
+                    raise _api_error(f"Could not find the function public.{name}", 'PGRST202')
+                rows = function(self._db, params or {})
+                return self._respond(self._select_from(rows))
+            table = self._db.table(self._table)
+            if self._method == 'select':
+                return self._respond(self._select(table), table)
+            if self._method == 'insert':
+                return FakeResponse([dict(table.put(row)) for row in self._rows()])
+            if self._method == 'upsert':
+                return FakeResponse([dict(row) for row in self._upsert(table)])
+            if self._method == 'update':
+                updated = []
+                for key in [k for k in table.candidates(self._filters) if self._matches_all(table.rows[k])]:
+                    new_row = {**table.rows[key], **self._payload}
+                    table.replace(key, new_row)
+                    updated.append(dict(new_row))
+                return FakeResponse(updated)
+            deleted = []
+            for key in [k for k in table.candidates(self._filters) if self._matches_all(table.rows[k])]:
+                deleted.append(dict(table.rows[key]))
+                table.remove(key)
+            return FakeResponse(deleted)
+
+    def _rows(self) -> List[Dict[str, Any]]:
+        return [self._payload] if isinstance(self._payload, dict) else list(self._payload)
+
+    def _upsert(self, table: FakeTable) -> List[Dict[str, Any]]:
+        conflict = self._on_conflict or table.pk
+        result = []
+        for row in self._rows():
+            if conflict == table.pk:
+                existing = table.rows.get(row.get(table.pk)) if row.get(table.pk) is not None else None
+            else:
+                keys = table.index(conflict).get(_index_key(row.get(conflict)), [])
+                existing = table.rows[keys[0]] if keys else None
+            if existing is not None:
+                new_row = {**existing, **row}
+                table.replace(existing[table.pk], new_row)
+                result.append(new_row)
+            else:
+                result.append(table.put(row))
+        return result
+
+    def _matches_all(self, row: Dict[str, Any]) -> bool:
+        return all(_matches(row, column, op, value) for column, op, value in self._filters)
+
+    def _select(self, table: FakeTable) -> Tuple[List[Dict[str, Any]], int]:
+        keys = table.candidates(self._filters)
+        rows = table.rows
+        end = None if self._limit is None else self._offset + self._limit
+
+        # Ordenação pela chave primária (paginação keyset): a lista já está em ordem, então basta
+        # começar no primeiro valor depois do cursor e parar ao completar a página.
+        if self._order and self._order[0] == (table.pk, False) and self._count is None:
+            start = 0
+            for column, op, value in self._filters:
+                if column == table.pk and op in ('gt', 'gte') and keys:
+                    value = _coerce(keys[0], value)
+                    position = (bisect.bisect_right if op == 'gt' else bisect.bisect_left)(keys, value)
+                    start = max(start, position)
+            matched = []
+            for key in itertools.islice(keys, start, None):
+                row = rows[key]
+                if self._matches_all(row):
+                    matched.append(row)
+                    if end is not None and len(matched) >= end:
+                        break
+            return matched[self._offset:end], None
+
+        matched = [rows[key] for key in keys if self._matches_all(rows[key])]
+        return self._sort(matched)[self._offset:end], len(matched)
+
+    def _select_from(self, rows: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+        matched = [row for row in rows if self._matches_all(row)]
+        end = None if self._limit is None else self._offset + self._limit
+        return self._sort(matched)[self._offset:end], len(matched)
+
+    def _sort(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # Padrão do Postgres: NULLS LAST em ordem crescente, NULLS FIRST em decrescente
+        for column, desc in reversed(self._order):
+            rows = sorted(rows, key=lambda row, c=column: (True, 0) if row.get(c) is None else (False, row.get(c)),
+                          reverse=desc)
+        return rows
+
+    def _respond(self, result: Tuple[List[Dict[str, Any]], Optional[int]], table: Optional[FakeTable] = None) -> FakeResponse:
+        rows, total = result
+        data = []
+        for row in rows:
+            item = _project(row, self._columns)
+            for name, columns in self._embedded.items():
+                item[name] = self._db.embed(row, name, columns)
+            data.append(item)
+        return FakeResponse(data, total if self._count else None)
+
+
+class FakeClient:
+    """Cliente com a mesma interface usada de supabase.Client (table/from_/rpc)."""
+    def __init__(self, db: FakeDatabase):
+        self.db = db
+        self.postgrest = SimpleNamespace(session=SimpleNamespace(close=lambda: None))
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self.db, name)
+
+    from_ = table
+
+    def rpc(self, name: str, params: Optional[Dict[str, Any]] = None, **kwargs) -> FakeQuery:
+        return FakeQuery(self.db, name, rpc=(name, params))
+
+    @property
+    def storage(self):
+        raise RuntimeError("O Supabase falso não simula o Storage: use STORAGE_BACKEND=local.")
+
+
+# -----------------
+# FUNÇÕES SQL (sql/002 e sql/003)
+# -----------------
+
+def _registrar_abastecimento(db: FakeDatabase, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Mesma regra da procedure: KM maior que a atual, insere, avança km_atual e os agregados."""
+    veiculos = db.table('Veiculo')
+    veiculo = veiculos.rows.get(_coerce(1, params['p_id_veiculo']))
+    if veiculo is None or _index_key(veiculo.get('id_empresa')) != _index_key(params['p_id_empresa']):
+        raise _api_error(f"Veículo {params['p_id_veiculo']} não encontrado para esta empresa.", 'P0002')
+
+    km_atual = veiculo.get('km_atual')
+    km = int(params['p_km_registro'])
+    if km <= (km_atual or 0):
+        raise _api_error(f"A KM ({km}) deve ser maior que a última KM registrada ({km_atual or 0}).", '22023')
+
+    litros, valor_litro = float(params['p_litros']), float(params['p_valor_litro'])
+    abastecimento = db.table('Abastecimento').put({
+        'id_empresa': veiculo['id_empresa'],
+        'id_veiculo': veiculo['id'],
+        'data_abastecimento': params['p_data_abastecimento'],
+        'litros': litros,
+        'valor_litro': valor_litro,
+        'km_registro': km,
+        'local_abastecimento': params.get('p_local_abastecimento'),
+        'id_usuario_registro': params.get('p_id_usuario_registro'),
+        'url_nota_fiscal': params.get('p_url_nota_fiscal'),
+        'url_nota_fiscal_miniatura': None,
+    })
+    veiculos.replace(veiculo['id'], {**veiculo, 'km_atual': km})
+
+    resumos = db.table('Resumo_Abastecimento_Veiculo')
+    resumo = resumos.rows.get(veiculo['id'])
+    agora = datetime.now(timezone.utc).isoformat()
+    if resumo is None:
+        resumos.put({'id_veiculo': veiculo['id'], 'id_empresa': veiculo['id_empresa'],
+                     'custo_total': litros * valor_litro, 'total_litros': litros, 'ultimo_km': km,
+                     'soma_km_l': 0.0, 'num_km_l': 0, 'atualizado_em': agora})
+    else:
+        counts = resumo['ultimo_km'] is not None and km > resumo['ultimo_km'] and litros > 0
+        resumos.replace(veiculo['id'], {
+            **resumo,
+            'custo_total': float(resumo['custo_total']) + litros * valor_litro,
+            'total_litros': float(resumo['total_litros']) + litros,
+            'soma_km_l': float(resumo['soma_km_l']) + (round((km - resumo['ultimo_km']) / litros, 2) if counts else 0),
+            'num_km_l': resumo['num_km_l'] + (1 if counts else 0),
+            'ultimo_km': max(resumo['ultimo_km'] or 0, km),
+            'atualizado_em': agora,
+        })
+    return [{'id_abastecimento': abastecimento['id'], 'km_anterior': km_atual}]
+
+
+def _resumo_manutencao_por_veiculo(db: FakeDatabase, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    manutencoes = db.table('Manutencao_Realizada')
+    veiculos = db.table('Veiculo')
+    inicio, fim = params.get('p_data_inicio'), params.get('p_data_fim')
+    totals: Dict[Any, List[float]] = {}
+    for key in manutencoes.index('id_empresa').get(_index_key(params['p_id_empresa']), []):
+        row = manutencoes.rows[key]
+        data = str(row.get('data_realizacao') or '')[:10]
+        if (inicio and data < inicio) or (fim and data > fim):
+            continue
+        if row['id_veiculo'] not in veiculos.rows:
+            continue  # join com Veiculo
+        total = totals.setdefault(row['id_veiculo'], [0.0, 0])
+        total[0] += float(row.get('custo_total') or 0)
+        total[1] += 1
+    return [
+        {'id_veiculo': vehicle_id, 'placa': veiculos.rows[vehicle_id].get('placa'),
+         'custo_total': custo, 'num_manutencoes': count}
+        for vehicle_id, (custo, count) in totals.items()
+    ]
+
+
+SQL_FUNCTIONS = {
+    'registrar_abastecimento': _registrar_abastecimento,
+    'resumo_manutencao_por_veiculo': _resumo_manutencao_por_veiculo,
+}
+
+
+_db: Optional[FakeDatabase] = None
+_db_lock = threading.Lock()
+
+
+def get_fake_database() -> FakeDatabase:
+    """Banco falso do processo (compartilhado pelos papéis 'anon' e 'service_role')."""
+    global _db
+    if _db is None:
+        with _db_lock:
+            if _db is None:
+                _db = FakeDatabase()
+    return _db
+
+
+def get_fake_client() -> FakeClient:
+    return FakeClient(get_fake_database())
@@ -1,9 +1,23 @@
 # logistica_app/app/models.py
 
 from flask_login import UserMixin
+from flask import current_app
 from .database import get_supabase_client
+from .utils.cache import TTLCache
 from typing import Optional, Dict, Any
 
+# Cache por worker dos usuários recarregados pelo Flask-Login (criado sob demanda com os limites de Config)
+_user_cache: Optional[TTLCache] = None
+
+def _get_user_cache() -> TTLCache:
+    global _user_cache
+    if _user_cache is None:
+        _user_cache = TTLCache(
+            maxsize=current_app.config.get('USER_CACHE_MAXSIZE', 1024),
+            ttl=current_app.config.get('USER_CACHE_TTL', 60),
+        )
+    return _user_cache
+
 class User(UserMixin):
     """
     Modelo de Usuário para integração com Flask-Login, baseado na tabela 'Usuario'.
@@ -31,15 +45,34 @@ class User(UserMixin):
 
     @staticmethod
     def get(user_id: str) -> Optional['User']:
-        """Busca um usuário pelo ID (usado pelo Flask-Login para recarregar a sessão)."""
+        """Busca um usuário pelo ID (usado pelo Flask-Login para recarregar a sessão).
+        Consulta primeiro o cache do worker; só vai ao Supabase em caso de ausência/expiração.
+        """
+        cache = _get_user_cache()
+        user = cache.get(str(user_id))
+        if user is not None:
+            return user
+
         supabase = get_supabase_client()
         # Busca o usuário pelo ID
         response = supabase.table('Usuario').select('*').eq('id', user_id).limit(1).execute()
 
         if response.data:
-            return User._create_user_from_data(response.data[0])
+            user = User._create_user_from_data(response.data[0])
+            cache.set(str(user_id), user)
+            return user
         return None
 
+    @staticmethod
+    def invalidate(user_id: str) -> None:
+        """Remove o usuário do cache. Deve ser chamado no logout e após qualquer escrita na linha do usuário."""
+        _get_user_cache().delete(str(user_id))
+
+    @staticmethod
+    def cache_stats() -> Dict[str, int]:
+        """Contadores de acerto/erro do cache de usuários deste worker."""
+        return _get_user_cache().stats()
+
     @staticmethod
     def get_by_email(email: str) -> Optional['User']:
         """Busca um usuário pelo email (usado no login para autenticação)."""
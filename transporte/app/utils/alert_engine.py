@@ -0,0 +1,329 @@
+# logistica_app/app/utils/alert_engine.py
+
+import heapq
+import itertools
+import threading
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from flask import current_app
+
+from .cache import TTLCache
+from .data_access import VEHICLE_DIMENSION_EMBED, get_request_loader, iter_rows_by_key
+
+# Motor de alertas de manutenção preditiva.
+#
+# Para cada empresa o worker mantém índices sobre as manutenções 'Agendada':
+#   - KM: um heap "pendente" por veículo, ordenado pelo KM em que o alerta dispara
+#     (km_agendado - intervalo_alerta), e um heap "ativo" da empresa ordenado pela urgência.
+#     Quando o km_atual de um veículo muda, só os agendamentos daquele veículo são reprocessados.
+#   - Data: um heap "pendente" ordenado pelo dia em que o alerta dispara
+#     (data_agendada - intervalo_alerta) e um heap "ativo" ordenado pela urgência.
+# A urgência é a fração da janela de alerta que ainda resta (_urgency), a mesma nos dois heaps
+# ativos: top(N) percorre os dois em ordem e para nos N primeiros. Para datas a fração depende
+# do dia, então o heap ativo de datas é refeito uma vez por dia.
+# Entradas antigas não são removidas dos heaps: são descartadas ao serem lidas (remoção
+# preguiçosa), conferindo se a versão da entrada ainda é a atual do agendamento.
+# Alertas vencidos (KM ou data já ultrapassados) continuam no índice e aparecem primeiro.
+
+
+def _alert(item: Dict[str, Any], placa: str, tipo: str, restante: int) -> Dict[str, Any]:
+    intervalo = item['intervalo_alerta']
+    unidade = 'KM' if tipo == 'km' else 'dias'
+    if restante < 0:
+        urgency = f"Vencida há {-restante} {unidade} (Alerta: {intervalo} {unidade})"
+    else:
+        urgency = f"{restante} {unidade} restantes (Alerta: {intervalo} {unidade})"
+    return {
+        'type': tipo,
+        'id': item['id'],
+        'descricao': item['descricao'],
+        'veiculo': placa,
+        'restante': restante,
+        'vencida': restante < 0,
+        'urgency': urgency,
+    }
+
+
+def _urgency(restante: int, intervalo: Optional[int]) -> float:
+    """Ordem entre KM e data: fração da janela de alerta que ainda resta (negativa = vencida)."""
+    return restante / max(intervalo or 0, 1)
+
+
+def _in_order(heap: list, is_valid) -> Iterator[tuple]:
+    """Entradas válidas do heap em ordem crescente, sem alterá-lo: cada entrada lida custa
+    O(log k) (k = entradas já visitadas), então os N primeiros saem sem ordenar o heap todo."""
+    frontier = [(heap[0], 0)] if heap else []
+    while frontier:
+        entry, i = heapq.heappop(frontier)
+        for child in (2 * i + 1, 2 * i + 2):
+            if child < len(heap):
+                heapq.heappush(frontier, (heap[child], child))
+        if is_valid(entry):
+            yield entry
+
+
+class CompanyAlertIndex:
+    """Índices de alertas de uma empresa. Todas as operações rodam sob `lock`."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.items: Dict[int, Dict[str, Any]] = {}
+        self.vehicles: Dict[int, Dict[str, Any]] = {}
+
+        # Versões crescentes: uma entrada de heap só vale se carrega a versão atual do agendamento
+        self._seq = itertools.count(1)
+
+        self._km_pending: Dict[int, List[Tuple[int, int, int]]] = {}
+        self._km_active: Dict[int, Set[int]] = {}
+        self._km_heap: List[Tuple[float, int, int]] = []
+        self._km_version: Dict[int, int] = {}
+
+        self._date_pending: List[Tuple[int, int, int]] = []
+        self._date_active: Set[int] = set()
+        self._date_heap: List[Tuple[float, int, int]] = []
+        self._date_day: Optional[int] = None  # dia usado nas urgências do heap de datas
+
+    # --- Manutenção dos índices ---
+
+    def set_vehicle(self, vehicle_id: int, placa: str, km_atual: int) -> None:
+        self.vehicles[vehicle_id] = {'placa': placa, 'km_atual': km_atual or 0}
+
+    def add(self, item: Dict[str, Any]) -> None:
+        """Indexa um agendamento (status 'Agendada'). O veículo precisa estar em `vehicles`."""
+        sid = item['id']
+        self.remove(sid)
+        item['_versao'] = next(self._seq)
+        self.items[sid] = item
+        intervalo = item['intervalo_alerta'] or 0
+
+        if item.get('km_agendado') and item['km_agendado'] > 0:
+            vehicle_id = item['id_veiculo']
+            heapq.heappush(self._km_pending.setdefault(vehicle_id, []),
+                           (item['km_agendado'] - intervalo, sid, item['_versao']))
+            self._promote_km(vehicle_id)
+
+        if item.get('data_agendada'):
+            data_agendada = date.fromisoformat(str(item['data_agendada'])[:10])
+            item['_data_ordinal'] = data_agendada.toordinal()
+            heapq.heappush(self._date_pending, (item['_data_ordinal'] - intervalo, sid, item['_versao']))
+
+    def remove(self, sid: int) -> None:
+        """Retira um agendamento (realizado/cancelado). As entradas nos heaps expiram sozinhas."""
+        item = self.items.pop(sid, None)
+        if item is None:
+            return
+        self._km_active.get(item['id_veiculo'], set()).discard(sid)
+        self._km_version.pop(sid, None)
+        self._date_active.discard(sid)
+
+    def update_km(self, vehicle_id: int, km_atual: int) -> None:
+        """Novo km_atual do veículo: dispara os alertas que atingiram o limite e reordena os ativos."""
+        vehicle = self.vehicles.get(vehicle_id)
+        if vehicle is None or km_atual <= vehicle['km_atual']:
+            return
+        vehicle['km_atual'] = km_atual
+        self._promote_km(vehicle_id, reindex=True)
+
+        # Cada atualização deixa entradas antigas no heap: compacta quando elas passam das válidas
+        if len(self._km_heap) > 2 * len(self._km_version) + 64:
+            self._km_heap = [entry for entry in self._km_heap if self._km_entry_valid(entry)]
+            heapq.heapify(self._km_heap)
+
+    def _promote_km(self, vehicle_id: int, reindex: bool = False) -> None:
+        km_atual = self.vehicles[vehicle_id]['km_atual']
+        pending = self._km_pending.get(vehicle_id, [])
+        active = self._km_active.setdefault(vehicle_id, set())
+
+        promoted = []
+        while pending and pending[0][0] <= km_atual:
+            _, sid, versao = heapq.heappop(pending)
+            if self._current(sid, versao):
+                active.add(sid)
+                promoted.append(sid)
+
+        # O KM restante de todos os ativos do veículo mudou: entram de novo com versão nova
+        for sid in (active if reindex else promoted):
+            version = next(self._seq)
+            self._km_version[sid] = version
+            item = self.items[sid]
+            heapq.heappush(self._km_heap, (_urgency(item['km_agendado'] - km_atual, item['intervalo_alerta']), sid, version))
+
+    def _promote_dates(self, today: int) -> None:
+        if today != self._date_day or len(self._date_heap) > 2 * len(self._date_active) + 64:
+            # Dia novo (as frações mudam) ou muitas entradas antigas: refaz o heap com os ativos
+            self._date_day = today
+            self._date_heap = [(self._date_urgency(sid, today), sid, self.items[sid]['_versao'])
+                               for sid in self._date_active]
+            heapq.heapify(self._date_heap)
+
+        while self._date_pending and self._date_pending[0][0] <= today:
+            _, sid, versao = heapq.heappop(self._date_pending)
+            if self._current(sid, versao):
+                self._date_active.add(sid)
+                heapq.heappush(self._date_heap, (self._date_urgency(sid, today), sid, versao))
+
+    def _date_urgency(self, sid: int, today: int) -> float:
+        item = self.items[sid]
+        return _urgency(item['_data_ordinal'] - today, item['intervalo_alerta'])
+
+    def _current(self, sid: int, versao: int) -> bool:
+        item = self.items.get(sid)
+        return item is not None and item['_versao'] == versao
+
+    # --- Consultas ---
+
+    def count(self, today: Optional[date] = None) -> int:
+        self._promote_dates((today or date.today()).toordinal())
+        return sum(len(active) for active in self._km_active.values()) + len(self._date_active)
+
+    def top(self, limit: Optional[int] = None, today: Optional[date] = None) -> List[Dict[str, Any]]:
+        """
+        Os `limit` alertas mais urgentes (todos, se None), pela fração restante da janela de
+        alerta. Os dois heaps ativos já estão nessa ordem: são lidos em conjunto até o corte,
+        em O(limit · log n) mais as entradas antigas descartadas pelo caminho.
+        """
+        today_ordinal = (today or date.today()).toordinal()
+        self._promote_dates(today_ordinal)
+
+        km_entries = ((urgencia, sid, 'km') for urgencia, sid, _ in _in_order(self._km_heap, self._km_entry_valid))
+        date_entries = ((urgencia, sid, 'data') for urgencia, sid, _ in _in_order(
+            self._date_heap, lambda entry: entry[1] in self._date_active and self._current(entry[1], entry[2])))
+
+        alerts = []
+        for _, sid, tipo in itertools.islice(heapq.merge(km_entries, date_entries), limit):
+            item = self.items[sid]
+            vehicle = self.vehicles[item['id_veiculo']]
+            if tipo == 'km':
+                restante = item['km_agendado'] - vehicle['km_atual']
+            else:
+                restante = item['_data_ordinal'] - today_ordinal
+            alerts.append(_alert(item, vehicle['placa'], tipo, restante))
+        return alerts
+
+    def _km_entry_valid(self, entry: Tuple[float, int, int]) -> bool:
+        return self._km_version.get(entry[1]) == entry[2]
+
+
+class AlertEngine:
+    """
+    Índices de alertas por empresa, mantidos por worker. Carregados sob demanda com uma leitura
+    dos agendamentos e atualizados incrementalmente pelas rotas de escrita; o TTL
+    (ALERT_INDEX_TTL) força uma recarga periódica para absorver escritas feitas em outros workers.
+    """
+    def __init__(self, maxsize: int = 1000, ttl: float = 300.0):
+        self._indexes = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}  # uma carga por empresa de cada vez
+
+    def _load(self, supabase, id_empresa) -> CompanyAlertIndex:
+        index = CompanyAlertIndex()
+        scheduled = iter_rows_by_key(
+            lambda: supabase.table('Manutencao_Preditiva').select(
+                f"id, id_veiculo, descricao, km_agendado, data_agendada, intervalo_alerta, {VEHICLE_DIMENSION_EMBED}"
+            ).eq('id_empresa', id_empresa).eq('status', 'Agendada')
+        )
+        loader = get_request_loader()
+        for item in scheduled:
+            veiculo = item.pop('Veiculo')
+            if loader is not None:
+                loader.prime_vehicles([veiculo])
+            if item['id_veiculo'] not in index.vehicles:
+                index.set_vehicle(item['id_veiculo'], veiculo['placa'], veiculo['km_atual'])
+            index.add(item)
+        return index
+
+    def _get(self, supabase, id_empresa) -> CompanyAlertIndex:
+        key = str(id_empresa)
+        index = self._indexes.get(key)
+        if index is None:
+            with self._lock:
+                load_lock = self._load_locks.setdefault(key, threading.Lock())
+            with load_lock:
+                index = self._indexes.get(key)
+                if index is None:
+                    index = self._load(supabase, id_empresa)
+                    self._indexes.set(key, index)
+        return index
+
+    def _loaded(self, id_empresa) -> Optional[CompanyAlertIndex]:
+        return self._indexes.get(str(id_empresa))
+
+    def top_alerts(self, supabase, id_empresa, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        index = self._get(supabase, id_empresa)
+        with index.lock:
+            return index.top(limit)
+
+    def count_alerts(self, supabase, id_empresa) -> int:
+        index = self._get(supabase, id_empresa)
+        with index.lock:
+            return index.count()
+
+    # --- Atualizações incrementais (ignoradas se a empresa ainda não foi carregada) ---
+    # Toda atualização também invalida o snapshot pré-calculado da empresa (utils/alert_snapshot.py).
+
+    @staticmethod
+    def _changed(id_empresa) -> None:
+        from .alert_snapshot import invalidate_alert_snapshot  # alert_snapshot importa este módulo
+        invalidate_alert_snapshot(id_empresa)
+
+    def on_km_update(self, id_empresa, vehicle_id, km_atual: int) -> None:
+        self._changed(id_empresa)
+        index = self._loaded(id_empresa)
+        if index is not None:
+            with index.lock:
+                index.update_km(int(vehicle_id), int(km_atual))
+
+    def on_schedule_added(self, id_empresa, item: Dict[str, Any]) -> None:
+        self._changed(id_empresa)
+        index = self._loaded(id_empresa)
+        if index is None:
+            return
+        vehicle_id = int(item['id_veiculo'])
+        with index.lock:
+            known = vehicle_id in index.vehicles
+        # Veículo ainda sem agendamentos no índice: placa/KM vêm do carregador do request
+        # (sem consulta se o formulário já carregou a frota), em vez de recarregar o índice
+        vehicle = None
+        loader = get_request_loader()
+        if not known and loader is not None:
+            try:
+                vehicle = loader.vehicles_by_id([vehicle_id]).get(vehicle_id)
+            except Exception as e:
+                print(f"Erro ao buscar veículo do agendamento: {e}")
+        if not known and vehicle is None:
+            # Placa/KM desconhecidos: recarrega na próxima leitura
+            self.invalidate(id_empresa)
+            return
+        with index.lock:
+            if vehicle is not None and vehicle_id not in index.vehicles:
+                index.set_vehicle(vehicle_id, vehicle['placa'], vehicle['km_atual'])
+            index.add({key: item.get(key) for key in
+                       ('id', 'id_veiculo', 'descricao', 'km_agendado', 'data_agendada', 'intervalo_alerta')})
+
+    def on_schedule_completed(self, id_empresa, schedule_id) -> None:
+        self._changed(id_empresa)
+        index = self._loaded(id_empresa)
+        if index is not None:
+            with index.lock:
+                index.remove(int(schedule_id))
+
+    def invalidate(self, id_empresa) -> None:
+        self._indexes.delete(str(id_empresa))
+
+
+_engine: Optional[AlertEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_alert_engine() -> AlertEngine:
+    """Retorna o motor de alertas do worker (criado com os limites de Config)."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = AlertEngine(
+                    maxsize=current_app.config.get('ALERT_INDEX_MAXSIZE', 1000),
+                    ttl=current_app.config.get('ALERT_INDEX_TTL', 300),
+                )
+    return _engine
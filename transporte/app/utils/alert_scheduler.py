@@ -0,0 +1,136 @@
+# logistica_app/app/utils/alert_scheduler.py
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from flask import Flask, current_app
+
+from .alert_snapshot import refresh_alert_snapshot
+from .cache import get_cache_backend
+from .data_access import iter_rows_by_key
+
+# Agendador que pré-calcula os alertas de manutenção de todas as empresas.
+# Pode rodar dentro do processo web (ALERT_SCHEDULER_ENABLED=true, uma thread por worker)
+# ou separado, com `flask --app app maintenance alert-scheduler`.
+# Com CACHE_BACKEND=redis, uma trava compartilhada garante uma execução por intervalo
+# mesmo com vários workers do gunicorn; snapshots e métricas ficam visíveis para todos.
+
+
+def _backend():
+    return get_cache_backend('agendador_alertas', ttl=current_app.config.get('ALERT_SNAPSHOT_TTL', 1800))
+
+
+def _list_companies(supabase) -> List[Any]:
+    return [item['id'] for item in iter_rows_by_key(lambda: supabase.table('empresa').select('id'))]
+
+
+def run_alert_job(app: Flask, supabase, max_workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Recalcula o snapshot de alertas de todas as empresas com um pool de threads.
+    Retorna (e grava) as métricas da execução.
+    """
+    max_workers = max_workers or app.config.get('ALERT_SCHEDULER_WORKERS', 4)
+    started_at = datetime.now()
+    start = time.monotonic()
+
+    companies = _list_companies(supabase)
+    durations: List[float] = []
+    failures: Dict[str, str] = {}
+
+    def compute(id_empresa):
+        with app.app_context():
+            t0 = time.monotonic()
+            refresh_alert_snapshot(supabase, id_empresa, reload=True)
+            return time.monotonic() - t0
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='alertas') as pool:
+        futures = {id_empresa: pool.submit(compute, id_empresa) for id_empresa in companies}
+        for id_empresa, future in futures.items():
+            try:
+                durations.append(future.result())
+            except Exception as e:
+                failures[str(id_empresa)] = str(e)
+                print(f"Erro ao calcular alertas da empresa {id_empresa}: {e}")
+
+    metrics = {
+        "inicio": started_at.isoformat(timespec='seconds'),
+        "fim": datetime.now().isoformat(timespec='seconds'),
+        "fim_timestamp": time.time(),
+        "duracao_s": round(time.monotonic() - start, 3),
+        "empresas": len(companies),
+        "falhas": len(failures),
+        "erros": failures,
+        "duracao_media_empresa_s": round(sum(durations) / len(durations), 3) if durations else 0.0,
+        "duracao_max_empresa_s": round(max(durations), 3) if durations else 0.0,
+    }
+
+    with app.app_context():
+        backend = _backend()
+        metrics["execucoes"] = backend.incr('execucoes')
+        backend.set('metricas', metrics)
+    return metrics
+
+
+def get_scheduler_metrics() -> Dict[str, Any]:
+    """Métricas da última execução e o atraso (lag) desde então, em segundos."""
+    metrics = _backend().get('metricas')
+    if metrics is None:
+        return {"status": "sem_execucao", "intervalo_s": current_app.config.get('ALERT_SCHEDULER_INTERVAL', 900)}
+
+    lag = time.time() - metrics['fim_timestamp']
+    interval = current_app.config.get('ALERT_SCHEDULER_INTERVAL', 900)
+    return {
+        **metrics,
+        "status": "atrasado" if lag > 2 * interval else "ok",
+        "lag_s": round(lag, 1),
+        "intervalo_s": interval,
+    }
+
+
+def _acquire_run_lock(interval: float) -> bool:
+    """Trava de execução (set-if-absent com TTL): só um processo calcula a cada intervalo."""
+    return _backend().add('trava', datetime.now().isoformat(timespec='seconds'), ttl=max(interval * 0.9, 1))
+
+
+def run_scheduler_loop(app: Flask, supabase, stop: Optional[threading.Event] = None) -> None:
+    """Executa o job a cada ALERT_SCHEDULER_INTERVAL segundos até `stop` ser sinalizado."""
+    stop = stop or threading.Event()
+    interval = app.config.get('ALERT_SCHEDULER_INTERVAL', 900)
+
+    while not stop.is_set():
+        try:
+            with app.app_context():
+                should_run = _acquire_run_lock(interval)
+            if should_run:
+                run_alert_job(app, supabase)
+        except Exception as e:
+            print(f"Erro no agendador de alertas: {e}")
+        stop.wait(interval)
+
+
+_thread: Optional[threading.Thread] = None
+_stop = threading.Event()
+
+
+def start_alert_scheduler(app: Flask) -> None:
+    """Inicia o agendador em uma thread daemon do worker (chamado por create_app se habilitado)."""
+    global _thread
+    if _thread is not None and _thread.is_alive():
+        return
+
+    from ..database import get_service_client
+
+    def target():
+        with app.app_context():
+            supabase = get_service_client()
+        run_scheduler_loop(app, supabase, _stop)
+
+    _thread = threading.Thread(target=target, name='agendador-alertas', daemon=True)
+    _thread.start()
+
+
+def stop_alert_scheduler() -> None:
+    _stop.set()
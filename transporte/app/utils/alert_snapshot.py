@@ -0,0 +1,85 @@
+# logistica_app/app/utils/alert_snapshot.py
+
+from datetime import date, datetime
+from typing import Any, Dict, Optional
+
+from flask import current_app
+
+from .alert_engine import get_alert_engine
+from .cache import get_cache_backend, is_shared_cache
+
+# Snapshot dos alertas de manutenção por empresa, pré-calculado pelo agendador
+# (utils/alert_scheduler.py) e lido pelas rotas sem nenhuma chamada ao Supabase.
+# A chave inclui uma versão por empresa: qualquer escrita que mude os alertas
+# (abastecimento, agendamento, realização) incrementa a versão, e um snapshot
+# calculado antes da escrita deixa de ser lido, mesmo que seja gravado depois dela.
+# Alertas por data mudam com o dia, então um snapshot de outro dia também é ignorado.
+# Como no dashboard (utils/dashboard_cache.py), a versão só é incrementada para todos os
+# workers com CACHE_BACKEND=redis. Com o cache em memória, os snapshots valem só
+# ALERT_SNAPSHOT_LOCAL_TTL segundos; depois disso o worker recalcula pelo próprio índice,
+# recarregado do banco a cada ALERT_INDEX_TTL.
+
+
+def _backend():
+    config = current_app.config
+    ttl = config.get('ALERT_SNAPSHOT_TTL', 1800) if is_shared_cache() else config.get('ALERT_SNAPSHOT_LOCAL_TTL', 15)
+    return get_cache_backend('alertas', ttl=ttl)
+
+
+def _version(backend, id_empresa) -> int:
+    return backend.get_counter(f"versao:{id_empresa}")
+
+
+def invalidate_alert_snapshot(id_empresa) -> None:
+    """Descarta o snapshot da empresa. Chamar após escritas que alterem KM ou agendamentos."""
+    try:
+        _backend().incr(f"versao:{id_empresa}")
+    except Exception as e:
+        print(f"Erro ao invalidar snapshot de alertas: {e}")
+
+
+def get_alert_snapshot(id_empresa) -> Optional[Dict[str, Any]]:
+    """Snapshot atual da empresa ({itens, total, data_referencia, gerado_em}) ou None."""
+    try:
+        backend = _backend()
+        snapshot = backend.get(f"empresa:{id_empresa}:v{_version(backend, id_empresa)}")
+    except Exception as e:
+        print(f"Erro ao ler snapshot de alertas: {e}")
+        return None
+    if snapshot is None or snapshot['data_referencia'] != date.today().isoformat():
+        return None
+    return snapshot
+
+
+def refresh_alert_snapshot(supabase, id_empresa, reload: bool = False) -> Dict[str, Any]:
+    """
+    Calcula os alertas da empresa pelo motor de alertas e grava o snapshot.
+    `reload` descarta o índice do worker antes (o agendador sempre recarrega do banco).
+    """
+    backend = _backend()
+    version = _version(backend, id_empresa)  # lida antes do cálculo: escritas durante ele invalidam o resultado
+
+    engine = get_alert_engine()
+    if reload:
+        engine.invalidate(id_empresa)
+    itens = engine.top_alerts(supabase, id_empresa)
+
+    snapshot = {
+        "itens": itens,
+        "total": len(itens),
+        "data_referencia": date.today().isoformat(),
+        "gerado_em": datetime.now().isoformat(timespec='seconds'),
+    }
+    try:
+        backend.set(f"empresa:{id_empresa}:v{version}", snapshot)
+    except Exception as e:
+        print(f"Erro ao gravar snapshot de alertas: {e}")
+    return snapshot
+
+
+def read_alerts(supabase, id_empresa) -> Dict[str, Any]:
+    """Alertas da empresa: do snapshot quando houver; senão calcula agora e grava o snapshot."""
+    snapshot = get_alert_snapshot(id_empresa)
+    if snapshot is None:
+        snapshot = refresh_alert_snapshot(supabase, id_empresa)
+    return snapshot
@@ -0,0 +1,177 @@
+# logistica_app/app/utils/cache.py
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from flask import current_app
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Cache em memória, limitado por tamanho (LRU) e com expiração por tempo (TTL).
+    Seguro para uso a partir de várias threads do mesmo worker.
+    """
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Retorna o valor armazenado ou `default` se ausente/expirado."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING or entry[1] <= now:
+                if entry is not _MISSING:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Armazena o valor, descartando o item menos usado se o limite for atingido."""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Contadores de acerto/erro e ocupação atual."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+            }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# -----------------
+# BACKENDS PLUGÁVEIS (MEMÓRIA DO WORKER OU COMPARTILHADO ENTRE WORKERS)
+# -----------------
+class MemoryBackend:
+    """Backend no processo: um TTLCache por worker. Não é compartilhado entre workers do gunicorn."""
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._counters: Dict[str, int] = {}  # fora do LRU: um contador nunca é descartado
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self._cache.set(key, value, ttl)
+
+    def delete(self, key: str) -> None:
+        self._cache.delete(key)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            value = self._counters.get(key, 0) + 1
+            self._counters[key] = value
+            return value
+
+    def get_counter(self, key: str) -> int:
+        return self._counters.get(key, 0)
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """Grava apenas se a chave não existir (usado como trava simples)."""
+        with self._lock:
+            if self._cache.get(key) is not None:
+                return False
+            self._cache.set(key, value, ttl)
+            return True
+
+    def stats(self) -> Dict[str, int]:
+        return self._cache.stats()
+
+
+class RedisBackend:
+    """Backend compartilhado entre workers (Redis). Os valores são serializados em JSON."""
+    def __init__(self, url: str, ttl: float = 300.0, prefix: str = 'transporte:'):
+        import redis  # Dependência opcional: só é necessária quando CACHE_BACKEND=redis
+        self._client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Any:
+        raw = self._client.get(self.prefix + key)
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self._client.set(self.prefix + key, json.dumps(value, default=str), ex=int(self.ttl if ttl is None else ttl))
+
+    def delete(self, key: str) -> None:
+        self._client.delete(self.prefix + key)
+
+    def incr(self, key: str) -> int:
+        return int(self._client.incr(self.prefix + key))
+
+    def get_counter(self, key: str) -> int:
+        return int(self._client.get(self.prefix + key) or 0)
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        return bool(self._client.set(self.prefix + key, json.dumps(value, default=str),
+                                     ex=int(self.ttl if ttl is None else ttl), nx=True))
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+_backends: Dict[str, Any] = {}
+_backends_lock = threading.Lock()
+
+
+def is_shared_cache() -> bool:
+    """True se o cache é compartilhado entre processos (redis). Com 'memory', cada worker do
+    gunicorn (ou instância serverless) tem o seu, e uma invalidação só vale no próprio worker."""
+    return current_app.config.get('CACHE_BACKEND', 'memory') == 'redis'
+
+
+def get_cache_backend(namespace: str, ttl: Optional[float] = None):
+    """
+    Retorna o backend de cache do worker para um uso (ex: 'dashboard'), conforme Config.CACHE_BACKEND:
+    'memory' (LRU no processo, padrão) ou 'redis' (compartilhado, usa CACHE_REDIS_URL).
+    """
+    backend = _backends.get(namespace)
+    if backend is None:
+        with _backends_lock:
+            backend = _backends.get(namespace)
+            if backend is None:
+                config = current_app.config
+                ttl = ttl if ttl is not None else config.get('CACHE_DEFAULT_TTL', 300)
+                if config.get('CACHE_BACKEND', 'memory') == 'redis':
+                    backend = RedisBackend(config['CACHE_REDIS_URL'], ttl=ttl, prefix=f"transporte:{namespace}:")
+                else:
+                    backend = MemoryBackend(maxsize=config.get('CACHE_MAXSIZE', 1024), ttl=ttl)
+                _backends[namespace] = backend
+    return backend
@@ -0,0 +1,91 @@
+# logistica_app/app/utils/concurrency.py
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from flask import copy_current_request_context, current_app, g
+from flask_login import current_user
+
+from .data_access import get_request_loader
+
+# Pool de threads compartilhado pelo worker (limitado em Config.QUERY_POOL_MAX_WORKERS)
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+# Prazo (time.monotonic) da tarefa que roda na thread atual. O transporte HTTP
+# (utils/http_deadline.py) limita o timeout de cada chamada ao tempo que resta, então uma
+# tarefa que estourou o prazo em gather() não continua presa a uma thread do pool
+# esperando o SUPABASE_HTTP_TIMEOUT inteiro.
+_local = threading.local()
+
+
+def task_deadline() -> Optional[float]:
+    """Prazo da tarefa em execução na thread atual, ou None fora de gather()."""
+    return getattr(_local, 'deadline', None)
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Retorna o pool de threads do worker, criando-o na primeira chamada."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=current_app.config.get('QUERY_POOL_MAX_WORKERS', 8),
+                    thread_name_prefix='consulta',
+                )
+    return _executor
+
+
+def submit_in_request_context(fn: Callable, *args, deadline: Optional[float] = None, **kwargs) -> Future:
+    """
+    Executa `fn` no pool com uma cópia do contexto do request atual.
+    O usuário logado é repassado, então `current_user` funciona dentro da thread
+    sem recarregar o usuário pelo Flask-Login. O carregador do request (data_access)
+    também: as threads compartilham as consultas já feitas e a dimensão de veículos.
+
+    Com `deadline` (time.monotonic), a tarefa que sai da fila depois do prazo nem começa,
+    e as chamadas HTTP feitas por ela não passam do prazo.
+    """
+    user = current_user._get_current_object()
+    loader = get_request_loader() if user.is_authenticated else None
+
+    @copy_current_request_context
+    def run():
+        if deadline is not None and time.monotonic() >= deadline:
+            raise TimeoutError("Prazo esgotado antes de a consulta começar (pool ocupado).")
+        g._login_user = user
+        if loader is not None:
+            g._request_loader = loader
+        _local.deadline = deadline
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _local.deadline = None
+
+    return get_executor().submit(run)
+
+
+def gather(tasks: Dict[str, Callable[[], Any]], timeout: Optional[float] = None) -> Tuple[Dict[str, Any], Dict[str, Exception]]:
+    """
+    Executa as tarefas em paralelo e espera por todas (cada uma com até `timeout` segundos).
+    Retorna (resultados, erros): uma tarefa que falha ou estoura o tempo aparece só em `erros`.
+    """
+    if timeout is None:
+        timeout = current_app.config.get('QUERY_TIMEOUT', 5.0)
+
+    deadline = time.monotonic() + timeout
+    futures = {name: submit_in_request_context(fn, deadline=deadline) for name, fn in tasks.items()}
+
+    results: Dict[str, Any] = {}
+    errors: Dict[str, Exception] = {}
+    for name, future in futures.items():
+        try:
+            results[name] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            errors[name] = TimeoutError(f"A consulta '{name}' excedeu {timeout:.1f}s.")
+        except Exception as e:
+            errors[name] = e
+    return results, errors
@@ -0,0 +1,44 @@
+# logistica_app/app/utils/csv_utils.py
+
+import csv
+import io
+import math
+from typing import Dict, IO, Iterable, Iterator, Optional, Tuple
+
+
+def iter_csv_rows(stream: IO[bytes], required_columns: Iterable[str]) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """
+    Lê o CSV em streaming (linha a linha, sem carregar o arquivo inteiro).
+    Aceita ',' ou ';' como separador; com ';' os decimais usam vírgula (padrão brasileiro),
+    o que é indicado em `row['_decimal_comma']`. Produz (número da linha no arquivo, linha).
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    header = text.readline()
+    delimiter = ';' if header.count(';') > header.count(',') else ','
+    columns = [c.strip().lower() for c in next(csv.reader([header], delimiter=delimiter))]
+
+    missing = [c for c in required_columns if c not in columns]
+    if missing:
+        raise ValueError(f"Colunas obrigatórias ausentes no CSV: {', '.join(missing)}")
+
+    reader = csv.DictReader(text, fieldnames=columns, delimiter=delimiter)
+    for line_no, row in enumerate(reader, start=2):
+        row['_decimal_comma'] = delimiter == ';'
+        yield line_no, row
+
+
+def parse_decimal(value: Optional[str], decimal_comma: bool) -> float:
+    """Converte '1.234,56' (decimal com vírgula) ou '1234.56' para float.
+
+    Coluna ausente (linha curta: o DictReader preenche com None), vazia, 'nan' ou 'inf'
+    levantam ValueError, para que a linha seja rejeitada e não o arquivo inteiro.
+    """
+    value = (value or '').strip()
+    if not value:
+        raise ValueError("valor vazio")
+    if decimal_comma:
+        value = value.replace('.', '').replace(',', '.')
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(f"valor inválido '{value}'")
+    return number
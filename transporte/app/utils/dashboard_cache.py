@@ -0,0 +1,48 @@
+# logistica_app/app/utils/dashboard_cache.py
+
+from typing import Any, Dict, Optional
+
+from flask import current_app
+
+from .cache import get_cache_backend, is_shared_cache
+
+# Cache do resultado do dashboard por empresa. É invalidado pelas rotas que escrevem
+# abastecimentos, manutenções e veículos; o TTL (DASHBOARD_CACHE_TTL) é só uma rede de segurança.
+# A invalidação só alcança os outros workers com CACHE_BACKEND=redis. Com o cache em memória
+# (padrão), os demais workers continuam servindo o dashboard anterior até o TTL vencer, então
+# vale o TTL curto DASHBOARD_CACHE_LOCAL_TTL: essa é a defasagem máxima depois de uma escrita.
+
+
+def _backend():
+    config = current_app.config
+    ttl = config.get('DASHBOARD_CACHE_TTL', 300) if is_shared_cache() else config.get('DASHBOARD_CACHE_LOCAL_TTL', 15)
+    return get_cache_backend('dashboard', ttl=ttl)
+
+
+def _key(id_empresa) -> str:
+    return f"empresa:{id_empresa}"
+
+
+def get_dashboard(id_empresa) -> Optional[Dict[str, Any]]:
+    """Retorna os dados do dashboard em cache para a empresa, ou None."""
+    try:
+        return _backend().get(_key(id_empresa))
+    except Exception as e:
+        print(f"Erro ao ler cache do dashboard: {e}")
+        return None
+
+
+def set_dashboard(id_empresa, data: Dict[str, Any]) -> None:
+    """Armazena os dados já mesclados do dashboard (veiculos_data, totais e alertas)."""
+    try:
+        _backend().set(_key(id_empresa), data)
+    except Exception as e:
+        print(f"Erro ao gravar cache do dashboard: {e}")
+
+
+def invalidate_dashboard(id_empresa) -> None:
+    """Descarta o dashboard da empresa. Chamar após qualquer escrita que altere custos, veículos ou alertas."""
+    try:
+        _backend().delete(_key(id_empresa))
+    except Exception as e:
+        print(f"Erro ao invalidar cache do dashboard: {e}")
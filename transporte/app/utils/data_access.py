@@ -1,9 +1,15 @@
 # logistica_app/app/utils/data_access.py (Novo Arquivo)
 
 from ..database import get_supabase_client
+from .cache import get_cache_backend
+from .odometer import get_odometer_index
+from flask import current_app, g, has_request_context, request
 from flask_login import current_user # Acesso ao usuário logado
+from concurrent.futures import Future
 from typing import List, Dict, Any
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Callable, Hashable, Iterable, Iterator, Optional
+from datetime import date
+import threading
 
 # Esta função DEVE ser chamada APÓS o login
 def get_safe_supabase_client():
@@ -16,6 +22,155 @@ def get_safe_supabase_client():
     return get_supabase_client()
 
 
+# -----------------
+# PAGINAÇÃO EM STREAMING
+# -----------------
+# O PostgREST corta respostas grandes no limite `max-rows` (1000 por padrão) sem avisar.
+# Estes geradores buscam página a página e entregam linha a linha, então o consumidor
+# agrega em memória constante e os totais continuam corretos acima de 1000 linhas.
+# O tamanho de página (ANALYTICS_PAGE_SIZE) não deve passar do `max-rows` do servidor.
+
+def _page_size(page_size: Optional[int]) -> int:
+    return page_size or current_app.config.get('ANALYTICS_PAGE_SIZE', 1000)
+
+
+def iter_rows_by_range(build_query: Callable[[], Any], page_size: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Pagina com `.range()` (offset). `build_query` deve devolver uma consulta nova a cada
+    chamada, já com filtros e uma ordenação determinística (ex: terminar em 'id').
+    """
+    size = _page_size(page_size)
+    start = 0
+    while True:
+        rows = build_query().range(start, start + size - 1).execute().data
+        yield from rows
+        if len(rows) < size:
+            return
+        start += size
+
+
+def iter_rows_by_key(build_query: Callable[[], Any], key: str = 'id', page_size: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Pagina por chave (keyset): cada página pede `key > último valor visto`, ordenado por `key`.
+    Não degrada com o offset como `.range()`; `key` deve ser único e estar no select.
+    """
+    size = _page_size(page_size)
+    last = None
+    while True:
+        query = build_query()
+        if last is not None:
+            query = query.gt(key, last)
+        rows = query.order(key).limit(size).execute().data
+        yield from rows
+        if len(rows) < size:
+            return
+        last = rows[-1][key]
+
+
+# -----------------
+# CARREGADOR POR REQUEST (ESTILO DATALOADER)
+# -----------------
+# Dentro de um request, várias partes pedem os mesmos dados: as opções do formulário e a
+# validação de KM leem `Veiculo`, e os resumos do dashboard trazem a placa embutida. O
+# carregador vive em `g` e só dura o request:
+# - consultas idênticas (mesma chave) rodam uma vez, mesmo se pedidas por threads em paralelo;
+# - a dimensão de veículos (VEHICLE_DIMENSION_COLUMNS) é compartilhada: o que uma consulta
+#   já trouxe (inclusive embutido, via prime_vehicles) não é buscado de novo;
+# - buscas por veículo são agrupadas: os ids que faltam vão em uma única consulta `in_`.
+# As threads de concurrency.submit_in_request_context recebem o mesmo carregador.
+
+VEHICLE_DIMENSION_COLUMNS = 'id, placa, modelo, km_atual'
+VEHICLE_DIMENSION_EMBED = f"Veiculo({VEHICLE_DIMENSION_COLUMNS})"
+
+
+class RequestLoader:
+    """Memoização e agrupamento das consultas da empresa logada durante um request."""
+    def __init__(self, id_empresa):
+        self.id_empresa = id_empresa
+        self._lock = threading.Lock()
+        self._results: Dict[Hashable, Future] = {}
+        self._vehicles: Dict[int, Dict[str, Any]] = {}
+        self._all_vehicles = False
+
+    def load(self, key: Hashable, fetch: Callable[[], Any]) -> Any:
+        """Resultado de `fetch()` para `key`, executado uma vez por request. Quem pede a mesma
+        chave enquanto a consulta está em andamento espera por ela; falhas não ficam memorizadas."""
+        with self._lock:
+            future = self._results.get(key)
+            owner = future is None
+            if owner:
+                future = self._results[key] = Future()
+        if not owner:
+            return future.result()
+
+        try:
+            result = fetch()
+        except BaseException as e:
+            with self._lock:
+                self._results.pop(key, None)
+            future.set_exception(e)
+            raise
+        future.set_result(result)
+        return result
+
+    def prime_vehicles(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """Guarda linhas da dimensão de veículos trazidas por outra consulta (ex: embutidas)."""
+        with self._lock:
+            for row in rows:
+                if row and row.get('id') is not None:
+                    self._vehicles.setdefault(int(row['id']), row)
+
+    def vehicles(self) -> Dict[int, Dict[str, Any]]:
+        """Todos os veículos da empresa ({id: linha}), em uma leitura paginada por request."""
+        def fetch():
+            supabase = get_safe_supabase_client()
+            rows = list(iter_rows_by_key(
+                lambda: supabase.table('Veiculo').select(VEHICLE_DIMENSION_COLUMNS).eq('id_empresa', self.id_empresa)
+            ))
+            with self._lock:
+                self._vehicles.update((int(row['id']), row) for row in rows)
+                self._all_vehicles = True
+            return True
+
+        self.load(('Veiculo', 'dimensao'), fetch)
+        with self._lock:
+            return dict(self._vehicles)
+
+    def vehicles_by_id(self, vehicle_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """Veículos pedidos ({id: linha}); os que ainda não foram vistos vêm em uma só consulta `in_`."""
+        ids = {int(v) for v in vehicle_ids}
+        with self._lock:
+            missing = [] if self._all_vehicles else sorted(ids - self._vehicles.keys())
+
+        if missing:
+            supabase = get_safe_supabase_client()
+            rows = self.load(('Veiculo', 'in', tuple(missing)), lambda: supabase.table('Veiculo').select(
+                VEHICLE_DIMENSION_COLUMNS).eq('id_empresa', self.id_empresa).in_('id', missing).execute().data)
+            self.prime_vehicles(rows)
+
+        with self._lock:
+            return {vehicle_id: self._vehicles[vehicle_id] for vehicle_id in ids if vehicle_id in self._vehicles}
+
+    def forget_vehicles(self) -> None:
+        """Descarta a dimensão de veículos (chamar se o request alterar veículos e ler de novo)."""
+        with self._lock:
+            self._vehicles.clear()
+            self._all_vehicles = False
+            for key in [key for key in self._results if isinstance(key, tuple) and key[0] == 'Veiculo']:
+                del self._results[key]
+
+
+def get_request_loader() -> Optional[RequestLoader]:
+    """Carregador do request atual (criado no primeiro uso). Fora de um request (agendador,
+    comandos CLI) devolve None: não há um fim de request para descartar os dados."""
+    if not has_request_context():
+        return None
+    loader = g.get('_request_loader')
+    if loader is None or loader.id_empresa != current_user.id_empresa:
+        loader = g._request_loader = RequestLoader(current_user.id_empresa)
+    return loader
+
+
 def get_veiculos_por_empresa() -> List[Dict[str, Any]]:
     """Busca todos os veículos APENAS da empresa logada."""
     supabase = get_safe_supabase_client()
@@ -46,43 +201,231 @@ def add_abastecimento(dados_abastecimento: Dict[str, Any]) -> bool:
         print(f"Erro ao inserir abastecimento: {e}")
         return False
     
+# -----------------
+# LISTAGEM PAGINADA DA FROTA
+# -----------------
+# Paginação por chave composta (coluna de ordenação, id): cada página pede as linhas
+# depois da última exibida, então o custo de uma página não cresce com a posição na lista.
+
+VEHICLE_LIST_COLUMNS = 'id, placa, marca, modelo, ano, tipo_combustivel, km_atual'
+VEHICLE_SORT_COLUMNS = ('placa', 'marca', 'modelo', 'ano', 'km_atual')
+
+
+def _postgrest_value(value: Any) -> str:
+    """Valor entre aspas para filtros `or=(...)` do PostgREST (vírgulas e parênteses no texto)."""
+    return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def list_vehicles_page(filters: Optional[Dict[str, Any]] = None, sort: str = 'placa', desc: bool = False,
+                       after: Optional[Tuple[Any, int]] = None,
+                       page_size: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Optional[Tuple[Any, int]]]:
+    """
+    Uma página de veículos da empresa logada, com filtros aplicados no banco.
+
+    `filters` aceita tipo_combustivel (igual), marca/modelo (contém, sem diferenciar maiúsculas)
+    e ano_min/ano_max. `after` é o cursor (valor da coluna de ordenação, id) da última linha da
+    página anterior; o valor pode ser None (coluna vazia). Retorna (linhas, cursor da próxima
+    página ou None se for a última).
+    """
+    supabase = get_safe_supabase_client()
+    filters = filters or {}
+    sort = sort if sort in VEHICLE_SORT_COLUMNS else 'placa'
+    size = page_size or current_app.config.get('VEHICLE_LIST_PAGE_SIZE', 50)
+
+    query = supabase.table('Veiculo').select(VEHICLE_LIST_COLUMNS).eq('id_empresa', current_user.id_empresa)
+
+    if filters.get('tipo_combustivel'):
+        query = query.eq('tipo_combustivel', filters['tipo_combustivel'])
+    for column in ('marca', 'modelo'):
+        if filters.get(column):
+            query = query.ilike(column, f"%{filters[column]}%")
+    if filters.get('ano_min') is not None:
+        query = query.gte('ano', filters['ano_min'])
+    if filters.get('ano_max') is not None:
+        query = query.lte('ano', filters['ano_max'])
+
+    # Ordem padrão do Postgres (a mesma dos índices de sql/004 e 006): NULLs no fim em ordem
+    # crescente e no começo em decrescente. O cursor com valor None continua dentro do bloco
+    # de NULLs (por id) e, na ordem decrescente, passa depois aos valores preenchidos.
+    if after is not None:
+        op = 'lt' if desc else 'gt'
+        value, last_id = after
+        if value is None:
+            condition = f"and({sort}.is.null,id.{op}.{int(last_id)})"
+            if desc:
+                condition += f",{sort}.not.is.null"
+        else:
+            condition = (f"{sort}.{op}.{_postgrest_value(value)},"
+                         f"and({sort}.eq.{_postgrest_value(value)},id.{op}.{int(last_id)})")
+            if not desc:
+                condition += f",{sort}.is.null"
+        query = query.or_(condition)
+
+    # Uma linha a mais indica se existe próxima página sem precisar de count
+    rows = query.order(sort, desc=desc).order('id', desc=desc).limit(size + 1).execute().data
+
+    next_cursor = None
+    if len(rows) > size:
+        rows = rows[:size]
+        next_cursor = (rows[-1][sort], rows[-1]['id'])
+    return rows, next_cursor
+
+
+# -----------------
+# CACHE DAS OPÇÕES DE VEÍCULO (SelectField)
+# -----------------
+# A chave do cache inclui uma versão por empresa. Cadastrar um veículo incrementa a versão,
+# então as opções antigas deixam de ser lidas (e expiram pelo LRU/TTL) sem precisar apagá-las.
+# Com o cache em memória a versão só muda no worker que cadastrou; nos outros, um POST com um
+# veículo que não está na lista em cache relê a lista (ver get_vehicles_for_select).
+
+def _vehicle_choices_backend():
+    return get_cache_backend('veiculos', ttl=current_app.config.get('VEHICLE_CHOICES_CACHE_TTL', 600))
+
+
+def invalidate_vehicle_choices(id_empresa) -> None:
+    """Invalida as opções de veículo da empresa. Chamar após inserir/alterar veículos."""
+    try:
+        _vehicle_choices_backend().incr(f"versao:{id_empresa}")
+    except Exception as e:
+        print(f"Erro ao invalidar opções de veículo: {e}")
+
+
+def vehicle_choice_id(value: Any) -> Optional[int]:
+    """`coerce` dos SelectField preenchidos por get_vehicles_for_select: a opção vazia
+    ('Selecione o Veículo...') vira None em vez de quebrar o int() (o WTForms 3 aplica o
+    coerce a todas as opções ao validar)."""
+    if value in ('', None):
+        return None
+    return int(value)
+
+
 def get_vehicles_for_select() -> List[Tuple[str, str]]:
     """Busca veículos da empresa logada no formato (id, placa - modelo) para SelectField."""
-    supabase = get_safe_supabase_client()
     id_empresa = current_user.id_empresa
+    backend = _vehicle_choices_backend()
+
+    try:
+        key = f"opcoes:{id_empresa}:v{backend.get_counter(f'versao:{id_empresa}')}"
+        cached = backend.get(key)
+        # Um veículo enviado no formulário que não está na lista em cache pode ter sido cadastrado
+        # em outro worker (com CACHE_BACKEND=memory a versão não é compartilhada): relê do banco em
+        # vez de recusar a opção como inválida.
+        submitted = request.values.get('id_veiculo') if has_request_context() else None
+        if cached is not None and (not submitted or any(choice[0] == submitted for choice in cached)):
+            return [tuple(choice) for choice in cached]
+    except Exception as e:
+        key = None
+        print(f"Erro ao ler cache de veículos para o formulário: {e}")
+
     choices = [('', 'Selecione o Veículo...')]
 
     try:
-        response = supabase.table('Veiculo').select('id, placa, modelo').eq('id_empresa', id_empresa).execute()
+        # A dimensão de veículos do request: a validação de KM do mesmo POST não consulta de novo
+        vehicles = get_request_loader().vehicles()
         
         # Cria tuplas (valor, label)
-        for v in response.data:
+        for vehicle_id in sorted(vehicles):
+            v = vehicles[vehicle_id]
             choices.append((str(v['id']), f"{v['placa']} - {v['modelo']}"))
             
     except Exception as e:
         print(f"Erro ao buscar veículos para o formulário: {e}")
-        
+        # Não guarda no cache uma lista incompleta
+        return choices
+
+    if key is not None:
+        backend.set(key, choices)
     return choices
 
 def get_last_km(vehicle_id: int) -> int:
-    """Busca a última KM registrada para um veículo específico."""
-    supabase = get_safe_supabase_client()
+    """
+    Busca a última KM registrada para um veículo específico.
+    Responde pelo índice de odômetro do worker; em caso de ausência, lê `Veiculo.km_atual`
+    (que as rotas de abastecimento mantêm igual ao último KM registrado) em uma única consulta.
+    """
+    return get_last_km_many([vehicle_id]).get(int(vehicle_id), 0)
+
+
+def get_last_km_many(vehicle_ids: List[int]) -> Dict[int, int]:
+    """Última KM de vários veículos: o que faltar no índice é buscado em uma só consulta (`in_`)."""
     id_empresa = current_user.id_empresa
-    
-    # Tenta buscar o último KM de Abastecimento (prioridade)
-    try:
-        response = supabase.table('Abastecimento').select('km_registro').eq('id_empresa', id_empresa).eq('id_veiculo', vehicle_id).order('data_abastecimento', desc=True).limit(1).execute()
-        if response.data:
-            return response.data[0]['km_registro']
-    except Exception as e:
-        print(f"Erro ao buscar último KM de abastecimento: {e}")
-        
-    # Se falhar, busca o KM atual na tabela Veiculo
+    index = get_odometer_index()
+
+    result: Dict[int, int] = {}
+    missing = []
+    for vehicle_id in vehicle_ids:
+        km = index.get(id_empresa, vehicle_id)
+        if km is None:
+            missing.append(int(vehicle_id))
+        else:
+            result[int(vehicle_id)] = km
+
+    if missing:
+        try:
+            # Veículos já carregados no request não são consultados; os demais vêm em um só `in_`
+            for vehicle_id, vehicle in get_request_loader().vehicles_by_id(missing).items():
+                index.advance(id_empresa, vehicle_id, vehicle['km_atual'] or 0)
+                result[vehicle_id] = index.get(id_empresa, vehicle_id)
+        except Exception as e:
+            print(f"Erro ao buscar KM do veículo: {e}")
+
+    return result
+
+
+# -----------------
+# RESUMO DE MANUTENÇÃO (AGREGADO NO BANCO)
+# -----------------
+def get_maintenance_costs_by_vehicle(data_inicio: Optional[date] = None,
+                                     data_fim: Optional[date] = None) -> List[Dict[str, Any]]:
+    """
+    Custo e número de manutenções realizadas por veículo da empresa logada, agrupados no
+    banco (função `resumo_manutencao_por_veiculo`, ver sql/003). O intervalo de datas é
+    opcional e inclusivo. Retorna uma linha por veículo:
+    {id_veiculo, placa, custo_total, num_manutencoes}.
+    """
+    supabase = get_safe_supabase_client()
+    params = {
+        "p_id_empresa": current_user.id_empresa,
+        "p_data_inicio": data_inicio.isoformat() if data_inicio else None,
+        "p_data_fim": data_fim.isoformat() if data_fim else None,
+    }
+
+    # Mesmo período pedido duas vezes no request: uma chamada só
+    return get_request_loader().load(
+        ('resumo_manutencao_por_veiculo', params['p_data_inicio'], params['p_data_fim']),
+        lambda: list(iter_rows_by_key(
+            lambda: supabase.rpc('resumo_manutencao_por_veiculo', params),
+            key='id_veiculo',
+        )),
+    )
+
+
+# -----------------
+# REGISTROS RECENTES (LISTAGENS COM NOTA FISCAL)
+# -----------------
+RECENT_RECORD_COLUMNS = {
+    'Abastecimento': 'id, data_abastecimento, litros, valor_litro, km_registro, local_abastecimento',
+    'Manutencao_Realizada': 'id, data_realizacao, descricao_servico, custo_total, oficina_responsavel',
+}
+
+
+def get_recent_records(table: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Últimos registros da empresa logada em `table` (do mais novo para o mais antigo), com a
+    placa e os caminhos da nota fiscal e da miniatura (servidos por /storage/<caminho>).
+    """
+    limit = limit or current_app.config.get('RECENT_RECORDS_LIMIT', 20)
+    supabase = get_safe_supabase_client()
     try:
-        response = supabase.table('Veiculo').select('km_atual').eq('id_empresa', id_empresa).eq('id', vehicle_id).limit(1).execute()
-        if response.data:
-            return response.data[0]['km_atual']
+        response = supabase.table(table).select(
+            f"{RECENT_RECORD_COLUMNS[table]}, url_nota_fiscal, url_nota_fiscal_miniatura, Veiculo(placa)"
+        ).eq('id_empresa', current_user.id_empresa).order('id', desc=True).limit(limit).execute()
     except Exception as e:
-        print(f"Erro ao buscar KM do veículo: {e}")
-        
-    return 0
\ No newline at end of file
+        print(f"Erro ao buscar registros recentes de {table}: {e}")
+        return []
+
+    rows = response.data or []
+    for row in rows:
+        row['placa'] = (row.pop('Veiculo', None) or {}).get('placa')
+    return rows
@@ -1,133 +1,82 @@
 # logistica_app/app/utils/data_analysis.py (Novo Arquivo)
 
 from ..database import get_safe_supabase_client
+from .fueling_aggregates import read_fueling_summary
+from .data_access import iter_rows_by_key, get_maintenance_costs_by_vehicle, get_request_loader
 from flask_login import current_user
-from typing import List, Dict, Any, Union
+from typing import List, Dict, Any, Optional, Union
+from datetime import date
 
 def get_fueling_costs_summary() -> Dict[str, Any]:
     """
     Calcula o custo total de abastecimento por veículo e na frota.
     Retorna também a média de Km/L por veículo.
+
+    Lê os agregados mantidos a cada abastecimento (ver utils/fueling_aggregates.py),
+    então o custo é proporcional ao número de veículos, não ao tamanho do histórico.
     """
     supabase = get_safe_supabase_client()
     id_empresa = current_user.id_empresa
-    
-    # 1. Obter todos os abastecimentos e veículos da empresa
-    # O Supabase permite fazer JOINs simples com a sintaxe 'select(*, tabela_externa(*))'
+
     try:
-        # Busca Abastecimentos e dados do Veículo relacionados
-        response = supabase.table('Abastecimento').select(
-            'litros, valor_litro, km_registro, id_veiculo, Veiculo(placa, km_atual)'
-        ).eq('id_empresa', id_empresa).order('id_veiculo', desc=False).order('km_registro', desc=False).execute()
-        
-        fueling_data = response.data
+        return read_fueling_summary(supabase, id_empresa)
     except Exception as e:
         print(f"Erro ao buscar dados de abastecimento: {e}")
         return {"total_frota": 0.00, "veiculos": {}}
 
-    # 2. Processamento e Agregação em Python (Melhor que SQL para cálculos complexos)
-    
-    veiculos_summary: Dict[str, Dict[str, Union[float, int, List[Dict]]]] = {}
+def get_maintenance_costs_summary(data_inicio: Optional[date] = None,
+                                  data_fim: Optional[date] = None) -> Dict[str, Any]:
+    """
+    Calcula o custo total de manutenção por veículo e na frota.
+
+    A soma por veículo é feita no banco (ver data_access.get_maintenance_costs_by_vehicle),
+    que devolve uma linha por veículo em vez de cada manutenção realizada.
+    `data_inicio`/`data_fim` limitam o período (opcional, inclusivo).
+    """
+    veiculos_summary: Dict[str, Dict[str, Any]] = {}
     custo_total_frota = 0.0
-    
-    for item in fueling_data:
-        # Key: ID do Veículo
-        vehicle_id = str(item['id_veiculo'])
-        
-        if vehicle_id not in veiculos_summary:
-            # Inicializa a estrutura do veículo
-            veiculos_summary[vehicle_id] = {
-                "placa": item['Veiculo']['placa'],
-                "custo_total": 0.0,
-                "total_litros": 0.0,
-                "consumo_km_l": [], # Para armazenar os Km/L e calcular a média
-                "registros": []     # Para guardar a ordem e KM
+
+    try:
+        for item in get_maintenance_costs_by_vehicle(data_inicio, data_fim):
+            custo = float(item['custo_total'])
+            veiculos_summary[str(item['id_veiculo'])] = {
+                "placa": item['placa'],
+                "custo_total": custo,
+                "num_manutencoes": item['num_manutencoes']
             }
-        
-        # Custo do abastecimento atual
-        custo_abastecimento = float(item['litros'] * item['valor_litro'])
-        
-        # Acumula totais
-        veiculos_summary[vehicle_id]['custo_total'] += custo_abastecimento
-        veiculos_summary[vehicle_id]['total_litros'] += float(item['litros'])
-        custo_total_frota += custo_abastecimento
-        
-        # Armazena registro para cálculo de Km/L posterior (em ordem reversa para processamento)
-        veiculos_summary[vehicle_id]['registros'].insert(0, {
-            'km': item['km_registro'],
-            'litros': float(item['litros'])
-        })
+            custo_total_frota += custo
+    except Exception as e:
+        print(f"Erro ao buscar dados de manutenção: {e}")
+        return {"total_frota": 0.00, "veiculos": {}}
 
-    # 3. Cálculo de Consumo (Km/L)
-    for vehicle_id, summary in veiculos_summary.items():
-        registros = summary['registros']
-        km_l_list = []
-        
-        # Itera sobre os registros, exceto o primeiro (que não tem anterior)
-        for i in range(1, len(registros)):
-            current = registros[i]
-            previous = registros[i-1]
-            
-            # Condição para cálculo de Km/L (Deve ser tanque cheio no registro anterior)
-            # Como não salvamos a informação de 'tanque cheio' no BD, assumiremos para este cálculo
-            # que a diferença entre KMs representa a distância percorrida no último abastecimento.
-            
-            distancia = current['km'] - previous['km']
-            litros = current['litros']
-            
-            if distancia > 0 and litros > 0:
-                km_l = round(distancia / litros, 2)
-                km_l_list.append(km_l)
-                
-        # Calcula a média de Km/L
-        summary['media_km_l'] = round(sum(km_l_list) / len(km_l_list), 2) if km_l_list else 0.0
-        
-        # Remove registros internos
-        del summary['registros']
-        del summary['consumo_km_l']
-        
     return {
         "total_frota": round(custo_total_frota, 2),
         "veiculos": veiculos_summary
     }
 
-def get_maintenance_costs_summary() -> Dict[str, Any]:
+def get_fueling_statistics() -> Dict[str, Any]:
     """
-    Calcula o custo total de manutenção por veículo e na frota.
+    Estatísticas detalhadas de consumo por veículo (média, mediana, p10/p90 de Km/L,
+    distância total e custo por km), calculadas pelo motor vetorizado sobre o histórico.
     """
+    from .fuel_stats import compute_fleet_stats, load_columns  # NumPy só quando a página é pedida
+
     supabase = get_safe_supabase_client()
     id_empresa = current_user.id_empresa
-    
+
     try:
-        # Busca todas as manutenções realizadas e seus custos
-        response = supabase.table('Manutencao_Realizada').select(
-            'custo_total, id_veiculo, Veiculo(placa)'
-        ).eq('id_empresa', id_empresa).execute()
-        
-        maintenance_data = response.data
+        rows = iter_rows_by_key(
+            lambda: supabase.table('Abastecimento').select(
+                'id, id_veiculo, km_registro, litros, valor_litro'
+            ).eq('id_empresa', id_empresa)
+        )
+        stats = compute_fleet_stats(load_columns(rows))
+        # Placas em uma só consulta (ou nenhuma, se o request já carregou a frota)
+        vehicles = get_request_loader().vehicles_by_id(stats) if stats else {}
     except Exception as e:
-        print(f"Erro ao buscar dados de manutenção: {e}")
-        return {"total_frota": 0.00, "veiculos": {}}
+        print(f"Erro ao calcular estatísticas de abastecimento: {e}")
+        return {}
 
-    veiculos_summary: Dict[str, Dict[str, float]] = {}
-    custo_total_frota = 0.0
-    
-    for item in maintenance_data:
-        vehicle_id = str(item['id_veiculo'])
-        custo = float(item['custo_total'])
-        
-        if vehicle_id not in veiculos_summary:
-            veiculos_summary[vehicle_id] = {
-                "placa": item['Veiculo']['placa'],
-                "custo_total": 0.0,
-                "num_manutencoes": 0
-            }
-        
-        veiculos_summary[vehicle_id]['custo_total'] += custo
-        veiculos_summary[vehicle_id]['num_manutencoes'] += 1
-        custo_total_frota += custo
-        
-    return {
-        "total_frota": round(custo_total_frota, 2),
-        "veiculos": veiculos_summary
-    }
\ No newline at end of file
+    for vehicle_id, item in stats.items():
+        item['placa'] = vehicles.get(vehicle_id, {}).get('placa', f"Veículo {vehicle_id}")
+    return {str(vehicle_id): item for vehicle_id, item in stats.items()}
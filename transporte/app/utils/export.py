@@ -0,0 +1,165 @@
+# logistica_app/app/utils/export.py
+
+import csv
+import io
+import os
+import tempfile
+from datetime import date, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+
+from .data_access import iter_rows_by_key
+
+# Exportação do histórico completo (abastecimentos e manutenções) em CSV ou XLSX.
+# As linhas são lidas página a página (keyset em id) e escritas em blocos, então a
+# memória usada não depende do tamanho do histórico. O CSV sai em streaming já a partir
+# da primeira página. O XLSX não sai em streaming: o arquivo (formato zip) é montado
+# inteiro em disco antes do primeiro byte, então fica limitado a EXPORT_XLSX_MAX_ROWS
+# linhas (contadas antes de começar) para não estourar o timeout do worker ou do proxy.
+#
+# Textos digitados pelos usuários (local, descrição, oficina) que começam com = + - @
+# seriam lidos como fórmula pelo Excel: saem com um apóstrofo na frente (_safe_cell).
+
+EXPORTS: Dict[str, Dict[str, Any]] = {
+    'abastecimento': {
+        'table': 'Abastecimento',
+        'date_column': 'data_abastecimento',
+        'date_is_timestamp': True,
+        'columns': ['id', 'data_abastecimento', 'id_veiculo', 'litros', 'valor_litro',
+                    'km_registro', 'local_abastecimento', 'id_usuario_registro', 'url_nota_fiscal', 'url_nota_fiscal_miniatura'],
+    },
+    'manutencao': {
+        'table': 'Manutencao_Realizada',
+        'date_column': 'data_realizacao',
+        'date_is_timestamp': False,
+        'columns': ['id', 'data_realizacao', 'id_veiculo', 'descricao_servico', 'custo_total',
+                    'oficina_responsavel', 'id_manutencao_preditiva', 'id_usuario_registro', 'url_nota_fiscal', 'url_nota_fiscal_miniatura'],
+    },
+}
+
+CSV_FLUSH_ROWS = 1000      # linhas acumuladas antes de enviar um bloco do CSV
+FILE_CHUNK_SIZE = 64 * 1024
+XLSX_MAX_ROWS = 1_048_575  # limite de linhas de uma planilha do Excel (sem o cabeçalho)
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def export_columns(kind: str) -> List[str]:
+    """Colunas do arquivo exportado: as da tabela, com a placa logo após o id do veículo."""
+    columns = list(EXPORTS[kind]['columns'])
+    columns.insert(columns.index('id_veiculo') + 1, 'placa')
+    return columns
+
+
+def _filtered_query(supabase, id_empresa, kind: str, select: str, data_inicio: Optional[date],
+                    data_fim: Optional[date], id_veiculo: Optional[int], count: Optional[str] = None):
+    spec = EXPORTS[kind]
+    date_column = spec['date_column']
+    query = supabase.table(spec['table']).select(select, count=count).eq('id_empresa', id_empresa)
+    if data_inicio:
+        query = query.gte(date_column, data_inicio.isoformat())
+    if data_fim:
+        # Período inclusivo: para timestamps, tudo antes do dia seguinte
+        if spec['date_is_timestamp']:
+            query = query.lt(date_column, (data_fim + timedelta(days=1)).isoformat())
+        else:
+            query = query.lte(date_column, data_fim.isoformat())
+    if id_veiculo:
+        query = query.eq('id_veiculo', id_veiculo)
+    return query
+
+
+def count_export_rows(supabase, id_empresa, kind: str, data_inicio: Optional[date] = None,
+                      data_fim: Optional[date] = None, id_veiculo: Optional[int] = None) -> int:
+    """Quantas linhas a exportação teria (uma consulta com count, sem trazer as linhas)."""
+    response = _filtered_query(supabase, id_empresa, kind, 'id', data_inicio, data_fim, id_veiculo,
+                               count='exact').limit(1).execute()
+    return response.count or 0
+
+
+def iter_export_rows(supabase, id_empresa, kind: str, data_inicio: Optional[date] = None,
+                     data_fim: Optional[date] = None, id_veiculo: Optional[int] = None,
+                     page_size: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Linhas do histórico da empresa (com a placa do veículo), filtradas por período e veículo."""
+    select = ', '.join(EXPORTS[kind]['columns']) + ', Veiculo(placa)'
+
+    def build_query():
+        return _filtered_query(supabase, id_empresa, kind, select, data_inicio, data_fim, id_veiculo)
+
+    for row in iter_rows_by_key(build_query, page_size=page_size):
+        veiculo = row.pop('Veiculo', None) or {}
+        row['placa'] = veiculo.get('placa')
+        yield row
+
+
+def _safe_cell(value: Any) -> Any:
+    """Texto que o Excel leria como fórmula (=, +, -, @...) ganha um apóstrofo na frente."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def stream_csv(rows: Iterator[Dict[str, Any]], columns: List[str]) -> Iterator[bytes]:
+    """CSV em blocos de CSV_FLUSH_ROWS linhas (UTF-8 com BOM, para abrir direto no Excel)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield '\ufeff'.encode('utf-8') + buffer.getvalue().encode('utf-8')
+    buffer.seek(0)
+    buffer.truncate()
+
+    pending = 0
+    for row in rows:
+        writer.writerow(['' if row.get(column) is None else _safe_cell(row.get(column)) for column in columns])
+        pending += 1
+        if pending >= CSV_FLUSH_ROWS:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+
+    if pending:
+        yield buffer.getvalue().encode('utf-8')
+
+
+def stream_xlsx(rows: Iterator[Dict[str, Any]], columns: List[str], title: str) -> Iterator[bytes]:
+    """
+    XLSX em modo write-only do openpyxl (linhas vão para disco, não para a memória).
+    Passando do limite de linhas do Excel, continua em uma nova planilha.
+    Não é streaming: nada é enviado antes de o arquivo inteiro ser salvo (ver EXPORT_XLSX_MAX_ROWS).
+    """
+    from openpyxl import Workbook  # Dependência opcional: só é necessária para exportar em XLSX
+
+    workbook = Workbook(write_only=True)
+    sheet_number = 1
+    sheet = workbook.create_sheet(title)
+    sheet.append(columns)
+    written = 0
+
+    for row in rows:
+        if written >= XLSX_MAX_ROWS:
+            sheet_number += 1
+            sheet = workbook.create_sheet(f"{title} ({sheet_number})")
+            sheet.append(columns)
+            written = 0
+        sheet.append([_safe_cell(row.get(column)) for column in columns])
+        written += 1
+
+    fd, path = tempfile.mkstemp(suffix='.xlsx')
+    os.close(fd)
+    try:
+        workbook.save(path)
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(FILE_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        os.remove(path)
+
+
+def xlsx_available() -> bool:
+    try:
+        import openpyxl  # noqa: F401
+        return True
+    except ImportError:
+        return False
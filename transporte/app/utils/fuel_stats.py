@@ -0,0 +1,128 @@
+# logistica_app/app/utils/fuel_stats.py
+
+from array import array
+from typing import Any, Dict, Iterable, Tuple
+
+import numpy as np
+
+# Percentis de Km/L expostos além da média
+PERCENTIS = {"p10_km_l": 0.10, "mediana_km_l": 0.50, "p90_km_l": 0.90}
+
+
+class FuelColumns:
+    """
+    Colunas de abastecimento em arrays NumPy (um elemento por registro).
+    A ordem das linhas não importa: o motor ordena por veículo e KM.
+    """
+    def __init__(self, id_veiculo: np.ndarray, km: np.ndarray, litros: np.ndarray, valor_litro: np.ndarray,
+                 empresa_por_veiculo: Dict[int, Any] = None):
+        self.id_veiculo = id_veiculo
+        self.km = km
+        self.litros = litros
+        self.valor_litro = valor_litro
+        self.empresa_por_veiculo = empresa_por_veiculo or {}
+
+    def __len__(self) -> int:
+        return len(self.id_veiculo)
+
+
+def load_columns(rows: Iterable[Dict[str, Any]]) -> FuelColumns:
+    """
+    Converte linhas de Abastecimento (dicts, possivelmente em streaming) para colunas.
+    Cada linha vira alguns bytes em arrays compactos; nenhum dict é mantido.
+    """
+    ids, kms = array('q'), array('q')
+    litros, valores = array('d'), array('d')
+    empresa_por_veiculo: Dict[int, Any] = {}
+
+    for item in rows:
+        vehicle_id = item['id_veiculo']
+        ids.append(vehicle_id)
+        kms.append(item['km_registro'])
+        litros.append(float(item['litros']))
+        valores.append(float(item['valor_litro']))
+        if 'id_empresa' in item and vehicle_id not in empresa_por_veiculo:
+            empresa_por_veiculo[vehicle_id] = item['id_empresa']
+
+    return FuelColumns(
+        np.frombuffer(ids, dtype=np.int64),
+        np.frombuffer(kms, dtype=np.int64),
+        np.frombuffer(litros, dtype=np.float64),
+        np.frombuffer(valores, dtype=np.float64),
+        empresa_por_veiculo,
+    )
+
+
+def _group_percentiles(values: np.ndarray, groups: np.ndarray, n_groups: int) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """Percentis por grupo (interpolação linear, como np.percentile) sem laço por veículo."""
+    counts = np.bincount(groups, minlength=n_groups)
+    order = np.lexsort((values, groups))
+    sorted_values = values[order]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    has_values = counts > 0
+    result = {}
+    for name, q in PERCENTIS.items():
+        out = np.zeros(n_groups)
+        pos = starts[has_values] + q * (counts[has_values] - 1)
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.ceil(pos).astype(np.int64)
+        out[has_values] = sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+        result[name] = np.round(out, 2)
+    return counts, result
+
+
+def compute_fleet_stats(cols: FuelColumns) -> Dict[int, Dict[str, Any]]:
+    """
+    Calcula, por veículo, os mesmos campos dos agregados de abastecimento
+    (custo, litros, último KM, soma e contagem de Km/L) e estatísticas extras:
+    média, mediana, p10/p90 de Km/L, distância total e custo por km.
+    """
+    if len(cols) == 0:
+        return {}
+
+    order = np.lexsort((cols.km, cols.id_veiculo))
+    vid = cols.id_veiculo[order]
+    km = cols.km[order]
+    litros = cols.litros[order]
+    custo = litros * cols.valor_litro[order]
+
+    vehicles, starts, counts = np.unique(vid, return_index=True, return_counts=True)
+    n = len(vehicles)
+    group = np.repeat(np.arange(n), counts)
+
+    custo_total = np.add.reduceat(custo, starts)
+    total_litros = np.add.reduceat(litros, starts)
+    ultimo_km = np.maximum.reduceat(km, starts)
+    distancia_total = ultimo_km - km[starts]
+
+    # Km/L entre registros consecutivos do mesmo veículo: (km atual - km anterior) / litros atuais
+    distancia = np.diff(km)
+    litros_atual = litros[1:]
+    valid = (vid[1:] == vid[:-1]) & (distancia > 0) & (litros_atual > 0)
+    km_l = np.round(distancia[valid] / litros_atual[valid], 2)
+    km_l_group = group[1:][valid]
+
+    soma_km_l = np.bincount(km_l_group, weights=km_l, minlength=n)
+    num_km_l, percentis = _group_percentiles(km_l, km_l_group, n)
+    media_km_l = np.round(np.divide(soma_km_l, num_km_l, out=np.zeros(n), where=num_km_l > 0), 2)
+    custo_por_km = np.round(np.divide(custo_total, distancia_total, out=np.zeros(n), where=distancia_total > 0), 4)
+
+    stats: Dict[int, Dict[str, Any]] = {}
+    for i, vehicle_id in enumerate(vehicles.tolist()):
+        stats[vehicle_id] = {
+            "id_veiculo": vehicle_id,
+            "id_empresa": cols.empresa_por_veiculo.get(vehicle_id),
+            "custo_total": round(float(custo_total[i]), 4),
+            "total_litros": round(float(total_litros[i]), 2),
+            "ultimo_km": int(ultimo_km[i]),
+            "soma_km_l": round(float(soma_km_l[i]), 2),
+            "num_km_l": int(num_km_l[i]),
+            "media_km_l": float(media_km_l[i]),
+            "mediana_km_l": float(percentis["mediana_km_l"][i]),
+            "p10_km_l": float(percentis["p10_km_l"][i]),
+            "p90_km_l": float(percentis["p90_km_l"][i]),
+            "distancia_total": int(distancia_total[i]),
+            "custo_por_km": float(custo_por_km[i]),
+        }
+    return stats
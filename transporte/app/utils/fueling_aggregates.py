@@ -0,0 +1,132 @@
+# logistica_app/app/utils/fueling_aggregates.py
+
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from .data_access import VEHICLE_DIMENSION_EMBED, get_request_loader, iter_rows_by_key
+
+# Campos gravados na tabela de agregados
+AGGREGATE_FIELDS = ('id_veiculo', 'id_empresa', 'custo_total', 'total_litros', 'ultimo_km', 'soma_km_l', 'num_km_l')
+
+# Tabela com os agregados corridos por veículo (ver sql/001_resumo_abastecimento_veiculo.sql).
+# É atualizada a cada abastecimento pela procedure registrar_abastecimento (sql/002).
+AGGREGATE_TABLE = 'Resumo_Abastecimento_Veiculo'
+
+
+def _empty_aggregate(id_empresa, vehicle_id) -> Dict[str, Any]:
+    return {
+        "id_veiculo": vehicle_id,
+        "id_empresa": id_empresa,
+        "custo_total": 0.0,
+        "total_litros": 0.0,
+        "ultimo_km": None,
+        "soma_km_l": 0.0,
+        "num_km_l": 0,
+    }
+
+
+def add_fueling_to_aggregate(aggregate: Dict[str, Any], km: int, litros: float, valor_litro: float) -> Dict[str, Any]:
+    """
+    Acumula um abastecimento no agregado do veículo.
+    O Km/L é calculado entre o KM do registro anterior e o atual, dividido pelos litros do atual.
+    """
+    litros = float(litros)
+    # Custo com 4 casas (litros e preço têm 2 cada): a soma fica exata e só é arredondada na exibição
+    aggregate["custo_total"] = round(float(aggregate["custo_total"]) + litros * float(valor_litro), 4)
+    aggregate["total_litros"] = round(float(aggregate["total_litros"]) + litros, 2)
+
+    ultimo_km = aggregate.get("ultimo_km")
+    if ultimo_km is not None:
+        distancia = km - ultimo_km
+        if distancia > 0 and litros > 0:
+            aggregate["soma_km_l"] = round(float(aggregate["soma_km_l"]) + round(distancia / litros, 2), 2)
+            aggregate["num_km_l"] = int(aggregate["num_km_l"]) + 1
+
+    if ultimo_km is None or km > ultimo_km:
+        aggregate["ultimo_km"] = km
+    return aggregate
+
+
+def compute_aggregates(rows: Iterable[Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+    """
+    Recalcula os agregados a partir do histórico bruto de Abastecimento, em Python puro.
+    As linhas devem vir ordenadas por id_veiculo e km_registro (ordem crescente).
+    Referência para o motor vetorizado em utils/fuel_stats.py.
+    """
+    aggregates: Dict[int, Dict[str, Any]] = {}
+    for item in rows:
+        vehicle_id = item['id_veiculo']
+        if vehicle_id not in aggregates:
+            aggregates[vehicle_id] = _empty_aggregate(item['id_empresa'], vehicle_id)
+        add_fueling_to_aggregate(aggregates[vehicle_id], item['km_registro'], item['litros'], item['valor_litro'])
+    return aggregates
+
+
+def _save_aggregates(supabase, aggregates: List[Dict[str, Any]]) -> None:
+    agora = datetime.now(timezone.utc).isoformat()
+    for aggregate in aggregates:
+        aggregate["atualizado_em"] = agora
+    supabase.table(AGGREGATE_TABLE).upsert(aggregates, on_conflict='id_veiculo').execute()
+
+
+# -----------------
+# REPARO: RECONSTRUÇÃO A PARTIR DO HISTÓRICO
+# -----------------
+def rebuild_aggregates(supabase, id_empresa: Optional[str] = None, batch_size: int = 500,
+                       vehicle_ids: Optional[List[int]] = None) -> int:
+    """
+    Recalcula os agregados a partir de todos os abastecimentos (de uma empresa ou de todas),
+    opcionalmente só dos veículos em `vehicle_ids`. Retorna o número de veículos gravados.
+    """
+    def build_query():
+        query = supabase.table('Abastecimento').select('id, id_empresa, id_veiculo, km_registro, litros, valor_litro')
+        if id_empresa is not None:
+            query = query.eq('id_empresa', id_empresa)
+        if vehicle_ids:
+            query = query.in_('id_veiculo', vehicle_ids)
+        return query
+
+    # O histórico é lido em streaming para colunas NumPy; o motor vetorizado ordena e agrega
+    # (NumPy é importado aqui, não no topo, para não pesar no cold start)
+    from .fuel_stats import compute_fleet_stats, load_columns
+    stats = compute_fleet_stats(load_columns(iter_rows_by_key(build_query)))
+    aggregates = [{field: item[field] for field in AGGREGATE_FIELDS} for item in stats.values()]
+    for start in range(0, len(aggregates), batch_size):
+        _save_aggregates(supabase, aggregates[start:start + batch_size])
+    return len(aggregates)
+
+
+# -----------------
+# LEITURA: RESUMO PARA O DASHBOARD
+# -----------------
+def read_fueling_summary(supabase, id_empresa) -> Dict[str, Any]:
+    """Monta o resumo de abastecimento lendo apenas os agregados (uma linha por veículo).
+    Os veículos embutidos alimentam a dimensão de veículos do request (data_access.RequestLoader)."""
+    rows = iter_rows_by_key(
+        lambda: supabase.table(AGGREGATE_TABLE).select(
+            f"id_veiculo, custo_total, total_litros, soma_km_l, num_km_l, {VEHICLE_DIMENSION_EMBED}"
+        ).eq('id_empresa', id_empresa),
+        key='id_veiculo',
+    )
+
+    veiculos_summary: Dict[str, Dict[str, Any]] = {}
+    custo_total_frota = 0.0
+    loader = get_request_loader()
+
+    for item in rows:
+        if loader is not None:
+            loader.prime_vehicles([item['Veiculo']])
+        num_km_l = int(item['num_km_l'] or 0)
+        custo_total = float(item['custo_total'])
+        veiculos_summary[str(item['id_veiculo'])] = {
+            "placa": item['Veiculo']['placa'],
+            "custo_total": custo_total,
+            "total_litros": float(item['total_litros']),
+            "media_km_l": round(float(item['soma_km_l']) / num_km_l, 2) if num_km_l else 0.0,
+        }
+        custo_total_frota += custo_total
+
+    return {
+        "total_frota": round(custo_total_frota, 2),
+        "veiculos": veiculos_summary
+    }
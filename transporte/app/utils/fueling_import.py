@@ -0,0 +1,174 @@
+# logistica_app/app/utils/fueling_import.py
+
+from datetime import datetime
+from typing import Any, Dict, IO, List, Optional
+
+import numpy as np
+
+from .csv_utils import iter_csv_rows, parse_decimal
+from .fueling_aggregates import rebuild_aggregates
+from .odometer import get_odometer_index
+from .alert_engine import get_alert_engine
+
+# Colunas esperadas no CSV exportado do cartão-combustível (local_abastecimento é opcional)
+REQUIRED_COLUMNS = ('placa', 'data_abastecimento', 'litros', 'valor_litro', 'km_registro')
+DATE_FORMATS = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%dT%H:%M',
+                '%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M', '%Y-%m-%d', '%d/%m/%Y')
+PLATE_LOOKUP_CHUNK = 200
+
+
+def _parse_date(value: Optional[str]) -> datetime:
+    value = (value or '').strip()  # None: coluna ausente em uma linha curta
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise ValueError(f"data inválida '{value}'")
+
+
+def _monotonic_mask(vehicle_idx: np.ndarray, timestamps: np.ndarray, km: np.ndarray, baseline: np.ndarray) -> np.ndarray:
+    """
+    Verificação vetorizada do odômetro: cada linha precisa ter KM maior que o KM atual do veículo
+    e que todas as linhas anteriores (por data) do mesmo veículo.
+    `baseline[i]` é o km_atual do veículo i. Retorna a máscara de linhas válidas na ordem original.
+    """
+    n_vehicles = len(baseline)
+    order = np.lexsort((km, timestamps, vehicle_idx))
+
+    # Cada veículo ganha uma linha "sentinela" com o km_atual antes das suas linhas do arquivo
+    groups = np.concatenate((np.arange(n_vehicles), vehicle_idx[order]))
+    values = np.concatenate((baseline, km[order]))
+    is_row = np.concatenate((np.zeros(n_vehicles, dtype=bool), np.ones(len(km), dtype=bool)))
+    sort_groups = np.argsort(groups, kind='stable')
+    groups, values, is_row = groups[sort_groups], values[sort_groups], is_row[sort_groups]
+
+    # Máximo acumulado por veículo: deslocar cada grupo por gid * span mantém os grupos separados
+    span = int(values.max() - min(values.min(), 0)) + 1
+    shifted = groups.astype(np.int64) * span + values
+    running_max = np.maximum.accumulate(shifted)
+    previous_max = np.concatenate(([np.iinfo(np.int64).min], running_max[:-1]))
+    valid_sorted = shifted[is_row] > previous_max[is_row]
+
+    valid = np.empty(len(km), dtype=bool)
+    valid[order] = valid_sorted
+    return valid
+
+
+def _resolve_plates(supabase, id_empresa, plates: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Busca id e km_atual de todas as placas do arquivo (uma consulta a cada PLATE_LOOKUP_CHUNK placas)."""
+    vehicles: Dict[str, Dict[str, Any]] = {}
+    for start in range(0, len(plates), PLATE_LOOKUP_CHUNK):
+        chunk = plates[start:start + PLATE_LOOKUP_CHUNK]
+        response = supabase.table('Veiculo').select('id, placa, km_atual').eq('id_empresa', id_empresa).in_('placa', chunk).execute()
+        for item in response.data:
+            vehicles[item['placa'].upper()] = item
+    return vehicles
+
+
+def import_fuelings(supabase, id_empresa, stream: IO[bytes], id_usuario: Optional[str] = None,
+                    batch_size: int = 500) -> Dict[str, Any]:
+    """
+    Importa abastecimentos de um CSV de cartão-combustível.
+
+    1. Lê e valida o formato das linhas em streaming;
+    2. resolve as placas em veículos com uma única consulta;
+    3. valida a monotonicidade do odômetro por veículo em uma passada vetorizada;
+    4. insere as linhas válidas em lotes de `batch_size` (insert de várias linhas);
+    5. avança Veiculo.km_atual uma vez por veículo e reconstrói os agregados dos veículos afetados.
+
+    Retorna um relatório com o total de linhas, quantas foram inseridas e as rejeitadas (com motivo).
+    """
+    rejected: List[Dict[str, Any]] = []
+    parsed: List[Dict[str, Any]] = []
+    total = 0
+
+    for line_no, row in iter_csv_rows(stream, REQUIRED_COLUMNS):
+        total += 1
+        placa = (row.get('placa') or '').strip().upper()
+        try:
+            litros = parse_decimal(row['litros'], row['_decimal_comma'])
+            valor_litro = parse_decimal(row['valor_litro'], row['_decimal_comma'])
+            km = int(parse_decimal(row['km_registro'], row['_decimal_comma']))
+            data = _parse_date(row['data_abastecimento'])
+            if not placa:
+                raise ValueError("placa vazia")
+            if litros <= 0 or valor_litro <= 0 or km <= 0:
+                raise ValueError("litros, valor por litro e KM devem ser positivos")
+        except (ValueError, TypeError, KeyError) as e:
+            rejected.append({"linha": line_no, "placa": placa, "motivo": f"Formato inválido: {e}"})
+            continue
+
+        parsed.append({
+            "linha": line_no, "placa": placa, "data": data, "litros": litros,
+            "valor_litro": valor_litro, "km": km,
+            "local": (row.get('local_abastecimento') or '').strip() or None,
+        })
+
+    vehicles = _resolve_plates(supabase, id_empresa, sorted({p['placa'] for p in parsed}))
+
+    rows = []
+    for item in parsed:
+        if item['placa'] in vehicles:
+            rows.append(item)
+        else:
+            rejected.append({"linha": item['linha'], "placa": item['placa'], "motivo": "Placa não cadastrada na empresa"})
+
+    inserted = 0
+    max_km: Dict[int, int] = {}
+    if rows:
+        plates = sorted({r['placa'] for r in rows})
+        plate_idx = {placa: i for i, placa in enumerate(plates)}
+        baseline = np.array([vehicles[p]['km_atual'] or 0 for p in plates], dtype=np.int64)
+        valid = _monotonic_mask(
+            np.array([plate_idx[r['placa']] for r in rows], dtype=np.int64),
+            np.array([r['data'].timestamp() for r in rows], dtype=np.float64),
+            np.array([r['km'] for r in rows], dtype=np.int64),
+            baseline,
+        )
+
+        to_insert = []
+        for item, ok in zip(rows, valid.tolist()):
+            if not ok:
+                rejected.append({"linha": item['linha'], "placa": item['placa'],
+                                 "motivo": f"KM {item['km']} não é maior que a última KM do veículo"})
+                continue
+            to_insert.append(item)
+
+        for start in range(0, len(to_insert), batch_size):
+            batch = to_insert[start:start + batch_size]
+            payload = [{
+                "id_empresa": id_empresa,
+                "id_veiculo": vehicles[item['placa']]['id'],
+                "data_abastecimento": item['data'].strftime('%Y-%m-%d %H:%M:%S'),
+                "litros": item['litros'],
+                "valor_litro": item['valor_litro'],
+                "km_registro": item['km'],
+                "local_abastecimento": item['local'],
+                "id_usuario_registro": id_usuario,
+            } for item in batch]
+            try:
+                supabase.table('Abastecimento').insert(payload).execute()
+            except Exception as e:
+                for item in batch:
+                    rejected.append({"linha": item['linha'], "placa": item['placa'], "motivo": f"Erro ao inserir lote: {e}"})
+                continue
+
+            inserted += len(batch)
+            for row in payload:
+                max_km[row['id_veiculo']] = max(max_km.get(row['id_veiculo'], 0), row['km_registro'])
+
+    # Uma atualização de odômetro por veículo (e não por linha), sempre para frente
+    index = get_odometer_index()
+    alerts = get_alert_engine()
+    for vehicle_id, km in max_km.items():
+        supabase.table('Veiculo').update({'km_atual': km}).eq('id', vehicle_id) \
+            .or_(f"km_atual.is.null,km_atual.lt.{km}").execute()
+        index.advance(id_empresa, vehicle_id, km)
+        alerts.on_km_update(id_empresa, vehicle_id, km)
+
+    if max_km:
+        rebuild_aggregates(supabase, id_empresa, vehicle_ids=list(max_km))
+
+    rejected.sort(key=lambda r: r['linha'])
+    return {"total_linhas": total, "inseridos": inserted, "rejeitados": rejected}
@@ -0,0 +1,38 @@
+# logistica_app/app/utils/http_deadline.py
+
+import time
+
+import httpx
+
+from .concurrency import task_deadline
+
+# -----------------
+# TIMEOUT HTTP LIMITADO AO PRAZO DA TAREFA
+# -----------------
+# As seções do dashboard rodam em gather() com QUERY_TIMEOUT (5s), mas o pool httpx usa
+# SUPABASE_HTTP_TIMEOUT (10s). Sem este limite, uma consulta abandonada por gather()
+# seguiria ocupando uma thread do pool até o timeout HTTP, e com o Supabase lento os
+# requests seguintes estourariam o prazo ainda na fila. O httpx lê o timeout de cada
+# chamada em `request.extensions['timeout']`; aqui ele é reduzido ao que resta do prazo.
+
+
+class DeadlineTransport(httpx.BaseTransport):
+    """Transporte httpx que limita connect/read/write/pool ao prazo da tarefa atual (se houver)."""
+    def __init__(self, transport: httpx.BaseTransport):
+        self._transport = transport
+
+    def handle_request(self, req: httpx.Request) -> httpx.Response:
+        deadline = task_deadline()
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise httpx.TimeoutException("Prazo da consulta esgotado", request=req)
+            timeouts = dict(req.extensions.get('timeout') or {})
+            req.extensions['timeout'] = {
+                name: remaining if timeouts.get(name) is None else min(timeouts[name], remaining)
+                for name in ('connect', 'read', 'write', 'pool')
+            }
+        return self._transport.handle_request(req)
+
+    def close(self) -> None:
+        self._transport.close()
@@ -0,0 +1,271 @@
+# logistica_app/app/utils/metrics.py
+
+import bisect
+import hmac
+import threading
+import time
+from functools import wraps
+from typing import Dict, List, Sequence, Tuple
+
+import httpx
+from flask import Flask, Response, abort, current_app, has_request_context, request
+
+from . import tracing
+
+# Métricas no formato texto do Prometheus, expostas em /metrics:
+#   - latência dos requests por endpoint (histograma) e contagem por status;
+#   - latência de cada chamada ao Supabase por tabela/operação, medida no transporte
+#     httpx compartilhado (database.py), então cobre PostgREST, RPC e Storage sem
+#     alterar nenhum `.execute()`;
+#   - round trips ao Supabase por request (histograma por endpoint).
+# Os valores são por worker: com vários workers do gunicorn, cada scrape vê um deles.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROUND_TRIP_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+
+_ROUND_TRIPS_KEY = 'transporte.round_trips'
+
+
+class Histogram:
+    """Histograma com buckets fixos e rótulos. `observe` é O(log buckets) sob um lock."""
+    def __init__(self, name: str, help_text: str, labels: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], List[float]] = {}  # contagens por bucket + [soma, total]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in self._series.items()]
+        for label_values, series in sorted(items):
+            base = _labels(self.labels, label_values)
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{_labels(self.labels + ("le",), label_values + (_fmt(bound),))} {cumulative}')
+            lines.append(f'{self.name}_bucket{_labels(self.labels + ("le",), label_values + ("+Inf",))} {int(series[-1])}')
+            lines.append(f"{self.name}_sum{base} {series[-2]}")
+            lines.append(f"{self.name}_count{base} {int(series[-1])}")
+        return lines
+
+
+class Counter:
+    """Contador monotônico com rótulos."""
+    def __init__(self, name: str, help_text: str, labels: Sequence[str]):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            lines.append(f"{self.name}{_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+def _fmt(value: float) -> str:
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+REQUEST_LATENCY = Histogram('transporte_http_request_duration_seconds',
+                            'Latência dos requests por endpoint.', ('endpoint', 'method'), LATENCY_BUCKETS)
+REQUESTS = Counter('transporte_http_requests_total',
+                   'Requests atendidos por endpoint e status.', ('endpoint', 'method', 'status'))
+SUPABASE_LATENCY = Histogram('transporte_supabase_request_duration_seconds',
+                             'Latência das chamadas ao Supabase por tabela e operação.', ('table', 'operation'), LATENCY_BUCKETS)
+SUPABASE_ERRORS = Counter('transporte_supabase_errors_total',
+                          'Chamadas ao Supabase com erro (status >= 400 ou falha de rede).', ('table', 'operation'))
+ROUND_TRIPS = Histogram('transporte_supabase_round_trips_per_request',
+                        'Chamadas ao Supabase feitas durante um request.', ('endpoint',), ROUND_TRIP_BUCKETS)
+
+REGISTRY = [REQUEST_LATENCY, REQUESTS, SUPABASE_LATENCY, SUPABASE_ERRORS, ROUND_TRIPS]
+
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+# -----------------
+# TRANSPORTE HTTPX INSTRUMENTADO (CHAMADAS AO SUPABASE)
+# -----------------
+
+def classify_request(method: str, path: str, prefer: str = '') -> Tuple[str, str]:
+    """(tabela, operação) a partir da URL do Supabase. Ex: GET /rest/v1/Veiculo -> ('Veiculo', 'select')."""
+    parts = [part for part in path.split('/') if part]
+    if len(parts) >= 3 and parts[0] == 'rest':
+        if parts[2] == 'rpc' and len(parts) >= 4:
+            return parts[3], 'rpc'
+        operation = {'GET': 'select', 'HEAD': 'count', 'PATCH': 'update', 'DELETE': 'delete'}.get(method)
+        if operation is None:
+            operation = 'upsert' if 'merge-duplicates' in prefer else 'insert'
+        return parts[2], operation
+    if len(parts) >= 4 and parts[0] == 'storage' and parts[2] == 'object':
+        bucket = parts[4] if parts[3] in ('public', 'sign', 'authenticated') and len(parts) > 4 else parts[3]
+        return f"storage:{bucket}", {'POST': 'upload', 'PUT': 'upload', 'GET': 'download', 'DELETE': 'delete'}.get(method, method.lower())
+    return (parts[0] if parts else 'desconhecido'), method.lower()
+
+
+class _RoundTrips:
+    """Contador de chamadas do request atual (compartilhado com as threads de gather via environ)."""
+    __slots__ = ('count', 'lock')
+
+    def __init__(self):
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def add(self) -> None:
+        with self.lock:
+            self.count += 1
+
+
+class _TimedStream(httpx.SyncByteStream):
+    """Mede a chamada até o corpo da resposta ser lido por completo (close)."""
+    def __init__(self, stream, on_close):
+        self._stream = stream
+        self._on_close = on_close
+        self.bytes = 0
+
+    def __iter__(self):
+        for chunk in self._stream:
+            self.bytes += len(chunk)
+            yield chunk
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            self._on_close(self.bytes)
+
+
+class InstrumentedTransport(httpx.BaseTransport):
+    """Transporte httpx que registra latência, erros e round trips de cada chamada
+    (e, com TRACE_ENABLED, o detalhe da chamada no trace do request; ver utils/tracing.py)."""
+    def __init__(self, transport: httpx.BaseTransport):
+        self._transport = transport
+
+    def handle_request(self, req: httpx.Request) -> httpx.Response:
+        table, operation = classify_request(req.method, req.url.path, req.headers.get('prefer', ''))
+        trace = call = None
+        if has_request_context():
+            round_trips = request.environ.get(_ROUND_TRIPS_KEY)
+            if round_trips is not None:
+                round_trips.add()
+            trace = request.environ.get(tracing.TRACE_KEY)
+            if trace is not None:
+                call = tracing.describe_call(req, table, operation)
+
+        started = time.perf_counter()
+        try:
+            response = self._transport.handle_request(req)
+        except Exception as e:
+            SUPABASE_LATENCY.observe(time.perf_counter() - started, table, operation)
+            SUPABASE_ERRORS.inc(table, operation)
+            if trace is not None:
+                trace.add({**call, "status": None, "erro": str(e), "linhas": None, "bytes": 0,
+                           "ms": round((time.perf_counter() - started) * 1000, 2)})
+            raise
+
+        if response.status_code >= 400:
+            SUPABASE_ERRORS.inc(table, operation)
+
+        def finished(received: int):
+            elapsed = time.perf_counter() - started
+            SUPABASE_LATENCY.observe(elapsed, table, operation)
+            if trace is not None:
+                rows = tracing.count_rows(response.headers.get('content-range'))
+                trace.add({**call, "status": response.status_code,
+                           "linhas": rows if rows is not None else call['linhas_enviadas'],
+                           "bytes": received, "ms": round(elapsed * 1000, 2)})
+
+        if response.is_closed:  # corpo já carregado pelo transporte
+            finished(len(response.content))
+            return response
+        response.stream = _TimedStream(response.stream, finished)
+        return response
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+# -----------------
+# INTEGRAÇÃO COM O FLASK
+# -----------------
+
+def _has_metrics_token() -> bool:
+    token = current_app.config.get('METRICS_TOKEN')
+    return bool(token) and hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {token}")
+
+
+def operator_required(view):
+    """Rotas de operação com dados de toda a plataforma (agendador, workers): exigem o
+    `Authorization: Bearer <METRICS_TOKEN>`. Sem METRICS_TOKEN configurado, respondem 404;
+    o login de um usuário (de uma empresa) não basta."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not current_app.config.get('METRICS_TOKEN'):
+            abort(404)
+        if not _has_metrics_token():
+            abort(401)
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def init_app(app: Flask) -> None:
+    """Registra a medição dos requests e a rota /metrics (se METRICS_ENABLED)."""
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+
+    @app.before_request
+    def _start_timer():
+        request.environ['transporte.started'] = time.perf_counter()
+        request.environ[_ROUND_TRIPS_KEY] = _RoundTrips()
+
+    @app.after_request
+    def _record_request(response):
+        started = request.environ.get('transporte.started')
+        if started is not None and request.endpoint != 'metrics':
+            endpoint = request.endpoint or 'desconhecido'
+            REQUEST_LATENCY.observe(time.perf_counter() - started, endpoint, request.method)
+            REQUESTS.inc(endpoint, request.method, str(response.status_code))
+            ROUND_TRIPS.observe(request.environ[_ROUND_TRIPS_KEY].count, endpoint)
+        return response
+
+    @app.route('/metrics')
+    @operator_required  # rotas e tabelas de toda a plataforma: só com METRICS_TOKEN
+    def metrics():
+        return Response(render_metrics(), mimetype='text/plain; version=0.0.4; charset=utf-8')
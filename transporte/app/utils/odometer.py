@@ -0,0 +1,59 @@
+# logistica_app/app/utils/odometer.py
+
+import threading
+from typing import Dict, Hashable, Optional
+
+from flask import current_app
+
+from .cache import TTLCache
+
+
+class OdometerIndex:
+    """
+    Índice em memória do último KM conhecido por veículo, com `Veiculo.km_atual` como fonte.
+    As rotas de escrita o mantêm atualizado; o TTL limita a defasagem entre workers.
+    """
+    def __init__(self, maxsize: int = 10000, ttl: float = 300.0):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def get(self, id_empresa, vehicle_id) -> Optional[int]:
+        return self._cache.get(self._key(id_empresa, vehicle_id))
+
+    def set(self, id_empresa, vehicle_id, km: int) -> None:
+        self._cache.set(self._key(id_empresa, vehicle_id), int(km))
+
+    def advance(self, id_empresa, vehicle_id, km: int) -> None:
+        """Avança o KM do veículo; nunca retrocede um valor já conhecido."""
+        key = self._key(id_empresa, vehicle_id)
+        with self._lock:
+            current = self._cache.get(key)
+            if current is None or km > current:
+                self._cache.set(key, int(km))
+
+    def forget(self, id_empresa, vehicle_id) -> None:
+        self._cache.delete(self._key(id_empresa, vehicle_id))
+
+    def stats(self) -> Dict[str, int]:
+        return self._cache.stats()
+
+    @staticmethod
+    def _key(id_empresa, vehicle_id) -> Hashable:
+        return (str(id_empresa), int(vehicle_id))
+
+
+_index: Optional[OdometerIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_odometer_index() -> OdometerIndex:
+    """Retorna o índice de odômetro do worker (criado com os limites de Config)."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = OdometerIndex(
+                    maxsize=current_app.config.get('ODOMETER_INDEX_MAXSIZE', 10000),
+                    ttl=current_app.config.get('ODOMETER_INDEX_TTL', 300),
+                )
+    return _index
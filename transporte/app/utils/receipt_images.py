@@ -0,0 +1,157 @@
+# logistica_app/app/utils/receipt_images.py
+
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, Optional
+
+from flask import current_app
+
+# Processamento das fotos de nota fiscal (JPG/PNG) antes do envio ao storage:
+# a imagem original (em geral 5–10 MB, direto da câmera do celular) é reduzida para no
+# máximo RECEIPT_MAX_DIMENSION pixels no maior lado e recomprimida em JPEG, e é gerada
+# uma miniatura para listagens. O trabalho pesado (decodificar/redimensionar) roda em um
+# pool de processos, fora das threads que atendem requests. Requer Pillow (opcional):
+# sem ele, as imagens são enviadas como vieram.
+
+IMAGE_TYPES = ('image/jpeg', 'image/png')
+
+
+def pillow_available() -> bool:
+    try:
+        import PIL  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def process_receipt_image(source_path: str, max_dimension: int, quality: int, thumbnail_size: int) -> Dict[str, Any]:
+    """
+    Roda no processo filho. Gera a imagem recomprimida e a miniatura em arquivos temporários.
+    Se a recompressão não reduzir o arquivo, a imagem resultante é o próprio original.
+    """
+    from PIL import Image, ImageOps
+
+    started = time.perf_counter()
+    bytes_in = os.path.getsize(source_path)
+    outputs = []  # arquivos gerados aqui: apagados se algo falhar no meio
+
+    try:
+        with Image.open(source_path) as original:
+            image = ImageOps.exif_transpose(original)  # fotos de celular vêm rotacionadas via EXIF
+            if image.mode != 'RGB':
+                # PNG com transparência: fundo branco, como o papel da nota
+                background = Image.new('RGB', image.size, (255, 255, 255))
+                background.paste(image.convert('RGBA'), mask=image.convert('RGBA').getchannel('A'))
+                image = background
+            width, height = image.size
+
+            image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+            fd, image_path = tempfile.mkstemp(prefix='nf_img_', suffix='.jpg')
+            outputs.append(image_path)
+            with os.fdopen(fd, 'wb') as f:
+                image.save(f, 'JPEG', quality=quality, optimize=True, progressive=True)
+
+            image.thumbnail((thumbnail_size, thumbnail_size), Image.LANCZOS)
+            fd, thumbnail_path = tempfile.mkstemp(prefix='nf_min_', suffix='.jpg')
+            outputs.append(thumbnail_path)
+            with os.fdopen(fd, 'wb') as f:
+                image.save(f, 'JPEG', quality=quality, optimize=True)
+
+        bytes_out = os.path.getsize(image_path)
+        recompressed = bytes_out < bytes_in
+        if not recompressed:
+            os.remove(image_path)
+            image_path, bytes_out = source_path, bytes_in
+    except Exception:
+        # O processo pai só conhece os arquivos que recebe no resultado
+        for path in outputs:
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+
+    return {
+        "imagem": image_path,
+        "miniatura": thumbnail_path,
+        "recomprimida": recompressed,
+        "dimensoes_originais": (width, height),
+        "bytes_entrada": bytes_in,
+        "bytes_saida": bytes_out,
+        "segundos": time.perf_counter() - started,
+        "pid": os.getpid(),
+    }
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_lock = threading.Lock()
+_metrics: Dict[int, Dict[str, float]] = {}
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                # 'spawn': criar processos com fork a partir de um worker com threads pode travar
+                _pool = ProcessPoolExecutor(
+                    max_workers=current_app.config.get('RECEIPT_PROCESS_WORKERS', 2),
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+    return _pool
+
+
+def compress_receipt(source_path: str) -> Dict[str, Any]:
+    """Processa a imagem no pool de processos e espera o resultado (chamar fora do request)."""
+    config = current_app.config
+    future = _get_pool().submit(
+        process_receipt_image, source_path,
+        config.get('RECEIPT_MAX_DIMENSION', 1600),
+        config.get('RECEIPT_JPEG_QUALITY', 80),
+        config.get('RECEIPT_THUMBNAIL_SIZE', 256),
+    )
+    try:
+        result = future.result(timeout=config.get('RECEIPT_PROCESS_TIMEOUT', 60))
+    except FutureTimeoutError:
+        # O processo filho continua e ainda vai gerar os arquivos: apaga-os quando terminar
+        future.add_done_callback(_discard_outputs)
+        raise
+    _record(result)
+    return result
+
+
+def _discard_outputs(future) -> None:
+    if future.cancelled() or future.exception() is not None:
+        return
+    for path in (future.result()['imagem'], future.result()['miniatura']):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _record(result: Dict[str, Any]) -> None:
+    with _lock:
+        worker = _metrics.setdefault(result['pid'], {
+            "imagens": 0, "bytes_entrada": 0, "bytes_saida": 0, "segundos": 0.0,
+        })
+        worker['imagens'] += 1
+        worker['bytes_entrada'] += result['bytes_entrada']
+        worker['bytes_saida'] += result['bytes_saida']
+        worker['segundos'] += result['segundos']
+
+
+def processing_stats() -> Dict[str, Any]:
+    """Vazão por processo do pool: imagens/s, MB/s de entrada e taxa de compressão."""
+    with _lock:
+        workers = {}
+        for pid, m in _metrics.items():
+            seconds = m['segundos'] or 1e-9
+            workers[str(pid)] = {
+                **m,
+                "segundos": round(m['segundos'], 3),
+                "imagens_por_segundo": round(m['imagens'] / seconds, 2),
+                "mb_por_segundo": round(m['bytes_entrada'] / 1e6 / seconds, 2),
+                "reducao": round(1 - m['bytes_saida'] / m['bytes_entrada'], 3) if m['bytes_entrada'] else 0.0,
+            }
+    return {"pillow": pillow_available(), "processos": workers}
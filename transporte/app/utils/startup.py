@@ -0,0 +1,109 @@
+# logistica_app/app/utils/startup.py
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from flask import Flask
+
+# -----------------
+# PERFIL DO COLD START
+# -----------------
+# No deploy serverless (wsgi.py + vercel.json) cada cold start importa o pacote e roda
+# create_app antes do primeiro byte. O perfil mede cada fase (imports, banco, blueprints...)
+# e fica em app.extensions['startup']; com STARTUP_PROFILE, sai uma linha `startup {json}`
+# no log por worker. dev-tools/check_startup.py usa o mesmo perfil para cobrar o orçamento.
+
+class StartupProfile:
+    """Tempo (ms) de cada fase da inicialização, na ordem em que rodaram."""
+    def __init__(self, import_started: Optional[float] = None):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        if import_started is not None:
+            self.phases['import'] = (self.started - import_started) * 1000
+        self.modules_before = len(sys.modules)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = (time.perf_counter() - t0) * 1000
+
+    def summary(self) -> Dict[str, object]:
+        create_app_ms = (time.perf_counter() - self.started) * 1000
+        return {
+            'pid': os.getpid(),
+            'total_ms': round(self.phases.get('import', 0.0) + create_app_ms, 1),
+            'create_app_ms': round(create_app_ms, 1),
+            'fases_ms': {name: round(ms, 1) for name, ms in self.phases.items()},
+            'modulos': len(sys.modules),
+            'modulos_create_app': len(sys.modules) - self.modules_before,
+        }
+
+
+def finish(app: Flask, profile: StartupProfile) -> None:
+    """Guarda o perfil no app e, com STARTUP_PROFILE, registra a linha no log."""
+    summary = profile.summary()
+    app.extensions['startup'] = summary
+    if app.config.get('STARTUP_PROFILE'):
+        print(f"startup {json.dumps(summary, sort_keys=True)}")
+
+
+# -----------------
+# AQUECIMENTO DA CONEXÃO (UMA VEZ POR WORKER)
+# -----------------
+# Abre a conexão TLS com o PostgREST (e carrega o cliente) em uma thread, enquanto o worker
+# termina de subir, para que o primeiro request não pague o handshake. A guarda é por PID:
+# com `gunicorn --preload` o app é criado antes do fork, e cada worker aquece a sua conexão
+# no primeiro request (a thread do processo pai não sobrevive ao fork).
+
+_warmed_pid: Optional[int] = None
+_warm_lock = threading.Lock()
+
+
+def _warm_up(app: Flask) -> None:
+    from ..database import get_registered_client
+
+    t0 = time.perf_counter()
+    try:
+        with app.app_context():
+            # Uma linha de uma tabela pequena: abre a conexão e valida URL/chave
+            get_registered_client('anon').table('empresa').select('id').limit(1).execute()
+        if app.config.get('STARTUP_PROFILE'):
+            print(f"startup_warmup {json.dumps({'pid': os.getpid(), 'ms': round((time.perf_counter() - t0) * 1000, 1)})}")
+    except Exception as e:
+        print(f"Erro ao aquecer a conexão com o Supabase: {e}")
+
+
+def warm_up_once(app: Flask) -> bool:
+    """Dispara o aquecimento se este processo ainda não o fez. Retorna True se disparou."""
+    global _warmed_pid
+    if _warmed_pid == os.getpid():
+        return False
+    with _warm_lock:
+        if _warmed_pid == os.getpid():
+            return False
+        _warmed_pid = os.getpid()
+    threading.Thread(target=_warm_up, args=(app,), name='supabase-warmup', daemon=True).start()
+    return True
+
+
+def init_app(app: Flask) -> None:
+    """Aquece a conexão na criação do app e, depois de um fork, no primeiro request do worker."""
+    if not app.config.get('SUPABASE_WARMUP') or app.config.get('SUPABASE_BACKEND', 'supabase') == 'fake':
+        return
+    if not app.config.get('SUPABASE_URL') or not app.config.get('SUPABASE_KEY_ANON'):
+        return
+
+    warm_up_once(app)
+
+    @app.before_request
+    def _warm_up_after_fork():
+        if _warmed_pid != os.getpid():
+            warm_up_once(app)
@@ -0,0 +1,236 @@
+# logistica_app/app/utils/storage.py
+
+import mimetypes
+import os
+import posixpath
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from flask import Flask, abort, current_app, jsonify, redirect, send_from_directory
+from flask_login import current_user, login_required
+
+from .metrics import operator_required
+from .receipt_images import IMAGE_TYPES, compress_receipt, pillow_available, processing_stats
+
+# Armazenamento das notas fiscais (abastecimento e manutenção).
+#
+# O arquivo enviado no formulário é copiado em blocos para um arquivo temporário ainda
+# dentro do request (o corpo do request deixa de existir quando ele termina); a
+# transferência para o storage roda em um pool de threads e, ao terminar, grava o caminho
+# do arquivo no storage em `url_nota_fiscal` da linha já inserida. O POST responde sem
+# esperar o upload. Fotos (JPG/PNG) passam antes pelo processamento de utils/receipt_images.py.
+#
+# Os arquivos são servidos só por /storage/<caminho>, que exige login e confere a empresa
+# do caminho; nenhum backend expõe URL pública.
+#
+# Backends (Config.STORAGE_BACKEND):
+#   'supabase' -> Supabase Storage (bucket STORAGE_BUCKET, privado); /storage/ redireciona
+#                 para uma URL assinada válida por STORAGE_SIGNED_URL_TTL segundos
+#   'local'    -> diretório STORAGE_LOCAL_DIR, servido pelo próprio app (desenvolvimento e testes)
+
+
+class LocalStorage:
+    """Grava os arquivos em um diretório local; a rota /storage/ os serve direto."""
+    def __init__(self, root: str, chunk_size: int = 64 * 1024):
+        self.root = os.path.abspath(root)
+        self.chunk_size = chunk_size
+
+    def save(self, path: str, source_path: str, content_type: str) -> str:
+        target = os.path.abspath(os.path.join(self.root, path))
+        if not target.startswith(self.root + os.sep):
+            raise ValueError(f"Caminho inválido: {path}")
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(source_path, 'rb') as src, open(target + '.part', 'wb') as dst:
+            shutil.copyfileobj(src, dst, self.chunk_size)
+        os.replace(target + '.part', target)  # o arquivo só aparece completo
+        return path
+
+    def signed_url(self, path: str, expires_in: int) -> Optional[str]:
+        return None  # servido pela própria rota /storage/
+
+
+class SupabaseStorage:
+    """Envia os arquivos para um bucket privado do Supabase Storage."""
+    def __init__(self, client, bucket: str):
+        self.client = client
+        self.bucket = bucket
+
+    def save(self, path: str, source_path: str, content_type: str) -> str:
+        bucket = self.client.storage.from_(self.bucket)
+        # Um arquivo aberto (e não bytes) faz o httpx enviar o corpo em blocos. Sem upsert:
+        # o caminho é único (receipt_path), então um conflito é erro, não sobrescrita.
+        with open(source_path, 'rb') as f:
+            bucket.upload(path, f, file_options={'content-type': content_type})
+        return path
+
+    def signed_url(self, path: str, expires_in: int) -> Optional[str]:
+        return self.client.storage.from_(self.bucket).create_signed_url(path, expires_in)['signedURL']
+
+
+_storage: Optional[Any] = None
+_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+_pending = 0
+
+
+def get_storage():
+    """Retorna o backend de storage do worker, conforme Config.STORAGE_BACKEND."""
+    global _storage
+    if _storage is None:
+        with _lock:
+            if _storage is None:
+                config = current_app.config
+                if config.get('STORAGE_BACKEND', 'supabase') == 'local':
+                    _storage = LocalStorage(_local_root(current_app), config.get('UPLOAD_CHUNK_SIZE', 64 * 1024))
+                else:
+                    from ..database import get_service_client
+                    _storage = SupabaseStorage(get_service_client(), config.get('STORAGE_BUCKET', 'notas-fiscais'))
+    return _storage
+
+
+def _local_root(app: Flask) -> str:
+    return app.config.get('STORAGE_LOCAL_DIR') or os.path.join(app.instance_path, 'uploads')
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=current_app.config.get('UPLOAD_POOL_MAX_WORKERS', 2),
+                    thread_name_prefix='upload',
+                )
+    return _executor
+
+
+def spool_upload(file_storage) -> str:
+    """Copia o arquivo do request, em blocos, para um arquivo temporário. Retorna o caminho."""
+    chunk_size = current_app.config.get('UPLOAD_CHUNK_SIZE', 64 * 1024)
+    fd, path = tempfile.mkstemp(prefix='nf_')
+    with os.fdopen(fd, 'wb') as tmp:
+        while True:
+            chunk = file_storage.stream.read(chunk_size)
+            if not chunk:
+                break
+            tmp.write(chunk)
+    return path
+
+
+def receipt_path(folder: str, id_empresa, id_veiculo, filename: str) -> str:
+    """Caminho do arquivo no storage: <pasta>/<empresa>/nf_<veiculo>_<timestamp>_<aleatório>.<ext>.
+    A parte aleatória evita que duas notas no mesmo segundo usem o mesmo caminho."""
+    ext = filename.rsplit('.', 1)[-1].lower() if '.' in filename else 'bin'
+    return f"{folder}/{id_empresa}/nf_{id_veiculo}_{time.strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex}.{ext}"
+
+
+def is_company_path(path: str, id_empresa) -> bool:
+    """True se `path` é um caminho de nota fiscal da empresa (<pasta>/<empresa>/...).
+
+    Recusa segmentos vazios, '.' e '..' antes de olhar a empresa: `a/1/../../a/2/x` passaria
+    pela comparação do segundo segmento e seria resolvido (pelo send_from_directory ou pelo
+    httpx, na URL assinada) para o arquivo de outra empresa.
+    """
+    parts = path.split('/')
+    if posixpath.normpath(path) != path or '\\' in path or any(part in ('', '.', '..') for part in parts):
+        return False
+    return len(parts) >= 3 and parts[1] == str(id_empresa)
+
+
+def _save_with_retries(app: Flask, path: str, source_path: str, content_type: str) -> str:
+    retries = app.config.get('UPLOAD_RETRIES', 2)
+    for attempt in range(retries + 1):
+        try:
+            return get_storage().save(path, source_path, content_type)
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(2 ** attempt)
+
+
+def _transfer(app: Flask, table: str, row_id, id_empresa, path: str, tmp_path: str, content_type: str) -> Optional[Dict[str, str]]:
+    global _pending
+    # (caminho no storage, arquivo local, content-type, coluna que recebe o caminho)
+    artifacts = [(path, tmp_path, content_type, 'url_nota_fiscal')]
+    try:
+        with app.app_context():
+            # Fotos: recomprime e gera miniatura no pool de processos (utils/receipt_images.py)
+            if content_type in IMAGE_TYPES and pillow_available():
+                try:
+                    result = compress_receipt(tmp_path)
+                    base = path.rsplit('.', 1)[0]
+                    image_type = 'image/jpeg' if result['recomprimida'] else content_type
+                    image_path = f"{base}.jpg" if result['recomprimida'] else path
+                    artifacts = [
+                        (image_path, result['imagem'], image_type, 'url_nota_fiscal'),
+                        (f"{base}_miniatura.jpg", result['miniatura'], 'image/jpeg', 'url_nota_fiscal_miniatura'),
+                    ]
+                except Exception as e:
+                    print(f"Erro ao processar imagem da nota fiscal ({table} {row_id}), enviando o original: {e}")
+
+            paths = {}
+            for storage_path, source_path, source_type, column in artifacts:
+                try:
+                    paths[column] = _save_with_retries(app, storage_path, source_path, source_type)
+                except Exception as e:
+                    print(f"Erro ao enviar nota fiscal ({table} {row_id}): {e}")
+                    if column == 'url_nota_fiscal':
+                        return None
+
+            from ..database import get_service_client
+            get_service_client().table(table).update(paths) \
+                .eq('id', row_id).eq('id_empresa', id_empresa).execute()
+            return paths
+    except Exception as e:
+        print(f"Erro ao gravar caminho da nota fiscal ({table} {row_id}): {e}")
+        return None
+    finally:
+        for source_path in {tmp_path, *(artifact[1] for artifact in artifacts)}:
+            if os.path.exists(source_path):
+                os.remove(source_path)
+        with _lock:
+            _pending -= 1
+
+
+def submit_receipt_upload(table: str, row_id, id_empresa, path: str, tmp_path: str,
+                          content_type: Optional[str] = None) -> Future:
+    """
+    Agenda o envio de `tmp_path` para o storage em segundo plano. Ao terminar, grava o
+    caminho em `<table>.url_nota_fiscal` da linha `row_id` (e o da miniatura, para fotos, em
+    `url_nota_fiscal_miniatura`); o arquivo é lido por /storage/<caminho>. Os arquivos temporários são apagados em seguida.
+    """
+    global _pending
+    content_type = content_type or mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    with _lock:
+        _pending += 1
+    return _get_executor().submit(_transfer, current_app._get_current_object(), table, row_id,
+                                  id_empresa, path, tmp_path, content_type)
+
+
+def upload_stats() -> Dict[str, Any]:
+    """Uploads aguardando ou em andamento no worker e a vazão do processamento de imagens."""
+    return {"pendentes": _pending, "processamento": processing_stats()}
+
+
+def init_app(app: Flask) -> None:
+    """Registra /storage-status e /storage/<caminho>, que serve as notas fiscais da empresa."""
+
+    @app.route('/storage-status')
+    @operator_required  # PIDs e vazão dos workers: dados da plataforma, não de uma empresa
+    def storage_status():
+        return jsonify(upload_stats())
+
+    @app.route('/storage/<path:path>')
+    @login_required
+    def storage_file(path):
+        if not is_company_path(path, current_user.id_empresa):
+            abort(404)
+        url = get_storage().signed_url(path, app.config.get('STORAGE_SIGNED_URL_TTL', 300))
+        if url is None:
+            return send_from_directory(_local_root(app), path)
+        return redirect(url)
@@ -0,0 +1,152 @@
+# logistica_app/app/utils/tracing.py
+
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl
+
+from flask import Flask, current_app, request
+
+# Rastreamento (trace) das chamadas ao Supabase feitas durante um request, para achar
+# rotas com round trips demais (N+1). Cada chamada é registrada pelo transporte httpx
+# instrumentado (utils/metrics.py), então o trace cobre todos os clientes e também as
+# consultas feitas no pool de threads (utils/concurrency.py).
+#
+# Com TRACE_ENABLED, cada resposta recebe o cabeçalho X-Supabase-Trace com o resumo e
+# requests suspeitos (consulta idêntica repetida, padrão N+1 ou mais de TRACE_MAX_ROUND_TRIPS
+# chamadas) geram uma linha de log em JSON com o detalhe de cada chamada.
+# Em respostas em streaming (exportações), só entram as chamadas feitas antes do envio.
+
+TRACE_KEY = 'transporte.trace'
+TRACE_HEADER = 'X-Supabase-Trace'
+N_PLUS_ONE_MIN = 3  # mesma consulta (tabela, operação e colunas filtradas) com valores diferentes
+
+
+class RequestTrace:
+    """Chamadas ao Supabase de um request (compartilhado entre as threads do request)."""
+    def __init__(self):
+        self.calls: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def add(self, call: Dict[str, Any]) -> None:
+        with self._lock:
+            self.calls.append(call)
+
+    def summary(self, max_round_trips: int) -> Dict[str, Any]:
+        with self._lock:
+            calls = list(self.calls)
+
+        seen: Dict[str, int] = {}
+        for call in calls:
+            seen[call['assinatura']] = seen.get(call['assinatura'], 0) + 1
+        repeated = {signature: count for signature, count in seen.items() if count > 1}
+
+        # Padrão N+1: a mesma forma de consulta repetida para valores diferentes (ex: uma por veículo)
+        shapes: Dict[str, set] = {}
+        for call in calls:
+            shape = f"{call['tabela']} {call['operacao']} {','.join(sorted(call['filtros']))}"
+            shapes.setdefault(shape, set()).add(call['assinatura'])
+        n_plus_one = sorted(shape for shape, signatures in shapes.items() if len(signatures) >= N_PLUS_ONE_MIN)
+
+        alerts = []
+        if repeated:
+            alerts.append('repetidas')
+        if n_plus_one:
+            alerts.append('n+1')
+        if len(calls) > max_round_trips:
+            alerts.append('round_trips')
+        return {
+            "chamadas": len(calls),
+            "ms": round(sum(call['ms'] for call in calls), 1),
+            "bytes": sum(call['bytes'] for call in calls),
+            "repetidas": sum(count - 1 for count in repeated.values()),
+            "alertas": alerts,
+            "n_mais_1": n_plus_one,
+            "detalhe": [
+                {**{k: v for k, v in call.items() if k != 'assinatura'}, "repetida": call['assinatura'] in repeated}
+                for call in calls
+            ],
+        }
+
+
+def current_trace() -> Optional[RequestTrace]:
+    """Trace do request atual (None fora de request ou com o trace desligado)."""
+    return request.environ.get(TRACE_KEY)
+
+
+def describe_call(req, table: str, operation: str) -> Dict[str, Any]:
+    """Campos da chamada que não dependem da resposta: tabela, operação, filtros e assinatura."""
+    params = parse_qsl(req.url.query.decode('ascii', 'replace'), keep_blank_values=True)
+    try:
+        body = req.content
+    except Exception:  # upload em streaming: corpo não fica em memória
+        body = b''
+    signature = hashlib.sha1(req.method.encode() + b' ' + str(req.url).encode() + b'\n' + body).hexdigest()
+    return {
+        "tabela": table,
+        "operacao": operation,
+        "filtros": {key: value for key, value in params if key != 'select'},
+        "linhas_enviadas": _count_rows(body),
+        "assinatura": signature,
+    }
+
+
+def _count_rows(body: bytes) -> Optional[int]:
+    if not body or body[:1] not in (b'[', b'{'):
+        return None
+    if body[:1] == b'{':
+        return 1
+    try:
+        return len(json.loads(body))
+    except ValueError:
+        return None
+
+
+def count_rows(content_range: Optional[str]) -> Optional[int]:
+    """Linhas retornadas a partir do Content-Range do PostgREST ('0-24/*' -> 25, '*/0' -> 0)."""
+    if not content_range:
+        return None
+    span = content_range.split('/', 1)[0]
+    if '-' in span:
+        start, end = span.split('-', 1)
+        try:
+            return int(end) - int(start) + 1
+        except ValueError:
+            return None
+    return 0 if content_range.endswith('/0') else None
+
+
+def init_app(app: Flask) -> None:
+    """Liga o trace por request quando Config.TRACE_ENABLED estiver ativo."""
+    if not app.config.get('TRACE_ENABLED'):
+        return
+
+    @app.before_request
+    def _start_trace():
+        request.environ[TRACE_KEY] = RequestTrace()
+        request.environ['transporte.trace_started'] = time.perf_counter()
+
+    @app.after_request
+    def _finish_trace(response):
+        trace = current_trace()
+        if trace is None:
+            return response
+        config = current_app.config
+        summary = trace.summary(config.get('TRACE_MAX_ROUND_TRIPS', 5))
+        response.headers[TRACE_HEADER] = (
+            f"chamadas={summary['chamadas']}; ms={summary['ms']}; bytes={summary['bytes']}; "
+            f"repetidas={summary['repetidas']}; alertas={','.join(summary['alertas']) or '-'}"
+        )
+        if summary['alertas'] or config.get('TRACE_LOG_ALL'):
+            started = request.environ.get('transporte.trace_started', time.perf_counter())
+            print("supabase_trace " + json.dumps({
+                "endpoint": request.endpoint,
+                "metodo": request.method,
+                "caminho": request.path,
+                "status": response.status_code,
+                "duracao_request_ms": round((time.perf_counter() - started) * 1000, 1),
+                **summary,
+            }, ensure_ascii=False, default=str))
+        return response
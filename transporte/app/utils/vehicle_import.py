@@ -0,0 +1,115 @@
+# logistica_app/app/utils/vehicle_import.py
+
+from typing import Any, Dict, IO, List
+
+from werkzeug.datastructures import MultiDict
+
+from .csv_utils import iter_csv_rows
+from .data_access import iter_rows_by_key
+from .odometer import get_odometer_index
+from .alert_engine import get_alert_engine
+
+# Colunas esperadas no CSV de frota (mesmos campos do VehicleForm)
+REQUIRED_COLUMNS = ('placa', 'marca', 'modelo', 'ano', 'tipo_combustivel', 'km_atual')
+VEHICLE_FIELDS = ('placa', 'marca', 'modelo', 'ano', 'tipo_combustivel', 'km_atual')
+
+
+def _validate_row(row: Dict[str, str]) -> Dict[str, Any]:
+    """Valida a linha com as mesmas regras do VehicleForm. Levanta ValueError com as mensagens do form."""
+    from ..blueprints.veiculo.forms import VehicleForm
+
+    formdata = MultiDict({field: (row.get(field) or '').strip() for field in VEHICLE_FIELDS})
+    formdata['placa'] = formdata['placa'].upper()
+    form = VehicleForm(formdata=formdata, meta={'csrf': False})
+    if not form.validate():
+        erros = '; '.join(f"{field}: {', '.join(msgs)}" for field, msgs in form.errors.items())
+        raise ValueError(erros)
+    return {field: getattr(form, field).data for field in VEHICLE_FIELDS}
+
+
+def _result(line_no: int, placa: str, status: str, motivo: str = '') -> Dict[str, Any]:
+    return {"linha": line_no, "placa": placa, "status": status, "motivo": motivo}
+
+
+def import_vehicles(supabase, id_empresa, stream: IO[bytes], batch_size: int = 500) -> Dict[str, Any]:
+    """
+    Cadastra/atualiza a frota a partir de um CSV.
+
+    1. Valida cada linha com as regras do VehicleForm;
+    2. busca de uma vez as placas já cadastradas da empresa e deduplica localmente
+       (placa repetida no arquivo: vale a primeira ocorrência);
+    3. placas novas vão em inserts de várias linhas; placas existentes são atualizadas
+       por upsert no id (o KM nunca retrocede).
+
+    Retorna um relatório por linha: inserido, atualizado ou rejeitado (com motivo).
+    """
+    results: List[Dict[str, Any]] = []
+
+    existing: Dict[str, Dict[str, Any]] = {
+        item['placa'].upper(): item
+        for item in iter_rows_by_key(
+            lambda: supabase.table('Veiculo').select('id, placa, km_atual').eq('id_empresa', id_empresa)
+        )
+    }
+
+    new_rows: List[tuple] = []
+    update_rows: List[tuple] = []
+    seen = set()
+    for line_no, row in iter_csv_rows(stream, REQUIRED_COLUMNS):
+        placa = (row.get('placa') or '').strip().upper()
+        try:
+            vehicle = _validate_row(row)
+        except ValueError as e:
+            results.append(_result(line_no, placa, 'rejeitado', str(e)))
+            continue
+
+        if placa in seen:
+            results.append(_result(line_no, placa, 'rejeitado', 'Placa duplicada no arquivo'))
+            continue
+        seen.add(placa)
+
+        vehicle['id_empresa'] = id_empresa
+        current = existing.get(placa)
+        if current is None:
+            new_rows.append((line_no, vehicle))
+        else:
+            vehicle['id'] = current['id']
+            vehicle['km_atual'] = max(vehicle['km_atual'], current['km_atual'] or 0)
+            update_rows.append((line_no, vehicle))
+
+    index = get_odometer_index()
+    alerts = get_alert_engine()
+
+    def write(batch: List[tuple], status: str, send) -> None:
+        try:
+            response = send([vehicle for _, vehicle in batch])
+            saved = {item['placa']: item for item in (response.data or [])}
+            for line_no, vehicle in batch:
+                results.append(_result(line_no, vehicle['placa'], status))
+                vehicle_id = saved.get(vehicle['placa'], vehicle).get('id')
+                if vehicle_id is not None:
+                    index.advance(id_empresa, vehicle_id, vehicle['km_atual'])
+                    alerts.on_km_update(id_empresa, vehicle_id, vehicle['km_atual'])
+        except Exception as e:
+            if len(batch) == 1:
+                results.append(_result(batch[0][0], batch[0][1]['placa'], 'rejeitado', str(e.args[0] if e.args else e)))
+                return
+            # Um lote recusado (ex: placa já cadastrada em outra empresa) é reenviado linha a linha
+            for item in batch:
+                write([item], status, send)
+
+    for start in range(0, len(new_rows), batch_size):
+        write(new_rows[start:start + batch_size], 'inserido',
+              lambda rows: supabase.table('Veiculo').insert(rows).execute())
+    for start in range(0, len(update_rows), batch_size):
+        write(update_rows[start:start + batch_size], 'atualizado',
+              lambda rows: supabase.table('Veiculo').upsert(rows, on_conflict='id').execute())
+
+    results.sort(key=lambda r: r['linha'])
+    return {
+        "total_linhas": len(results),
+        "inseridos": sum(1 for r in results if r['status'] == 'inserido'),
+        "atualizados": sum(1 for r in results if r['status'] == 'atualizado'),
+        "rejeitados": sum(1 for r in results if r['status'] == 'rejeitado'),
+        "linhas": results,
+    }
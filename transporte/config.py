@@ -10,6 +10,108 @@ class Config:
     SUPABASE_URL = os.environ.get("SUPABASE_URL", "")
     SUPABASE_KEY_ANON = os.environ.get("SUPABASE_KEY_ANON", "")
     SUPABASE_KEY_SERVICE_ROLE = os.environ.get("SUPABASE_KEY_SERVICE_ROLE", "")
+    # 'supabase' (projeto real) ou 'fake' (banco em memória, para benchmarks e testes de carga;
+    # ver app/fake_supabase.py — use junto com STORAGE_BACKEND=local)
+    SUPABASE_BACKEND = os.environ.get("SUPABASE_BACKEND", "supabase")
+
+    # Pool HTTP dos clientes Supabase (um pool por worker, reaproveitado entre requests)
+    SUPABASE_POOL_MAX_CONNECTIONS = int(os.environ.get("SUPABASE_POOL_MAX_CONNECTIONS", 20))
+    SUPABASE_POOL_MAX_KEEPALIVE = int(os.environ.get("SUPABASE_POOL_MAX_KEEPALIVE", 10))
+    SUPABASE_POOL_KEEPALIVE_EXPIRY = float(os.environ.get("SUPABASE_POOL_KEEPALIVE_EXPIRY", 30))
+    SUPABASE_HTTP_TIMEOUT = float(os.environ.get("SUPABASE_HTTP_TIMEOUT", 10))
+    SUPABASE_HTTP_CONNECT_TIMEOUT = float(os.environ.get("SUPABASE_HTTP_CONNECT_TIMEOUT", 5))
+    SUPABASE_HTTP2 = os.environ.get("SUPABASE_HTTP2", "true").lower() == "true"
+    # 'rest' (só PostgREST e Storage: importa menos no cold start) ou 'supabase' (cliente completo)
+    SUPABASE_CLIENT = os.environ.get("SUPABASE_CLIENT", "rest")
+    # Abre a conexão com o PostgREST em segundo plano ao subir cada worker
+    SUPABASE_WARMUP = os.environ.get("SUPABASE_WARMUP", "true").lower() in ("1", "true", "yes")
+
+    # Cache de usuários do Flask-Login (por worker)
+    USER_CACHE_TTL = float(os.environ.get("USER_CACHE_TTL", 60))
+    USER_CACHE_MAXSIZE = int(os.environ.get("USER_CACHE_MAXSIZE", 1024))
+
+    # Tamanho de página das consultas analíticas (não deve passar do max-rows do PostgREST)
+    ANALYTICS_PAGE_SIZE = int(os.environ.get("ANALYTICS_PAGE_SIZE", 1000))
+
+    # Consultas paralelas (ex: seções do dashboard): tamanho do pool e timeout por consulta (s).
+    # O timeout também limita as chamadas HTTP dessas consultas (menor que SUPABASE_HTTP_TIMEOUT)
+    QUERY_POOL_MAX_WORKERS = int(os.environ.get("QUERY_POOL_MAX_WORKERS", 8))
+    QUERY_TIMEOUT = float(os.environ.get("QUERY_TIMEOUT", 5))
+
+    # Backend de cache: 'memory' (LRU por worker) ou 'redis' (compartilhado entre workers do gunicorn)
+    CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "memory")
+    CACHE_REDIS_URL = os.environ.get("CACHE_REDIS_URL", "redis://localhost:6379/0")
+    CACHE_MAXSIZE = int(os.environ.get("CACHE_MAXSIZE", 1024))
+    CACHE_DEFAULT_TTL = float(os.environ.get("CACHE_DEFAULT_TTL", 300))
+    # Rede de segurança: o dashboard é invalidado a cada escrita, o TTL cobre o resto (ex: alertas por data)
+    DASHBOARD_CACHE_TTL = float(os.environ.get("DASHBOARD_CACHE_TTL", 300))
+    # Com CACHE_BACKEND=memory a invalidação não chega aos outros workers: TTL curto (defasagem máxima)
+    DASHBOARD_CACHE_LOCAL_TTL = float(os.environ.get("DASHBOARD_CACHE_LOCAL_TTL", 15))
+    # Opções de veículo dos formulários (invalidadas por versão ao cadastrar veículo)
+    VEHICLE_CHOICES_CACHE_TTL = float(os.environ.get("VEHICLE_CHOICES_CACHE_TTL", 600))
+
+    # Índice de odômetro por worker (último KM por veículo, com Veiculo.km_atual como fonte)
+    ODOMETER_INDEX_TTL = float(os.environ.get("ODOMETER_INDEX_TTL", 300))
+    ODOMETER_INDEX_MAXSIZE = int(os.environ.get("ODOMETER_INDEX_MAXSIZE", 10000))
+
+    # Motor de alertas de manutenção: índices por empresa em cada worker, recarregados a cada ALERT_INDEX_TTL
+    ALERT_INDEX_TTL = float(os.environ.get("ALERT_INDEX_TTL", 300))
+    ALERT_INDEX_MAXSIZE = int(os.environ.get("ALERT_INDEX_MAXSIZE", 1000))
+    # Agendador que pré-calcula os alertas de todas as empresas (thread no worker web, se habilitado;
+    # ou `flask maintenance alert-scheduler` em um processo separado)
+    ALERT_SCHEDULER_ENABLED = os.environ.get("ALERT_SCHEDULER_ENABLED", "false").lower() in ("1", "true", "yes")
+    ALERT_SCHEDULER_INTERVAL = float(os.environ.get("ALERT_SCHEDULER_INTERVAL", 900))
+    ALERT_SCHEDULER_WORKERS = int(os.environ.get("ALERT_SCHEDULER_WORKERS", 4))
+    # Validade dos snapshots de alertas (deve ser maior que o intervalo do agendador)
+    ALERT_SNAPSHOT_TTL = float(os.environ.get("ALERT_SNAPSHOT_TTL", 1800))
+    # Com CACHE_BACKEND=memory a versão do snapshot não chega aos outros workers: TTL curto
+    ALERT_SNAPSHOT_LOCAL_TTL = float(os.environ.get("ALERT_SNAPSHOT_LOCAL_TTL", 15))
+    # Quantos alertas (os mais urgentes) o dashboard exibe
+    DASHBOARD_ALERTS_LIMIT = int(os.environ.get("DASHBOARD_ALERTS_LIMIT", 10))
+
+    # Listagem da frota: veículos por página (padrão e máximo aceito em ?por_pagina=)
+    VEHICLE_LIST_PAGE_SIZE = int(os.environ.get("VEHICLE_LIST_PAGE_SIZE", 50))
+    VEHICLE_LIST_MAX_PAGE_SIZE = int(os.environ.get("VEHICLE_LIST_MAX_PAGE_SIZE", 200))
+
+    # Listagens de abastecimentos e manutenções realizadas (com miniatura da nota fiscal)
+    RECENT_RECORDS_LIMIT = int(os.environ.get("RECENT_RECORDS_LIMIT", 20))
+
+    # Exportação em XLSX (montada inteira antes do envio, ao contrário do CSV): máximo de linhas
+    EXPORT_XLSX_MAX_ROWS = int(os.environ.get("EXPORT_XLSX_MAX_ROWS", 100000))
+
+    # Importação em lote: linhas por insert de várias linhas
+    IMPORT_BATCH_SIZE = int(os.environ.get("IMPORT_BATCH_SIZE", 500))
+
+    # Notas fiscais: 'supabase' (Supabase Storage) ou 'local' (diretório no servidor, para desenvolvimento/testes)
+    STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "supabase")
+    STORAGE_BUCKET = os.environ.get("STORAGE_BUCKET", "notas-fiscais")
+    STORAGE_LOCAL_DIR = os.environ.get("STORAGE_LOCAL_DIR", "")  # vazio = <instance>/uploads
+    # Validade (s) da URL assinada para a qual /storage/<caminho> redireciona (bucket privado)
+    STORAGE_SIGNED_URL_TTL = int(os.environ.get("STORAGE_SIGNED_URL_TTL", 300))
+    # Uploads em segundo plano: threads por worker, tamanho do bloco de cópia e novas tentativas
+    UPLOAD_POOL_MAX_WORKERS = int(os.environ.get("UPLOAD_POOL_MAX_WORKERS", 2))
+    UPLOAD_CHUNK_SIZE = int(os.environ.get("UPLOAD_CHUNK_SIZE", 64 * 1024))
+    UPLOAD_RETRIES = int(os.environ.get("UPLOAD_RETRIES", 2))
+
+    # Fotos de nota fiscal: redução/recompressão e miniatura em um pool de processos (requer Pillow)
+    RECEIPT_PROCESS_WORKERS = int(os.environ.get("RECEIPT_PROCESS_WORKERS", 2))
+    RECEIPT_MAX_DIMENSION = int(os.environ.get("RECEIPT_MAX_DIMENSION", 1600))
+    RECEIPT_JPEG_QUALITY = int(os.environ.get("RECEIPT_JPEG_QUALITY", 80))
+    RECEIPT_THUMBNAIL_SIZE = int(os.environ.get("RECEIPT_THUMBNAIL_SIZE", 256))
+    RECEIPT_PROCESS_TIMEOUT = float(os.environ.get("RECEIPT_PROCESS_TIMEOUT", 60))
+
+    # Métricas Prometheus em /metrics, só com "Authorization: Bearer <METRICS_TOKEN>" (sem token, 404)
+    METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+    METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+    # Trace das chamadas ao Supabase por request (depuração de N+1): cabeçalho X-Supabase-Trace e
+    # log em JSON dos requests com consultas repetidas ou mais de TRACE_MAX_ROUND_TRIPS chamadas
+    TRACE_ENABLED = os.environ.get("TRACE_ENABLED", "false").lower() in ("1", "true", "yes")
+    TRACE_MAX_ROUND_TRIPS = int(os.environ.get("TRACE_MAX_ROUND_TRIPS", 5))
+    TRACE_LOG_ALL = os.environ.get("TRACE_LOG_ALL", "false").lower() in ("1", "true", "yes")
+
+    # Perfil do cold start (tempo de cada fase do create_app): uma linha `startup {json}` por worker
+    STARTUP_PROFILE = os.environ.get("STARTUP_PROFILE", "true").lower() in ("1", "true", "yes")
 
     # Configuração do banco NoSQL (ex: MongoDB, S3 para storage, etc.)
     NOSQL_STORAGE_URL = os.environ.get("NOSQL_STORAGE_URL", "")
@@ -0,0 +1,17 @@
+-- Agregados corridos de abastecimento por veículo.
+-- Mantido pela aplicação a cada abastecimento registrado e reconstruível a partir
+-- do histórico com `flask --app app fueling rebuild-aggregates`.
+
+create table if not exists "Resumo_Abastecimento_Veiculo" (
+    id_veiculo    bigint primary key references "Veiculo"(id) on delete cascade,
+    id_empresa    bigint not null,
+    custo_total   numeric(16, 4) not null default 0,
+    total_litros  numeric(14, 2) not null default 0,
+    ultimo_km     integer,
+    soma_km_l     numeric(14, 2) not null default 0,
+    num_km_l      integer not null default 0,
+    atualizado_em timestamptz not null default now()
+);
+
+create index if not exists resumo_abastecimento_veiculo_empresa_idx
+    on "Resumo_Abastecimento_Veiculo" (id_empresa);
@@ -0,0 +1,79 @@
+-- Registro transacional de abastecimento, chamado pela aplicação via RPC:
+--   supabase.rpc('registrar_abastecimento', {...})
+-- Em uma única transação (e um único round trip):
+--   1. trava a linha do veículo e valida o KM contra Veiculo.km_atual;
+--   2. insere o Abastecimento;
+--   3. avança Veiculo.km_atual;
+--   4. acumula o abastecimento em Resumo_Abastecimento_Veiculo (ver 001).
+-- O `for update` serializa registros concorrentes do mesmo veículo: o segundo
+-- operador espera o primeiro e é validado contra o KM já atualizado.
+--
+-- Erros (retornados pelo PostgREST como APIError):
+--   P0002  veículo inexistente ou de outra empresa
+--   22023  KM menor ou igual à última KM registrada
+
+create or replace function registrar_abastecimento(
+    p_id_empresa          "Abastecimento".id_empresa%type,
+    p_id_veiculo          "Abastecimento".id_veiculo%type,
+    p_data_abastecimento  "Abastecimento".data_abastecimento%type,
+    p_litros              "Abastecimento".litros%type,
+    p_valor_litro         "Abastecimento".valor_litro%type,
+    p_km_registro         "Abastecimento".km_registro%type,
+    p_local_abastecimento "Abastecimento".local_abastecimento%type default null,
+    p_id_usuario_registro "Abastecimento".id_usuario_registro%type default null,
+    p_url_nota_fiscal     "Abastecimento".url_nota_fiscal%type default null
+)
+returns table (id_abastecimento "Abastecimento".id%type, km_anterior "Veiculo".km_atual%type)
+language plpgsql
+as $$
+declare
+    v_km_atual "Veiculo".km_atual%type;
+    v_id       "Abastecimento".id%type;
+begin
+    select v.km_atual into v_km_atual
+      from "Veiculo" v
+     where v.id = p_id_veiculo and v.id_empresa = p_id_empresa
+       for update;
+
+    if not found then
+        raise exception 'Veículo % não encontrado para esta empresa.', p_id_veiculo
+            using errcode = 'P0002';
+    end if;
+
+    if p_km_registro <= coalesce(v_km_atual, 0) then
+        raise exception 'A KM (%) deve ser maior que a última KM registrada (%).', p_km_registro, coalesce(v_km_atual, 0)
+            using errcode = '22023';
+    end if;
+
+    insert into "Abastecimento" (
+        id_empresa, id_veiculo, data_abastecimento, litros, valor_litro,
+        km_registro, local_abastecimento, id_usuario_registro, url_nota_fiscal
+    ) values (
+        p_id_empresa, p_id_veiculo, p_data_abastecimento, p_litros, p_valor_litro,
+        p_km_registro, p_local_abastecimento, p_id_usuario_registro, p_url_nota_fiscal
+    )
+    returning "Abastecimento".id into v_id;
+
+    update "Veiculo" set km_atual = p_km_registro where id = p_id_veiculo;
+
+    insert into "Resumo_Abastecimento_Veiculo" as r (
+        id_veiculo, id_empresa, custo_total, total_litros, ultimo_km, soma_km_l, num_km_l, atualizado_em
+    ) values (
+        p_id_veiculo, p_id_empresa, p_litros * p_valor_litro, p_litros, p_km_registro, 0, 0, now()
+    )
+    on conflict (id_veiculo) do update set
+        custo_total   = r.custo_total + excluded.custo_total,
+        total_litros  = r.total_litros + excluded.total_litros,
+        soma_km_l     = r.soma_km_l + case
+                            when r.ultimo_km is not null and excluded.ultimo_km > r.ultimo_km and p_litros > 0
+                            then round((excluded.ultimo_km - r.ultimo_km)::numeric / p_litros, 2)
+                            else 0 end,
+        num_km_l      = r.num_km_l + case
+                            when r.ultimo_km is not null and excluded.ultimo_km > r.ultimo_km and p_litros > 0
+                            then 1 else 0 end,
+        ultimo_km     = greatest(r.ultimo_km, excluded.ultimo_km),
+        atualizado_em = now();
+
+    return query select v_id, v_km_atual;
+end;
+$$;
@@ -0,0 +1,32 @@
+-- Custo de manutenção agrupado por veículo, calculado no banco e chamado via RPC:
+--   supabase.rpc('resumo_manutencao_por_veiculo', {'p_id_empresa': ..., 'p_data_inicio': ..., 'p_data_fim': ...})
+-- Devolve uma linha por veículo (soma e contagem), então o tráfego e o processamento
+-- na aplicação crescem com o tamanho da frota, não com o número de manutenções.
+-- O intervalo de datas é opcional e inclusivo nas duas pontas (null = sem limite).
+-- Roda como o usuário que chama (security invoker): as políticas de RLS continuam valendo.
+
+create or replace function resumo_manutencao_por_veiculo(
+    p_id_empresa  "Manutencao_Realizada".id_empresa%type,
+    p_data_inicio "Manutencao_Realizada".data_realizacao%type default null,
+    p_data_fim    "Manutencao_Realizada".data_realizacao%type default null
+)
+returns table (
+    id_veiculo      "Manutencao_Realizada".id_veiculo%type,
+    placa           "Veiculo".placa%type,
+    custo_total     numeric,
+    num_manutencoes bigint
+)
+language sql
+stable
+as $$
+    select m.id_veiculo, v.placa, coalesce(sum(m.custo_total), 0), count(*)
+      from "Manutencao_Realizada" m
+      join "Veiculo" v on v.id = m.id_veiculo
+     where m.id_empresa = p_id_empresa
+       and (p_data_inicio is null or m.data_realizacao >= p_data_inicio)
+       and (p_data_fim is null or m.data_realizacao <= p_data_fim)
+     group by m.id_veiculo, v.placa;
+$$;
+
+create index if not exists manutencao_realizada_empresa_data_idx
+    on "Manutencao_Realizada" (id_empresa, data_realizacao);
@@ -0,0 +1,16 @@
+-- Índices da listagem paginada da frota (/veiculos/list).
+-- A paginação é por chave composta (coluna de ordenação, id) dentro da empresa:
+-- cada página é uma busca no índice a partir do cursor, sem offset.
+
+create index if not exists veiculo_empresa_placa_idx
+    on "Veiculo" (id_empresa, placa, id);
+
+create index if not exists veiculo_empresa_ano_idx
+    on "Veiculo" (id_empresa, ano, id);
+
+create index if not exists veiculo_empresa_km_idx
+    on "Veiculo" (id_empresa, km_atual, id);
+
+-- Filtro por combustível é de igualdade e baixa cardinalidade: combinado com a ordenação padrão
+create index if not exists veiculo_empresa_combustivel_placa_idx
+    on "Veiculo" (id_empresa, tipo_combustivel, placa, id);
@@ -0,0 +1,6 @@
+-- URL da miniatura da foto da nota fiscal, gerada em segundo plano junto com a
+-- versão recomprimida da imagem (ver app/utils/receipt_images.py).
+-- Fica nula para PDFs e enquanto o processamento não termina.
+
+alter table "Abastecimento" add column if not exists url_nota_fiscal_miniatura text;
+alter table "Manutencao_Realizada" add column if not exists url_nota_fiscal_miniatura text;
@@ -0,0 +1,8 @@
+-- Índices da listagem da frota ordenada por marca ou modelo (/veiculos/list?ordem=...),
+-- no mesmo formato de sql/004: (empresa, coluna de ordenação, id) para a paginação por chave.
+
+create index if not exists veiculo_empresa_marca_idx
+    on "Veiculo" (id_empresa, marca, id);
+
+create index if not exists veiculo_empresa_modelo_idx
+    on "Veiculo" (id_empresa, modelo, id);
@@ -0,0 +1,14 @@
+-- url_nota_fiscal / url_nota_fiscal_miniatura passam a guardar o caminho do arquivo no
+-- storage (<pasta>/<empresa>/...), servido por /storage/<caminho> com login e URL assinada
+-- (ver app/utils/storage.py). Converte as linhas antigas, que guardavam a URL pública do
+-- bucket ou o caminho /storage/... do backend local. Depois disso, torne o bucket privado.
+
+update "Abastecimento"
+   set url_nota_fiscal = regexp_replace(url_nota_fiscal, '^(https?://[^/]+/storage/v1/object/public/[^/]+/|/storage/)', ''),
+       url_nota_fiscal_miniatura = regexp_replace(url_nota_fiscal_miniatura, '^(https?://[^/]+/storage/v1/object/public/[^/]+/|/storage/)', '')
+ where url_nota_fiscal ~ '^(https?://|/storage/)' or url_nota_fiscal_miniatura ~ '^(https?://|/storage/)';
+
+update "Manutencao_Realizada"
+   set url_nota_fiscal = regexp_replace(url_nota_fiscal, '^(https?://[^/]+/storage/v1/object/public/[^/]+/|/storage/)', ''),
+       url_nota_fiscal_miniatura = regexp_replace(url_nota_fiscal_miniatura, '^(https?://[^/]+/storage/v1/object/public/[^/]+/|/storage/)', '')
+ where url_nota_fiscal ~ '^(https?://|/storage/)' or url_nota_fiscal_miniatura ~ '^(https?://|/storage/)';